@@ -0,0 +1,387 @@
+"""
+Benchmark suite for building and running levels under the SDL dummy video driver.
+
+The suite times Level.__init__, whole frames of Level.run in the pellet phase and in both boss
+phases, and the individual stages of a frame, for a growing number of ghosts. A stress test then
+fills the Devil's board with as many fireballs as ghosts and times the collision queries of a tick,
+which go through the spatial hash and should cost about the same however many sprites there are.
+A swarm test times the ghost systems of a tick, run on every ghost of the entity store at once,
+for up to ten thousand random ghosts on the start level tiled four times in each direction, and a
+large-map test times the updates and frames of a player wandering the start level tiled up to eight
+times in each direction, whose frames should cost the same however big the map is. Last, the
+Gym-style environments are stepped with random actions, alone and in a vector, and the suite fails
+whenever they run slower than MIN_STEPS_PER_SECOND, with or without a baseline to compare against.
+The player is made invulnerable so every phase keeps running for as long as it is measured. Results are written as
+JSON with the median, mean and minimum time of every benchmark in microseconds, and can be saved
+as a baseline that later runs are compared against. The occupancy of the sprite pools after every
+timed run of a phase is reported next to the results, so allocation churn shows up as built sprites.
+
+Run this module from the app/src directory:
+
+    python ../benchmarks/benchmark.py --save-baseline
+    python ../benchmarks/benchmark.py --compare
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import pygame
+
+from app.src.entities.enemy import Fireball, Ghost
+from app.src.gameplay.entitystore import EntityGroup, EntityStore
+from app.src.gameplay.environment import ACTIONS, VectorEnvironment, headlessSurface
+from app.src.gameplay.level import Level
+from app.src.gameplay.navigation import NavGraph
+from app.src.gameplay.pelletfield import COIN
+from app.src.gameplay.wallgrid import WallGrid
+from app.src.settings.levelcompiler import loadLevel, tileLevel
+from app.src.settings.settings import startLevelCompiled, tile_size
+
+PHASES = ('pellets', 'boss1', 'boss2')
+GHOST_COUNTS = (4, 16, 64, 256)
+STRESS_COUNTS = (16, 64, 256, 1024)
+SWARM_COUNTS = (1000, 10000)
+SWARM_TILING = 4
+LARGE_TILINGS = (1, 4, 8)
+# the directions the player of the large-map test takes in turn, each for a third of a second
+WANDER = ('left', 'up', 'right', 'down')
+ENVIRONMENT_COUNTS = (1, 8)
+# the environment steps per second of random play below which the suite fails, about half the rate of the stock level
+MIN_STEPS_PER_SECOND = 5000
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# the stages of a frame timed on their own, as (name, function of the level); the level is advanced
+# by an untimed update before every call, so each stage sees the state it meets in a real frame
+STAGES = (
+    ('wallCollision', lambda level: level.wallCollision()),
+    ('playerPossibleMoves', lambda level: level.playerPossibleMoves()),
+    ('fakeCollisionsGhost', lambda level: level.fakeCollisionsGhost()),
+    ('ghostUpdate', lambda level: level.ghost_sprites.update()),
+    ('wallCollisionGhosts', lambda level: level.wallCollisionGhosts()),
+    ('enemyCollision', lambda level: level.enemyCollision()),
+    ('update', lambda level: level.update()),
+    ('draw', lambda level: level.draw()),
+)
+
+
+def collisions(level):
+    """Run every collision query of a tick of the second boss phase."""
+    level.enemyCollision()
+    level.fireballCollision()
+    level.speedCollision()
+    level.shieldCollision()
+    level.secondBossCollision()
+
+
+def _time(function, calls, before=None):
+    """Call a function a number of times, each after an untimed call of before, and return the durations in microseconds."""
+    durations = []
+    clock = time.perf_counter_ns
+    for _ in range(calls):
+        if before:
+            before()
+        start = clock()
+        function()
+        durations.append((clock() - start) / 1000)
+    return durations
+
+
+def _summary(durations):
+    """Return the statistics of a benchmark."""
+    return {
+        'calls': len(durations),
+        'median': round(statistics.median(durations), 2),
+        'mean': round(statistics.fmean(durations), 2),
+        'min': round(min(durations), 2),
+    }
+
+
+def prepareLevel(surface, phase: str, ghosts: int, seed: int = 0):
+    """
+    Build a level in a phase of the game with a number of ghosts and an invulnerable player.
+
+    Args:
+        surface (pygame.Surface): The surface the level is drawn on.
+        phase (str): One of PHASES.
+        ghosts (int): The number of ghosts roaming the level.
+        seed (int): The seed of the level, which also places the extra ghosts.
+
+    Returns:
+        Level: The level, ready to run.
+    """
+    level = Level(surface, 'original', controls=None, seed=seed)
+    level.godMode = True
+    level.invincible = True
+    cells = [cell for cell in level.levelMap.openCells if level.distanceField.slot(*cell) >= 0]
+    while len(level.ghost_sprites) < ghosts:
+        col, row = level.random.choice(cells)
+        level.ghost_sprites.add(Ghost(tile_size, col * tile_size, row * tile_size, 'random', level.distanceField))
+    if phase != 'pellets':
+        level.pellets.clear(COIN)
+        level.staleBackground = True
+        level.boss = 1 if phase == 'boss1' else 2
+        level.endBossScreen()
+    if phase == 'boss2':
+        level.bossGhost.empty()
+    return level
+
+
+def prepareStress(surface, count: int, seed: int = 0):
+    """
+    Build a level in the second boss phase with a number of ghosts and as many fireballs that never burn out.
+
+    Args:
+        surface (pygame.Surface): The surface the level is drawn on.
+        count (int): The number of ghosts and of fireballs.
+        seed (int): The seed of the level, which also places the ghosts and the fireballs.
+
+    Returns:
+        Level: The level, ready to run.
+    """
+    level = prepareLevel(surface, 'boss2', count, seed)
+    level.timers.cancel(level.bossTimer)
+    fireballs = level.devil.sprite.fireballs
+    cells = level.levelMap.openCells
+    while len(fireballs) < count:
+        col, row = level.random.choice(cells)
+        fireballs.add(Fireball(col * tile_size, row * tile_size))
+    return level
+
+
+def prepareSwarm(count: int, tiling: int = SWARM_TILING, seed: int = 0):
+    """
+    Build the ghosts of a scaled-up map, the start level repeated in both directions.
+
+    Args:
+        count (int): The number of random ghosts.
+        tiling (int): The number of copies of the start level in each direction.
+        seed (int): The seed placing and turning the ghosts.
+
+    Returns:
+        EntityGroup: The ghosts, kept in an entity store of the tiled map.
+    """
+    level = tileLevel(loadLevel(startLevelCompiled), tiling, tiling)
+    navGraph = NavGraph(level)
+    store = EntityStore(WallGrid(level), navGraph, None, level.ghostHouse(), seed, count)
+    cells = [cell for cell in level.openCells if navGraph.exitsAt(*cell)]
+    rng = random.Random(seed)
+    group = EntityGroup(store)
+    for _ in range(count):
+        col, row = rng.choice(cells)
+        group.add(Ghost(tile_size, col * tile_size, row * tile_size))
+    return group
+
+
+def swarmTick(group, player):
+    """Run the ghost systems of a tick on every ghost of a group."""
+    store = group.store
+    store.refreshExits()
+    group.update()
+    store.move()
+    store.resolveWalls()
+    store.overlapping(player)
+
+
+def prepareLarge(surface, tiling: int, seed: int = 0):
+    """
+    Build a level on the start level repeated in both directions, with an invulnerable player.
+
+    Args:
+        surface (pygame.Surface): The surface the level is drawn on.
+        tiling (int): The number of copies of the start level in each direction.
+        seed (int): The seed of the level.
+
+    Returns:
+        Level: The level, ready to run.
+    """
+    level = Level(surface, 'original', level=tileLevel(loadLevel(startLevelCompiled), tiling, tiling),
+                  controls=None, seed=seed)
+    level.godMode = True
+    level.invincible = True
+    return level
+
+
+def wander(level):
+    """Return a function advancing a level by a tick, steering the player around so the camera scrolls."""
+    actions = itertools.cycle([action for action in WANDER for _ in range(20)])
+    return lambda: level.update(next(actions))
+
+
+def stepRandomly(environments, seed: int = 0):
+    """Return a function stepping every environment of a vector with a random action."""
+    actions = random.Random(seed)
+    count = len(environments.environments)
+    return lambda: environments.step([actions.randrange(len(ACTIONS)) for _ in range(count)])
+
+
+def run(frames: int = 300, ghostCounts=GHOST_COUNTS, builds: int = 20, stressCounts=STRESS_COUNTS,
+        swarmCounts=SWARM_COUNTS, largeTilings=LARGE_TILINGS, environmentCounts=ENVIRONMENT_COUNTS):
+    """
+    Run the benchmark suite.
+
+    Args:
+        frames (int): The number of frames and stage calls timed for every benchmark.
+        ghostCounts (Iterable[int]): The numbers of ghosts every phase is timed with.
+        builds (int): The number of levels built to time Level.__init__.
+        stressCounts (Iterable[int]): The numbers of ghosts and fireballs the collision queries are timed with.
+        swarmCounts (Iterable[int]): The numbers of ghosts the systems of the entity store are timed with.
+        largeTilings (Iterable[int]): The numbers of copies of the start level in each direction the large maps have.
+        environmentCounts (Iterable[int]): The numbers of environments stepped together.
+
+    Returns:
+        dict: The environment the suite ran in, the statistics of every benchmark and the occupancy of
+        the sprite pools after every timed run of a phase, keyed by name.
+    """
+    surface = headlessSurface()
+    results = {}
+    pools = {}
+    cold = _time(lambda: Level(surface, 'original', controls=None), 1)
+    results['init/cold'] = _summary(cold)
+    results['init'] = _summary(_time(lambda: Level(surface, 'original', controls=None), builds))
+    for phase in PHASES:
+        for ghosts in ghostCounts:
+            level = prepareLevel(surface, phase, ghosts)
+            level.run()
+            results[f'run/{phase}/{ghosts}'] = _summary(_time(level.run, frames))
+            pools[f'run/{phase}/{ghosts}'] = level.poolStats()
+            for name, stage in STAGES:
+                level = prepareLevel(surface, phase, ghosts)
+                level.run()
+                before = None if name == 'update' else level.update
+                results[f'{name}/{phase}/{ghosts}'] = _summary(_time(lambda: stage(level), frames, before))
+    for count in stressCounts:
+        level = prepareStress(surface, count)
+        level.run()
+        results[f'stress/collisions/{count}'] = _summary(_time(lambda: collisions(level), frames, level.update))
+        results[f'stress/update/{count}'] = _summary(_time(level.update, frames))
+    player = pygame.Rect(9 * tile_size, 16 * tile_size, tile_size, tile_size)
+    for count in swarmCounts:
+        group = prepareSwarm(count)
+        results[f'swarm/update/{count}'] = _summary(_time(lambda: swarmTick(group, player), frames))
+    for tiling in largeTilings:
+        level = prepareLarge(surface, tiling)
+        level.run()
+        results[f'large/update/{tiling}'] = _summary(_time(wander(level), frames))
+        results[f'large/draw/{tiling}'] = _summary(_time(level.draw, frames, wander(level)))
+    for count in environmentCounts:
+        environments = VectorEnvironment(count, surface=surface)
+        environments.reset(0)
+        results[f'environment/step/{count}'] = _summary(_time(stepRandomly(environments), frames))
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'machine': platform.machine(),
+            'frames': frames,
+        },
+        'results': results,
+        'pools': pools,
+    }
+
+
+def compare(current, baseline, threshold: float = 0.25, noise: float = 2.0):
+    """
+    Compare the results of a run against a baseline.
+
+    Args:
+        current (dict): The output of run.
+        baseline (dict): The output of an earlier run.
+        threshold (float): The relative slowdown of the median above which a benchmark regressed.
+        noise (float): The slowdown in microseconds below which a benchmark never counts as regressed.
+
+    Returns:
+        List[dict]: The name, baseline and current median and ratio of every benchmark that regressed.
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if not before or not before['median']:
+            continue
+        ratio = result['median'] / before['median']
+        if ratio > 1 + threshold and result['median'] - before['median'] > noise:
+            regressions.append({'name': name, 'baseline': before['median'], 'current': result['median'],
+                                'ratio': round(ratio, 2)})
+    return regressions
+
+
+def belowFloor(current, floor: float = MIN_STEPS_PER_SECOND):
+    """
+    Return the environment benchmarks of a run that step fewer environments per second than a floor.
+
+    Args:
+        current (dict): The output of run.
+        floor (float): The lowest acceptable number of environment steps per second, from the median step.
+
+    Returns:
+        List[dict]: The name and steps per second of every environment benchmark below the floor.
+    """
+    slow = []
+    for name, result in current['results'].items():
+        if not name.startswith('environment/step/') or not result['median']:
+            continue
+        stepsPerSecond = int(name.rsplit('/', 1)[1]) * 1e6 / result['median']
+        if stepsPerSecond < floor:
+            slow.append({'name': name, 'stepsPerSecond': round(stepsPerSecond), 'floor': floor})
+    return slow
+
+
+def main(arguments=None):
+    """
+    Run the suite from the command line.
+
+    Returns:
+        int: 1 if the environments ran below the floor or a regression was found when comparing against the
+        baseline, else 0.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--ghosts', type=int, nargs='+', default=list(GHOST_COUNTS))
+    parser.add_argument('--stress', type=int, nargs='*', default=list(STRESS_COUNTS),
+                        help='the numbers of ghosts and fireballs of the stress test, none to skip it')
+    parser.add_argument('--swarm', type=int, nargs='*', default=list(SWARM_COUNTS),
+                        help='the numbers of ghosts of the swarm test, none to skip it')
+    parser.add_argument('--large', type=int, nargs='*', default=list(LARGE_TILINGS),
+                        help='the numbers of copies of the start level in each direction of the large maps, none to skip it')
+    parser.add_argument('--environments', type=int, nargs='*', default=list(ENVIRONMENT_COUNTS),
+                        help='the numbers of environments stepped together, none to skip them')
+    parser.add_argument('--floor', type=float, default=MIN_STEPS_PER_SECOND,
+                        help='the environment steps per second below which the suite fails')
+    parser.add_argument('--output', help='write the results to this file instead of standard output')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.25)
+    options = parser.parse_args(arguments)
+
+    results = run(options.frames, options.ghosts, stressCounts=options.stress, swarmCounts=options.swarm,
+                  largeTilings=options.large, environmentCounts=options.environments)
+    results['belowFloor'] = belowFloor(results, options.floor)
+    if options.compare:
+        with open(options.baseline) as baselineFile:
+            results['regressions'] = compare(results, json.load(baselineFile), options.threshold)
+    encoded = json.dumps(results, indent=2)
+    if options.output:
+        with open(options.output, 'w') as outputFile:
+            outputFile.write(encoded)
+    else:
+        print(encoded)
+    if options.save_baseline:
+        with open(options.baseline, 'w') as baselineFile:
+            baselineFile.write(encoded)
+    return 1 if results['belowFloor'] or results.get('regressions') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,29 +1,53 @@
 """
 Enemy module contains classes for the enemies in the game
 """
-import csv
-import time
-from random import choice
+import random
 
 import pygame
 
 
+from app.src.gameplay.entitystore import Component, DirectionView, RectView
+from app.src.gameplay.navigation import ALL_EXITS
+from app.src.gameplay.opencells import OpenCellIndex, DEFAULT_RADIUS
+from app.src.gameplay.spatialhash import SpatialHash, HashedGroup
+from app.src.entities.pool import Poolable, SpritePool
 from app.src.settings.settings import tile_size, numberOfTileX, numberOfTileY
+from app.src.settings.additional import assets
 from app.src.settings.tiles import AnimatedTile, StaticTile
 
 
-class Ghost(AnimatedTile):
+class Ghost(Poolable, AnimatedTile):
     """
-    A ghost enemy that moves randomly around the screen
+    A ghost enemy that moves around the screen, either randomly or towards a target
+
+    The behaviour is 'random', or one of 'chase', 'ambush' and 'scatter', for which the level sets
+    the target tile every frame and the ghost follows the distance field towards it. Ghosts spawned
+    by the GhostBoss come from a pool and are respawned instead of built again.
+
+    In a level the ghost is a view of the entity store of its group, whose systems move every ghost
+    at once; the components below are read from and written to the arrays of that store. Its rect
+    and direction are then write-through views: changing them in place, as in ghost.rect.x += 64,
+    changes the store too, but a copy or a moved rect is a plain value that must be assigned back.
     """
 
-    def __init__(self, size, x, y):
+    store = None
+    slot = None
+    rect = Component('rect', RectView)
+    direction = Component('direction', DirectionView)
+    speed = Component('speed')
+    exits = Component('exits')
+    previousWay = Component('previousWay')
+    target = Component('target')
+
+    def __init__(self, size, x, y, behaviour: str = 'random', distanceField=None):
         """
         Constructor for the Ghost class
 
         :param size: The size of the tile
         :param x: The x position of the Ghost
         :param y: The y position of the Ghost
+        :param behaviour: How the Ghost picks its direction
+        :param distanceField: The distance field used by targeted behaviours
         """
         super().__init__(size, x, y, '../images/ghost')
         self.origin_x = x
@@ -31,47 +55,45 @@ class Ghost(AnimatedTile):
         center_x = x + int(size / 2)
         center_y = y + int(size / 2)
         self.rect = self.image.get_rect(center=(center_x, center_y))
-        self.possibleMoves = [1, 1, 1, 1]
+        self.exits = ALL_EXITS
         self.direction = pygame.math.Vector2(0, 0)
         self.previousWay = 2
         self.speed = 2
+        self.behaviour = behaviour
+        self.distanceField = distanceField
+        self.target = None
+        self.corner = 0
+        self.spawn = self.rect.copy()
 
-    def move(self):
-        """
-        Moves the Ghost in a random direction
-        """
-        if self.rect.x > 605:
-            self.rect.x = -25
-        elif self.rect.x < -25:
-            self.rect.x = 605
-
-        if not self.rect.x % 32 and not self.rect.y % 32:
-            indices = [i for i in range(len(self.possibleMoves)) if self.possibleMoves[i] == 1]
-            if self.rect.y != 320 or not 256 <= self.rect.x <= 352:
-                if (self.previousWay + 2) % 4 in indices:
-                    indices.remove((self.previousWay + 2) % 4)
-                if not indices:
-                    indices.append(4)
-            randomIndex = choice(indices)
-            self.previousWay = randomIndex
-            if randomIndex == 0:
-                self.direction.y = -1
-                self.direction.x = 0
-            elif randomIndex == 1:
-                self.direction.x = 1
-                self.direction.y = 0
-            elif randomIndex == 2:
-                self.direction.y = 1
-                self.direction.x = 0
-            elif randomIndex == 3:
-                self.direction.x = -1
-                self.direction.y = 0
+    def respawn(self, size, x, y, behaviour: str = 'random', distanceField=None):
+        """
+        Puts a pooled Ghost on a new spawn as if it had just been built, reusing its image and animation
 
-    def update(self):
+        :param size: The size of the tile
+        :param x: The x position of the Ghost
+        :param y: The y position of the Ghost
+        :param behaviour: How the Ghost picks its direction
+        :param distanceField: The distance field used by targeted behaviours
+        """
+        self.origin_x = x
+        self.origin_y = y
+        self.spawn = self.image.get_rect(center=(x + int(size / 2), y + int(size / 2)))
+        self.behaviour = behaviour
+        self.distanceField = distanceField
+        self.corner = 0
+        self.speed = 2
+        self.playhead.restart()
+        self.reset()
+
+    def reset(self):
         """
-        Updates the Ghost's position
+        Puts the Ghost back on its spawn, standing still
         """
-        self.move()
+        self.rect = self.spawn.copy()
+        self.exits = ALL_EXITS
+        self.direction = pygame.math.Vector2(0, 0)
+        self.previousWay = 2
+        self.target = None
 
 
 class GhostBoss(StaticTile):
@@ -79,17 +101,27 @@ class GhostBoss(StaticTile):
     A Ghost boss enemy that spawns Ghost enemies
     """
 
-    def __init__(self, size, x, y):
+    def __init__(self, size, x, y, pool=None, level=None):
         """
         Constructor for the GhostBoss class
 
         :param size: The size of the tile
         :param x: The x position of the GhostBoss
         :param y: The y position of the GhostBoss
+        :param pool: The pool the spawned Ghosts come from, a new one if None
+        :param level: The compiled level whose corners the GhostBoss moves to and in the middle of whose ghost
+            house it spawns Ghosts, the start board and its own tile if None
         """
+        self.ghosts = pool or SpritePool(Ghost)
+        self.mapWidth = level.width if level else numberOfTileX
+        self.mapHeight = level.height if level else numberOfTileY
+        house = level.ghostHouse() if level else ()
+        col, row = house[len(house) // 2] if house else (x // size, y // size)
+        self.spawnX = col * size
+        self.spawnY = row * size
         self.origin_x = x
         self.origin_y = y
-        super().__init__(size, x, y, pygame.image.load('../images/GhostBoss/0.png').convert_alpha())
+        super().__init__(size, x, y, assets.image('../images/GhostBoss/0.png'))
         self.rect = self.image.get_rect(topleft=(x, y))
         self.lives = 4
 
@@ -99,111 +131,178 @@ class GhostBoss(StaticTile):
 
         :param group: The group to add the Ghost to
         """
-        sprite = Ghost(tile_size, 288, 320)
+        sprite = self.ghosts.acquire(tile_size, self.spawnX, self.spawnY)
         group.add(sprite)
 
+    def reset(self):
+        """
+        Puts the GhostBoss back on its spawn with all its lives
+        """
+        self.lives = 4
+        self.rect = self.image.get_rect(topleft=(self.origin_x, self.origin_y))
+
     def update(self):
         """
         Updates the GhostBoss's position
         """
         if self.lives == 3:
-            self.rect = self.image.get_rect(topleft=((numberOfTileX - 2) * tile_size, self.origin_y))
+            self.rect = self.image.get_rect(topleft=((self.mapWidth - 2) * tile_size, self.origin_y))
         elif self.lives == 2:
-            self.rect = self.image.get_rect(topleft=((numberOfTileX - 2) * tile_size, (numberOfTileY - 2) * tile_size))
+            self.rect = self.image.get_rect(topleft=((self.mapWidth - 2) * tile_size, (self.mapHeight - 2) * tile_size))
         elif self.lives == 1:
-            self.rect = self.image.get_rect(topleft=(self.origin_x, (numberOfTileY - 2) * tile_size))
+            self.rect = self.image.get_rect(topleft=(self.origin_x, (self.mapHeight - 2) * tile_size))
 
 
 class Devil(StaticTile):
     """
     A Devil boss enemy that spawns fireballs
+
+    Impact points and fireballs are timed by the scheduler of the level: an impact point turns into
+    a fireball when its timer fires, and a fireball burns out when its own does.
     """
 
-    def __init__(self, size, x, y):
+    def __init__(self, size, x, y, level, timers, rng=None, broadphase=None):
         """
         Constructor for the Devil class
 
         :param size: The size of the tile
         :param x: The x position of the GhostBoss
         :param y: The y position of the GhostBoss
+        :param level: The compiled level the Devil targets fireballs on, whose open-cell index it shares
+        :param timers: The scheduler of the level timing the impact points and fireballs
+        :param rng: The random generator placing the impact points, the global one if None
+        :param broadphase: The spatial hash of the level the fireballs are filed in, a new one if None
         """
+        self.targets = OpenCellIndex.forLevel(level)
+        self.radius = DEFAULT_RADIUS
+        self.timers = timers
+        self.random = rng or random
         self.origin_x = x
         self.origin_y = y
-        super().__init__(size, x, y, pygame.image.load('../images/devil/0.png').convert_alpha())
+        super().__init__(size, x, y, assets.image('../images/devil/0.png'))
         self.rect = self.image.get_rect(topleft=(x, y))
         self.impact = pygame.sprite.Group()
-        self.fireballs = pygame.sprite.Group()
+        self.fireballs = HashedGroup(broadphase or SpatialHash())
+        self.impactPool = SpritePool(ImpactPoint)
+        self.fireballPool = SpritePool(Fireball)
+
+    def reset(self):
+        """Removes every impact point and fireball, handing them back to their pools"""
+        self.impactPool.releaseAll(self.impact)
+        self.fireballPool.releaseAll(self.fireballs)
+        self.impact.empty()
+        self.fireballs.empty()
 
     def castFireball(self, playerX, playerY):
         """Cast fireball based on player position"""
-        self.impact.add(ImpactPoint(tile_size, playerX, playerY))
+        self.aim(self.impactPool.acquire(tile_size, playerX, playerY, self.targets, self.random, self.radius))
+
+    def castVolley(self, playerX, playerY, count):
+        """
+        Cast several fireballs at once on different cells around the player
+
+        :param playerX: The x position of the player
+        :param playerY: The y position of the player
+        :param count: The number of fireballs, fewer if there are not as many open cells in reach
+        """
+        cells = self.targets.volley(playerX // tile_size, playerY // tile_size, count, self.random, self.radius)
+        for cell in cells:
+            self.aim(self.impactPool.acquire(tile_size, playerX, playerY, self.targets, self.random, self.radius,
+                                             cell))
+
+    def aim(self, impact):
+        """
+        Show an impact point, which turns into a fireball after a second
 
-    def update(self, surface):
-        """Updates the Devil"""
-        self.impact.draw(surface)
-        self.impact.update(self.fireballs)
-        self.fireballs.update()
-        self.fireballs.draw(surface)
+        :param impact: The impact point
+        """
+        self.impact.add(impact)
+        impact.timer = self.timers.after(1, self.ignite, impact)
+
+    def ignite(self, impact):
+        """
+        Turn an impact point into a fireball, which burns out after half a second
 
+        :param impact: The impact point
+        """
+        fireball = self.fireballPool.acquire(impact.posX, impact.posY)
+        self.fireballs.add(fireball)
+        fireball.timer = self.timers.after(0.5, fireball.kill)
+        impact.kill()
+
+    def poolStats(self):
+        """Return the occupancy of the impact point and fireball pools"""
+        return {'impacts': self.impactPool.stats(), 'fireballs': self.fireballPool.stats()}
+
+
+class TimedTile(Poolable, StaticTile):
+    """
+    A pooled tile that lives until a timer of the level fires, which is cancelled if the tile is killed earlier
+    """
 
-class ImpactPoint(StaticTile):
+    timer = None
+
+    def kill(self):
+        """Cancel the timer of the tile and hand it back to its pool"""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        super().kill()
+
+
+class ImpactPoint(TimedTile):
     """A point of impact that does not harm the player but turns into a fireball"""
-    def __init__(self, size, playerX, playerY):
+    def __init__(self, size, playerX, playerY, targets, rng=None, radius=DEFAULT_RADIUS, cell=None):
         """
-        Constructor for the Devil class
+        Constructor for the ImpactPoint class
 
         :param size: The size of the tile
         :param playerX: The x position of the player
         :param playerY: The y position of the player
+        :param targets: The open-cell index of the level
+        :param rng: The random generator choosing the position, the global one if None
+        :param radius: How many tiles away from the player the impact may land
+        :param cell: The (column, row) to land on, chosen around the player if None
         """
-        self.posX = None
-        self.posY = None
-        self.choosePosition(playerX, playerY)
+        self.place(playerX, playerY, targets, rng, radius, cell)
         super().__init__(size, self.posX, self.posY,
-                         pygame.image.load('../images/fireball/caution.png').convert_alpha())
+                         assets.image('../images/fireball/caution.png'))
         self.rect = self.image.get_rect(topleft=(self.posX, self.posY))
-        self.time = time.time()
+
+    def place(self, playerX, playerY, targets, rng=None, radius=DEFAULT_RADIUS, cell=None):
+        """Pick the cell of the impact"""
+        self.posX = None
+        self.posY = None
+        self.targets = targets
+        self.radius = radius
+        self.random = rng or random
+        if cell is None:
+            self.choosePosition(playerX, playerY)
+        else:
+            self.posX = cell[0] * tile_size
+            self.posY = cell[1] * tile_size
+
+    def respawn(self, size, playerX, playerY, targets, rng=None, radius=DEFAULT_RADIUS, cell=None):
+        """Place a pooled impact point again, taking the arguments of the constructor"""
+        self.place(playerX, playerY, targets, rng, radius, cell)
+        self.rect.topleft = (self.posX, self.posY)
 
     def choosePosition(self, player_x, player_y):
-        """Choose nearest point based on random and player position"""
-        with open('../levels/start_level/start_level_walls.csv', 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            rows = list(reader)
-
-        player_col = player_x // tile_size
-        player_row = player_y // tile_size
-
-        min_col = max(0, player_col - 2)
-        max_col = min(len(rows[0]) - 1, player_col + 2)
-        min_row = max(0, player_row - 2)
-        max_row = min(len(rows) - 1, player_row + 2)
-
-        open_spaces = []
-        for row in range(min_row, max_row + 1):
-            for col in range(min_col, max_col + 1):
-                if rows[row][col] == '-1':
-                    open_spaces.append((col, row))
-        impactPos = tuple(choice(open_spaces))
-        self.posX = impactPos[0] * tile_size
-        self.posY = impactPos[1] * tile_size
-
-    def update(self, group):
-        """Update impact"""
-        if time.time() - self.time > 1:
-            group.add(Fireball(self.posX, self.posY))
-            self.kill()
-
-class Fireball(StaticTile):
+        """Choose a random open cell near the player from the shared open-cell index"""
+        col, row = self.targets.choose(player_x // tile_size, player_y // tile_size, self.random, self.radius)
+        self.posX = col * tile_size
+        self.posY = row * tile_size
+
+
+class Fireball(TimedTile):
     """
     A fireball that randomly appears on the screen
     """
     def __init__(self, x, y):
         """Constructor for the fireball class"""
         super().__init__(tile_size, x, y,
-                         pygame.image.load('../images/fireball/fireball.png').convert_alpha())
-        self.time = time.time()
+                         assets.image('../images/fireball/fireball.png'))
 
-    def update(self):
-        """Update fireball"""
-        if time.time() - self.time > 0.5:
-            self.kill()
+    def respawn(self, x, y):
+        """Light a pooled fireball again, taking the arguments of the constructor"""
+        self.rect.topleft = (x, y)
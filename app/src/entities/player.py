@@ -3,14 +3,38 @@ This module defines a Player class used in a game.
 """
 
 import pygame
+from app.src.settings.animation import orientationOf
+from app.src.settings.skins import skins
 from app.src.settings.tiles import AnimatedTile
 
 
+def keyboardControls():
+    """
+    Read the direction the player asks for from the arrow keys.
+
+    Returns:
+        str: 'left', 'right', 'up' or 'down', or None if no arrow key is pressed.
+    """
+    keys = pygame.key.get_pressed()
+    if keys[pygame.K_LEFT]:
+        return 'left'
+    if keys[pygame.K_RIGHT]:
+        return 'right'
+    if keys[pygame.K_UP]:
+        return 'up'
+    if keys[pygame.K_DOWN]:
+        return 'down'
+    return None
+
+
 class Player(AnimatedTile):
     """
     This class represents a player character in the game.
+
+    The clip shown is the skin, or the latest effect put on over it. Effects are stacked, so taking
+    one off shows the one below it again, and clips are only ever swapped by reference.
     """
-    def __init__(self, size, x, y, skin):
+    def __init__(self, size, x, y, skin, clock=None):
         """
         Constructs a new Player object.
 
@@ -19,8 +43,11 @@ class Player(AnimatedTile):
             x (int): The initial x-coordinate of the player.
             y (int): The initial y-coordinate of the player.
             skin (str): The filename of the player sprite.
+            clock (SimulationClock): The clock the animation follows, or None to show the first frame.
         """
-        super().__init__(size, x, y, '../images/pacman/' + skin)
+        super().__init__(size, x, y, skins.path(skin), clock)
+        self.skinClip = self.clip
+        self.effects = []
         self.origin_x = x
         self.origin_y = y
         self.rect = self.image.get_rect(topleft=(x, y))
@@ -31,28 +58,56 @@ class Player(AnimatedTile):
 
     def reverseImage(self):
         """
-        Reverses the player sprite image if the player is moving to the left or up.
+        Shows the current frame of the clip turned towards the direction of travel.
         """
-        if self.direction.x < 0:
-            self.image = pygame.transform.flip(self.image, True, False)
-        if self.direction.y > 0:
-            self.image = pygame.transform.rotate(self.image, -90)
-        if self.direction.y < 0:
-            self.image = pygame.transform.rotate(self.image, 90)
+        self.image = self.playhead.frame(orientationOf(self.direction))
 
-    def move(self):
+    def addEffect(self, clip):
         """
-        Handles the movement of the player based on the input keys.
+        Shows an effect over the skin until it is removed.
+
+        Args:
+            clip (Clip): The clip of the effect.
         """
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT]:
-            self.nextMove = 'left'
-        elif keys[pygame.K_RIGHT]:
-            self.nextMove = 'right'
-        elif keys[pygame.K_UP]:
-            self.nextMove = 'up'
-        elif keys[pygame.K_DOWN]:
-            self.nextMove = 'down'
+        if clip in self.effects:
+            self.effects.remove(clip)
+        self.effects.append(clip)
+        self.clip = clip
+
+    def removeEffect(self, clip):
+        """
+        Stops showing an effect, going back to the effect below it or to the skin.
+
+        Args:
+            clip (Clip): The clip of the effect.
+        """
+        if clip in self.effects:
+            self.effects.remove(clip)
+        self.clip = self.effects[-1] if self.effects else self.skinClip
+
+    def reset(self):
+        """
+        Puts the player back on its spawn, standing still in its skin.
+        """
+        self.rect.topleft = (self.origin_x, self.origin_y)
+        self.nextMove = None
+        self.possibleMoves = [1, 1, 1, 1]
+        self.direction = pygame.math.Vector2(0, 0)
+        self.speed = 1
+        self.effects.clear()
+        self.clip = self.skinClip
+        self.playhead.restart()
+        self.reverseImage()
+
+    def move(self, command=None):
+        """
+        Handles the movement of the player based on the requested direction.
+
+        Args:
+            command (str): 'left', 'right', 'up' or 'down' to queue a turn, or None to keep the queued one.
+        """
+        if command:
+            self.nextMove = command
 
         if self.possibleMoves[0] and self.nextMove == 'up':
             self.direction.y = -1
@@ -67,10 +122,17 @@ class Player(AnimatedTile):
             self.direction.x = -1
             self.direction.y = 0
 
-    def update(self):
+    def animate(self):
         """
-        Updates the state of the player sprite.
+        Shows the frame for the current time of the clock, turned to face the direction of travel.
         """
-        self.move()
-        self.animation()
         self.reverseImage()
+
+    def update(self, command=None):
+        """
+        Updates the state of the player sprite.
+
+        Args:
+            command (str): The direction requested for this tick, or None.
+        """
+        self.move(command)
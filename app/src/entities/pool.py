@@ -0,0 +1,88 @@
+"""
+This module contains the SpritePool class, which recycles short-lived sprites instead of building new ones.
+
+A pooled sprite goes back to its pool when it is killed, and the next acquire hands it out again
+after calling its respawn method, which takes the arguments of its constructor and resets the
+position, timers and animation of the sprite without allocating a new one. Long boss fights then
+keep reusing the same few ghosts, impact points and fireballs.
+"""
+
+
+class Poolable:
+    """
+    A sprite that returns to its pool when it is killed.
+
+    A pooled class defines respawn, taking the same arguments as its constructor and resetting the
+    sprite as if it had just been built with them; SpritePool.acquire calls it on a free sprite.
+
+    Attributes:
+        pool (SpritePool): The pool the sprite came from, or None if it was built directly.
+    """
+
+    pool = None
+    pooled = False
+
+    def kill(self):
+        """Remove the sprite from every group and hand it back to its pool."""
+        super().kill()
+        if self.pool is not None:
+            self.pool.release(self)
+
+
+class SpritePool:
+    """
+    Free sprites of one kind, handed out again instead of building new ones.
+
+    Args:
+        factory (Callable): Builds a new sprite, e.g. its class.
+
+    Attributes:
+        built (int): The number of sprites built because the pool was empty.
+        reused (int): The number of times a free sprite was handed out again.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.built = 0
+        self.reused = 0
+        self._free = []
+
+    def acquire(self, *args, **kwargs):
+        """
+        Return a sprite built or respawned with the arguments of the factory.
+
+        Returns:
+            Poolable: The sprite, which returns to the pool when it is killed.
+        """
+        if self._free:
+            sprite = self._free.pop()
+            sprite.pooled = False
+            sprite.respawn(*args, **kwargs)
+            self.reused += 1
+            return sprite
+        sprite = self.factory(*args, **kwargs)
+        sprite.pool = self
+        self.built += 1
+        return sprite
+
+    def release(self, sprite):
+        """Take back a sprite of the pool that is no longer used."""
+        if sprite.pool is self and not sprite.pooled:
+            sprite.pooled = True
+            self._free.append(sprite)
+
+    def releaseAll(self, group):
+        """Kill every sprite of a group that came from the pool, handing them back."""
+        for sprite in group.sprites():
+            if sprite.pool is self:
+                sprite.kill()
+
+    def stats(self):
+        """
+        Return the occupancy of the pool.
+
+        Returns:
+            dict: The number of sprites built, the number of reuses, and the sprites in use and free.
+        """
+        return {'built': self.built, 'reused': self.reused, 'live': self.built - len(self._free),
+                'free': len(self._free)}
@@ -20,7 +20,9 @@ import pygame
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 from app.src.menu.menu import Menu
-from app.src.settings.settings import screen_width, screen_height
+from app.src.settings.additional import assets
+from app.src.settings.profiler import profiler
+from app.src.settings.settings import screen_width, screen_height, assetPack, tickRate, profileTrace
 class Game:
     """
     The `Game` class represents the Pac-Man game.
@@ -33,8 +35,6 @@ class Game:
         self.testing = testing
         self.test = test
         self.menu = Menu(screen, testing)
-        self.testing = testing
-        self.menu = Menu(screen, testing)
         self.win = False
         self.stop = True
 
@@ -55,6 +55,14 @@ class Game:
             self.win = True
             self.stop = False
 
+    def restart(self):
+        """
+        Go back to the menu for a new game, reusing the menu and the level of the last one.
+        """
+        self.menu.reset()
+        self.win = False
+        self.stop = True
+
 
 def main(test: str = None):
     """
@@ -65,6 +73,7 @@ def main(test: str = None):
     pygame.mixer.music.load('../music/8-bit-dream-land-142093.mp3')
     pygame.mixer.music.play(-1)
     screen = pygame.display.set_mode((screen_width, screen_height))
+    assets.openPack(assetPack)
     clock = pygame.time.Clock()
     pygame.display.set_caption("Pac-Man")
     game = Game(screen)
@@ -74,6 +83,14 @@ def main(test: str = None):
             if event.type == pygame.QUIT:
                 pygame.quit()
                 return
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle()
+                if game.menu.level:
+                    game.menu.level.invalidate()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                profiler.exportTrace(profileTrace)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_p and game.menu.levelRunning():
+                game.menu.level.togglePause()
         if test:
             match test:
                 case "menu":
@@ -91,16 +108,28 @@ def main(test: str = None):
             return game.run()
 
         try:
-            screen.fill((113, 116, 168))
+            if not game.menu.levelRunning():
+                screen.fill((113, 116, 168))
+            profiler.beginFrame()
             game.run()
+            profiler.endFrame()
             if game.win:
                 end = time.time()
                 game.win = False
+            rects = game.menu.updateRects()
             if end and time.time() - end > 3:
-                game = Game(screen)
+                game.restart()
                 end = None
-            pygame.display.update()
-            clock.tick(60)
+                rects = None
+            if profiler.enabled:
+                overlay = profiler.drawOverlay(screen)
+                if rects is not None:
+                    rects = rects + [overlay]
+            if rects is None:
+                pygame.display.update()
+            else:
+                pygame.display.update(rects)
+            clock.tick(tickRate)
         except pygame.error:
             pygame.quit()
             return
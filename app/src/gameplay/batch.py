@@ -0,0 +1,170 @@
+"""
+Module for playing large numbers of seeded headless games on a process pool.
+
+Every worker process opens a display with the SDL dummy driver and the asset pack once, then plays
+the games it is handed one after another on a level it resets between games, and sends each result
+back as a small GameRecord.
+Records are yielded as soon as they arrive, so long runs can be aggregated while they play.
+
+Run this module from the app/src directory to play a batch and see how it scales with the cores:
+
+    python gameplay/batch.py [games]
+"""
+
+import os
+import random
+import sys
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+
+from app.src.gameplay.environment import ACTIONS, headlessSurface
+from app.src.gameplay.levelpool import LevelPool
+from app.src.settings.additional import assets
+from app.src.settings.settings import assetPack, tickRate
+
+# cause is the causeOfDeath of the level, 'win' or 'timeout'
+GameRecord = namedtuple('GameRecord', ('seed', 'score', 'ticks', 'cause', 'boss'))
+
+_surface = None
+_levels = None
+
+
+def _initWorker():
+    """Open a headless display and the asset pack and start a pool of levels once per worker process."""
+    global _surface, _levels
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    _surface = headlessSurface()
+    assets.openPack(assetPack)
+    _levels = LevelPool(_surface, controls=None)
+
+
+def playGame(seed, script=None, maxTicks: int = tickRate * 300, turnEvery: int = 15):
+    """
+    Play one headless game.
+
+    Args:
+        seed (int): Seeds the ghosts, the Devil and the random input.
+        script (Sequence[str]): Directions to steer in, one every turnEvery ticks, repeated until the game ends.
+            Random directions are used if None.
+        maxTicks (int): The number of ticks after which the game is stopped.
+        turnEvery (int): The number of ticks between two inputs.
+
+    Returns:
+        GameRecord: The result of the game.
+    """
+    if _surface is None:
+        _initWorker()
+    inputs = random.Random(seed)
+    level = _levels.acquire('original', seed)
+    while level.alive and not level.win and level.clock.ticks < maxTicks:
+        action = None
+        if not level.clock.ticks % turnEvery:
+            if script:
+                action = script[level.clock.ticks // turnEvery % len(script)]
+            else:
+                action = inputs.choice(ACTIONS[1:])
+        level.update(action)
+    if not level.alive:
+        cause = level.causeOfDeath
+    elif level.win:
+        cause = 'win'
+    else:
+        cause = 'timeout'
+    _levels.release(level)
+    return GameRecord(seed, level.coins, level.clock.ticks, cause, level.boss)
+
+
+def runBatch(seeds, workers: int = None, script=None, maxTicks: int = tickRate * 300, chunksize: int = 4):
+    """
+    Play a game for every seed on a pool of worker processes.
+
+    Args:
+        seeds (Iterable[int]): The seeds of the games.
+        workers (int): The number of worker processes, one per core if None.
+        script (Sequence[str]): The scripted input of every game, random input if None.
+        maxTicks (int): The number of ticks after which a game is stopped.
+        chunksize (int): The number of games handed to a worker at once.
+
+    Yields:
+        GameRecord: The result of every game, in the order of the seeds.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_initWorker) as executor:
+        yield from executor.map(playGame, seeds, _repeat(script), _repeat(maxTicks), chunksize=chunksize)
+
+
+def _repeat(value):
+    """Yield a value forever."""
+    while True:
+        yield value
+
+
+def summarise(records):
+    """
+    Aggregate the results of a batch.
+
+    Args:
+        records (Iterable[GameRecord]): The results.
+
+    Returns:
+        dict: The number of games, the mean and best score, the mean number of ticks survived, and the
+        number of games per cause of death and per boss reached.
+    """
+    games = 0
+    scores = 0
+    best = 0
+    ticks = 0
+    causes = Counter()
+    bosses = Counter()
+    for record in records:
+        games += 1
+        scores += record.score
+        best = max(best, record.score)
+        ticks += record.ticks
+        causes[record.cause] += 1
+        bosses[record.boss] += 1
+    return {
+        'games': games,
+        'meanScore': scores / games if games else 0,
+        'bestScore': best,
+        'meanTicks': ticks / games if games else 0,
+        'causes': dict(causes),
+        'bosses': dict(bosses),
+    }
+
+
+def measureScaling(games: int = 200, maxWorkers: int = None):
+    """
+    Measure how the throughput of a batch scales with the number of worker processes.
+
+    Args:
+        games (int): The number of games played for every worker count.
+        maxWorkers (int): The largest number of workers tried, the number of cores if None.
+
+    Returns:
+        Dict[int, float]: The games per second for 1, 2, 4, ... workers.
+    """
+    maxWorkers = maxWorkers or os.cpu_count() or 1
+    counts = []
+    workers = 1
+    while workers < maxWorkers:
+        counts.append(workers)
+        workers *= 2
+    counts.append(maxWorkers)
+    scaling = {}
+    for workers in counts:
+        start = time.perf_counter()
+        for _ in runBatch(range(games), workers):
+            pass
+        scaling[workers] = games / (time.perf_counter() - start)
+    return scaling
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(summarise(runBatch(range(count))))
+    for workers, rate in measureScaling(count).items():
+        print(f'{workers} worker(s): {rate:.1f} games/s')
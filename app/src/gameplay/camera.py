@@ -0,0 +1,84 @@
+"""
+This module contains the Camera class, the viewport of the screen onto a map that may be bigger than it.
+
+The camera keeps the player in the middle of the screen, stopping at the edges of the map, and
+only the sprites inside its view are drawn. A map no bigger than the screen is shown whole, so the
+start board stays where it always was and every group is drawn without being culled.
+"""
+
+import pygame
+
+
+class Camera:
+    """
+    The area of the map shown on the screen.
+
+    Args:
+        viewport (Tuple[int, int]): The width and height of the screen in pixels.
+        world (Tuple[int, int]): The width and height of the map in pixels.
+
+    Attributes:
+        x (int): The left edge of the view on the map.
+        y (int): The top edge of the view on the map.
+        showsAll (bool): Whether the whole map fits in the view, which then never moves.
+    """
+
+    def __init__(self, viewport, world):
+        self.width, self.height = viewport
+        self.worldWidth, self.worldHeight = world
+        self.x = 0
+        self.y = 0
+        self.showsAll = self.worldWidth <= self.width and self.worldHeight <= self.height
+
+    @property
+    def view(self):
+        """pygame.Rect: The area of the map shown on the screen."""
+        return pygame.Rect(self.x, self.y, self.width, self.height)
+
+    @property
+    def offset(self):
+        """Tuple[int, int]: The position of the view on the map."""
+        return self.x, self.y
+
+    def follow(self, rect):
+        """
+        Center the view on a rectangle without showing anything past the edges of the map.
+
+        Args:
+            rect (pygame.Rect): The rectangle in pixels, usually the player's.
+
+        Returns:
+            bool: Whether the view moved.
+        """
+        x = min(max(rect.centerx - self.width // 2, 0), max(self.worldWidth - self.width, 0))
+        y = min(max(rect.centery - self.height // 2, 0), max(self.worldHeight - self.height, 0))
+        if (x, y) == (self.x, self.y):
+            return False
+        self.x = x
+        self.y = y
+        return True
+
+    def toScreen(self, rect):
+        """Return where a rectangle of the map lies on the screen."""
+        return rect.move(-self.x, -self.y)
+
+    def visible(self, group):
+        """
+        Return the sprites of a group that are inside the view.
+
+        Groups with a collide method, such as the groups kept in a spatial hash or an entity store,
+        answer through it, so the cost follows the size of the view instead of the size of the group.
+
+        Args:
+            group (pygame.sprite.AbstractGroup): The group.
+
+        Returns:
+            List[pygame.sprite.Sprite]: The visible sprites.
+        """
+        if self.showsAll:
+            return group.sprites()
+        view = self.view
+        collide = getattr(group, 'collide', None)
+        if collide is not None:
+            return collide(view)
+        return [sprite for sprite in group.sprites() if view.colliderect(sprite.rect)]
@@ -0,0 +1,37 @@
+"""
+This module contains the SimulationClock class, the clock every gameplay timer reads its time from.
+
+A level never reads the wall clock. It advances its clock by one fixed tick per update, so the
+power-up, boss and fireball timers count simulated seconds, and the same level runs at the frame
+rate of the game or as fast as the CPU allows when it is stepped headless.
+"""
+
+from app.src.settings.settings import tickRate
+
+
+class SimulationClock:
+    """
+    A clock that only moves when the simulation advances it by whole ticks.
+
+    Args:
+        rate (int): The number of ticks per simulated second.
+
+    Attributes:
+        ticks (int): The number of ticks simulated so far.
+    """
+
+    def __init__(self, rate: int = tickRate):
+        self.rate = rate
+        self.ticks = 0
+
+    def now(self):
+        """Return the simulated time in seconds."""
+        return self.ticks / self.rate
+
+    def reset(self):
+        """Move the clock back to the start of the simulation."""
+        self.ticks = 0
+
+    def advance(self, ticks: int = 1):
+        """Move the clock forward by a number of ticks."""
+        self.ticks += ticks
@@ -0,0 +1,322 @@
+"""
+This module contains the DistanceField class, the cached shortest-path distances ghosts use to chase targets.
+
+Distances are counted in tiles along the navigation graph, including the tunnel that wraps the
+left and right edges of the map, and are stored in uint16 NumPy arrays indexed by walkable-tile
+slots. On maps of up to ALL_PAIRS_SLOTS walkable tiles the distances between every pair of tiles
+are computed the first time a ghost follows the field; a level whose ghosts all roam at random
+never pays for them. The all-pairs table grows with the square of the walkable tiles, so bigger
+maps keep a flow field per target instead, the distances of every tile to it found with one
+breadth-first search, and only the FLOW_FIELDS most recently followed targets are kept. Fields
+are cached by the wall layer they were built from, so they are only rebuilt when the walls change,
+and only the CACHED_FIELDS most recently used walls keep their field in the cache.
+"""
+
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from app.src.gameplay.navigation import exitDirections
+
+UNREACHABLE = 0xFFFF
+NO_DIRECTION = 255
+# the number of walkable tiles of the largest map whose distances are kept for every pair of tiles
+ALL_PAIRS_SLOTS = 2048
+# the number of flow fields kept on bigger maps, enough for the targets of every behaviour
+FLOW_FIELDS = 16
+# the number of distance fields kept in the cache, by the wall layer they were built from
+CACHED_FIELDS = 4
+
+_cache = OrderedDict()
+
+
+class DistanceField:
+    """
+    Shortest-path distances between walkable tiles.
+
+    Args:
+        graph (NavGraph): The navigation graph of the level.
+        allPairsSlots (int): The number of walkable tiles above which flow fields replace the all-pairs table.
+
+    Attributes:
+        slots (np.ndarray): Maps a tile index to its walkable-tile slot, -1 for walls.
+        cells (Tuple[Tuple[int, int], ...]): The (column, row) of every slot.
+        distances (np.ndarray): distances[a, b] is the number of tiles from slot a to slot b, computed on first use.
+        nextStep (np.ndarray): nextStep[a, b] is the first direction of a shortest path from slot a to slot b.
+        flowFields (bool): Whether the field keeps a flow field per target instead of the all-pairs table.
+        corners (Tuple[Tuple[int, int], ...]): The walkable tiles closest to the four corners of the map.
+    """
+
+    def __init__(self, graph, allPairsSlots: int = ALL_PAIRS_SLOTS):
+        self.width = graph.width
+        self.height = graph.height
+        walkable = [index for index, exits in enumerate(graph.exits) if exits]
+        self.slots = np.full(len(graph.exits), -1, dtype=np.int32)
+        self.slots[walkable] = np.arange(len(walkable))
+        self.cells = tuple(graph.cell(index) for index in walkable)
+        self.neighbours = np.full((len(walkable), 4), -1, dtype=np.int32)
+        for slot, index in enumerate(walkable):
+            for direction in exitDirections(graph.exits[index]):
+                neighbour = graph.neighbour(index, direction)
+                if neighbour is not None and self.slots[neighbour] >= 0:
+                    self.neighbours[slot, direction] = self.slots[neighbour]
+        self._distances = None
+        self._nextStep = None
+        self.flowFields = len(walkable) > allPairsSlots
+        self._flows = OrderedDict()
+        self._entrances = None
+        self._nearest = self._nearestTiles()
+        self.corners = tuple(self.nearestWalkable(col, row) for col, row in
+                             ((0, 0), (self.width - 1, 0), (self.width - 1, self.height - 1), (0, self.height - 1)))
+
+    @property
+    def distances(self):
+        """np.ndarray: distances[a, b] is the number of tiles from slot a to slot b, computed on first use."""
+        if self.flowFields:
+            raise ValueError(f'{len(self.cells)} walkable tiles are too many for an all-pairs table, follow flowTo')
+        if self._distances is None:
+            count = len(self.cells)
+            adjacency = [[int(neighbour) for neighbour in row if neighbour >= 0] for row in self.neighbours]
+            self._distances = np.array([self._breadthFirst(slot, adjacency) for slot in range(count)],
+                                       dtype=np.uint16).reshape(count, count)
+        return self._distances
+
+    @property
+    def nextStep(self):
+        """np.ndarray: nextStep[a, b] is the first direction of a shortest path from slot a to slot b."""
+        if self._nextStep is None:
+            self._nextStep = self._firstSteps()
+        return self._nextStep
+
+    @classmethod
+    def forLevel(cls, level, graph):
+        """
+        Return the distance field of a level, reusing a cached one while the wall layer is unchanged.
+
+        Args:
+            level (CompiledLevel): The level.
+            graph (NavGraph): The navigation graph built from the same level.
+
+        Returns:
+            DistanceField: The distance field.
+        """
+        key = (level.width, bytes(level.wallMask))
+        field = _cache.get(key)
+        if field is None:
+            field = _cache[key] = cls(graph)
+            if len(_cache) > CACHED_FIELDS:
+                _cache.popitem(last=False)
+        else:
+            _cache.move_to_end(key)
+        return field
+
+    def _breadthFirst(self, source, neighbours):
+        """Return the distances from one slot to every other slot."""
+        row = [UNREACHABLE] * len(neighbours)
+        row[source] = 0
+        queue = deque([source])
+        while queue:
+            slot = queue.popleft()
+            distance = row[slot] + 1
+            for neighbour in neighbours[slot]:
+                if row[neighbour] == UNREACHABLE:
+                    row[neighbour] = distance
+                    queue.append(neighbour)
+        return row
+
+    def flowTo(self, target):
+        """
+        Return the flow field of a target, searching it on first use and keeping the most recent ones.
+
+        Args:
+            target (int): The slot of the target tile.
+
+        Returns:
+            np.ndarray: The number of tiles from every slot to the target, UNREACHABLE where there is no path.
+        """
+        flow = self._flows.get(target)
+        if flow is None:
+            if self._entrances is None:
+                # the exits walked backwards, so the search from the target reaches every tile leading to it
+                self._entrances = [[] for _ in self.cells]
+                for slot, neighbours in enumerate(self.neighbours.tolist()):
+                    for neighbour in neighbours:
+                        if neighbour >= 0:
+                            self._entrances[neighbour].append(slot)
+            flow = self._flows[target] = np.array(self._breadthFirst(target, self._entrances), dtype=np.uint16)
+            if len(self._flows) > FLOW_FIELDS:
+                self._flows.popitem(last=False)
+        else:
+            self._flows.move_to_end(target)
+        return flow
+
+    def _between(self, starts, targets):
+        """Return the distances from slots to target slots, from the all-pairs table or the flow fields."""
+        if not self.flowFields:
+            return self.distances[starts, targets]
+        starts, targets = np.broadcast_arrays(np.asarray(starts), np.asarray(targets))
+        between = np.empty(starts.shape, dtype=np.uint16)
+        for target in np.unique(targets):
+            here = targets == target
+            between[here] = self.flowTo(int(target))[starts[here]]
+        return between
+
+    def _steps(self, starts, targets):
+        """Return the first directions of shortest paths from slots to target slots, as nextStep holds them."""
+        if not self.flowFields:
+            return self.nextStep[starts, targets]
+        starts, targets = np.broadcast_arrays(np.asarray(starts), np.asarray(targets))
+        best = np.full(starts.shape, UNREACHABLE, dtype=np.uint32)
+        steps = np.full(starts.shape, NO_DIRECTION, dtype=np.uint8)
+        for direction in range(4):
+            neighbour = self.neighbours[starts, direction]
+            candidate = np.where(neighbour >= 0, self._between(np.maximum(neighbour, 0), targets),
+                                 UNREACHABLE).astype(np.uint32)
+            better = candidate < best
+            best[better] = candidate[better]
+            steps[better] = direction
+        return steps
+
+    def _firstSteps(self):
+        """Return the first direction of a shortest path for every pair of slots."""
+        best = np.full(self.distances.shape, UNREACHABLE, dtype=np.uint32)
+        steps = np.full(self.distances.shape, NO_DIRECTION, dtype=np.uint8)
+        for direction in range(4):
+            neighbour = self.neighbours[:, direction]
+            reachable = neighbour >= 0
+            candidate = np.full(self.distances.shape, UNREACHABLE, dtype=np.uint32)
+            candidate[reachable] = self.distances[neighbour[reachable]]
+            better = candidate < best
+            best[better] = candidate[better]
+            steps[better] = direction
+        return steps
+
+    def slot(self, col, row):
+        """Return the slot of a tile, wrapping columns around the tunnel, or -1 if the tile is not walkable."""
+        if not 0 <= row < self.height:
+            return -1
+        return int(self.slots[row * self.width + col % self.width])
+
+    def distance(self, start, end):
+        """
+        Return the number of tiles between two walkable tiles.
+
+        Args:
+            start (Tuple[int, int]): The (column, row) of the first tile.
+            end (Tuple[int, int]): The (column, row) of the second tile.
+
+        Returns:
+            int: The distance, or UNREACHABLE if either tile is not walkable or there is no path.
+        """
+        startSlot = self.slot(*start)
+        endSlot = self.slot(*end)
+        if startSlot < 0 or endSlot < 0:
+            return UNREACHABLE
+        return int(self._between(startSlot, endSlot))
+
+    def direction(self, start, target, choices):
+        """
+        Return the direction from a set of choices that gets closest to a target.
+
+        Args:
+            start (Tuple[int, int]): The (column, row) of the current tile.
+            target (Tuple[int, int]): The (column, row) of the target tile.
+            choices (Tuple[int, ...]): The directions that may be taken.
+
+        Returns:
+            int: The best direction, or the first choice if the target cannot be reached.
+        """
+        startSlot = self.slot(*start)
+        targetSlot = self.slot(*target)
+        if startSlot < 0 or targetSlot < 0:
+            return choices[0]
+        step = self._steps(startSlot, targetSlot)
+        if step in choices:
+            return int(step)
+        best = choices[0]
+        bestDistance = UNREACHABLE + 1
+        for direction in choices:
+            neighbour = self.neighbours[startSlot, direction] if direction < 4 else -1
+            if neighbour >= 0 and self._between(neighbour, targetSlot) < bestDistance:
+                best = direction
+                bestDistance = self._between(neighbour, targetSlot)
+        return best
+
+    def directions(self, cols, rows, targetCols, targetRows, choices, counts):
+        """
+        Return the direction every one of several walkers should take, as direction does for one.
+
+        Args:
+            cols (np.ndarray): The column of the current tile of every walker.
+            rows (np.ndarray): The row of the current tile of every walker.
+            targetCols (np.ndarray): The column of the target tile of every walker.
+            targetRows (np.ndarray): The row of the target tile of every walker.
+            choices (np.ndarray): The (walkers, 4) directions every walker may take, padded after its count.
+            counts (np.ndarray): The number of directions every walker may take.
+
+        Returns:
+            np.ndarray: The best direction of every walker, or its first choice if the target cannot be reached.
+        """
+        best = choices[:, 0].astype(np.uint8)
+        startSlots = self._slots(cols, rows)
+        targetSlots = self._slots(targetCols, targetRows)
+        reachable = np.flatnonzero((startSlots >= 0) & (targetSlots >= 0))
+        if not reachable.size:
+            return best
+        start = startSlots[reachable]
+        target = targetSlots[reachable]
+        options = choices[reachable].astype(np.intp)
+        usable = np.arange(4) < counts[reachable, None]
+        step = self._steps(start, target)
+        onPath = ((options == step[:, None]) & usable).any(axis=1)
+        neighbours = np.where(options < 4, self.neighbours[start[:, None], np.minimum(options, 3)], -1)
+        open_ = usable & (neighbours >= 0)
+        distance = np.where(open_, self._between(np.maximum(neighbours, 0), target[:, None]).astype(np.uint32),
+                            UNREACHABLE + 1)
+        closest = options[np.arange(len(options)), np.argmin(distance, axis=1)]
+        best[reachable] = np.where(onPath, step, closest)
+        return best
+
+    def _slots(self, cols, rows):
+        """Return the slot of every tile, wrapping columns around the tunnel, or -1 where it is not walkable."""
+        inside = (rows >= 0) & (rows < self.height)
+        index = np.where(inside, rows * self.width + cols % self.width, 0)
+        return np.where(inside, self.slots[index], -1)
+
+    def _nearestTiles(self):
+        """
+        Return the index of the walkable tile closest to every tile in a straight line, the first one on ties.
+
+        The closest tiles spread from the walkable tiles one step a round: a tile reached in a round takes
+        the first of the closest tiles of its neighbours reached in the round before.
+        """
+        width = self.width
+        size = width * self.height
+        reached = self.slots >= 0
+        nearest = np.where(reached, np.arange(size), size)
+        columns = np.arange(size) % width
+        while not reached.all():
+            candidates = np.full(size, size)
+            spread = np.where(reached, nearest, size)
+            np.minimum(candidates[width:], spread[:-width], out=candidates[width:])
+            np.minimum(candidates[:-width], spread[width:], out=candidates[:-width])
+            np.minimum(candidates[1:], np.where(columns[1:] > 0, spread[:-1], size), out=candidates[1:])
+            np.minimum(candidates[:-1], np.where(columns[:-1] < width - 1, spread[1:], size), out=candidates[:-1])
+            fresh = ~reached & (candidates < size)
+            if not fresh.any():
+                break
+            nearest[fresh] = candidates[fresh]
+            reached |= fresh
+        return nearest.tolist()
+
+    def nearestWalkable(self, col, row):
+        """
+        Return the walkable tile closest to a tile in a straight line, looked up in a table built with the field.
+
+        A tile outside the map is as close to every tile of the map as the tile of the map nearest to it is,
+        plus the same number of tiles, so it takes the closest tile of that one.
+        """
+        if self.slot(col, row) >= 0:
+            return col % self.width, row
+        index = self._nearest[min(max(row, 0), self.height - 1) * self.width + min(max(col, 0), self.width - 1)]
+        return index % self.width, index // self.width
@@ -0,0 +1,701 @@
+"""
+This module contains the EntityStore class, the ghosts of a level kept as contiguous NumPy arrays.
+
+The position, size, direction, speed, exits, last turn, behaviour and target of every ghost are
+components stored column by column, and the systems that used to run ghost by ghost, refreshing
+the exits, picking targets, steering at junctions, moving, pushing out of the walls, wrapping
+through the tunnel and testing against the player, each run on every ghost of the level at once.
+With no more than SCALAR_LIMIT ghosts, as on the stock levels, the same systems loop over plain
+ints instead, which costs less than the fixed cost of the NumPy calls and moves the ghosts alike.
+
+A ghost leaving a tile looks up how far it goes straight on before its next stop, the junction at
+the end of its corridor in the navigation graph unless the ghost house or the edges of the map
+come first, and is neither refreshed nor steered again until it has covered that distance.
+
+A Ghost sprite is a thin view while it belongs to an EntityGroup: its rect, direction and the
+other components are read from and written to the arrays of the store, and it keeps its own
+copies only while it is outside the level, e.g. waiting in a pool. The rect and direction of a
+stored ghost are write-through views, one of each kept per ghost and caught up with the store
+whenever it is read, so changing them in place, as in ghost.rect.x += 64, also changes the store.
+Removing a ghost swaps the last ghost of the store into its place, so the live ghosts always fill
+the front of every array.
+"""
+
+import numpy as np
+import pygame
+
+from app.src.gameplay.navigation import DIRECTIONS, OPEN_CHOICES, STRAIGHT_EXITS, TURN_CHOICES
+
+# the behaviours of ghosts, stored as their index
+BEHAVIOURS = ('random', 'chase', 'ambush', 'scatter')
+RANDOM, CHASE, AMBUSH, SCATTER = range(4)
+# the way of a ghost that has nowhere to go
+NO_WAY = 4
+
+
+def _choiceTables():
+    """Return the padded choices and the number of choices for every house flag, exit bitmask and previous way."""
+    choices = np.full((2, 16, 5, 4), NO_WAY, dtype=np.uint8)
+    counts = np.zeros((2, 16, 5), dtype=np.uint8)
+    for exits in range(16):
+        for previousWay in range(5):
+            for house, options in enumerate((TURN_CHOICES[exits][previousWay], OPEN_CHOICES[exits])):
+                choices[house, exits, previousWay, :len(options)] = options
+                counts[house, exits, previousWay] = len(options)
+    return choices, counts
+
+
+CHOICES, CHOICE_COUNTS = _choiceTables()
+STEPS = np.array(DIRECTIONS + ((0, 0),), dtype=np.int8)
+
+# the exits of the tiles above and below the map, which only lead along the tunnel
+SIDEWAYS = STRAIGHT_EXITS[1]
+# up to this many ghosts the systems loop over plain ints, which costs less than the fixed cost of NumPy calls
+SCALAR_LIMIT = 32
+
+
+class WriteThrough:
+    """
+    A mutable component value read from a stored sprite, which writes every change back to the sprite.
+
+    A sprite keeps one view of every such component, which catches up with the store whenever it is
+    read from the sprite. Values derived from a view, e.g. by copy or move, are not bound to a sprite
+    and behave as plain values.
+    """
+
+    _sprite = None
+    _name = None
+
+    @classmethod
+    def bind(cls, sprite, name):
+        """Return a view of a component of a stored sprite."""
+        view = cls(sprite.store.fields(name, sprite.slot))
+        view._sprite = sprite
+        view._name = name
+        return view
+
+    def __setattr__(self, name, value):
+        if name[0] == '_':
+            super().__setattr__(name, value)
+            return
+        self._refresh()
+        super().__setattr__(name, value)
+        self._writeBack()
+
+    def _refresh(self):
+        """Catch up with the component of the sprite, which may have changed since the view was read."""
+        sprite = self._sprite
+        if sprite is None:
+            return
+        if sprite.store is None:
+            self.plain.update(self, getattr(sprite, self._name))
+        else:
+            self.plain.update(self, sprite.store.fields(self._name, sprite.slot))
+
+    def _writeBack(self):
+        """Set the component of the sprite to the current value of the view."""
+        if self._sprite is not None:
+            setattr(self._sprite, self._name, self.plain(self))
+
+
+def _writingThrough(view, methods):
+    """Make the in-place methods of a view write the changed value back to its sprite."""
+    for name in methods:
+        method = getattr(view.plain, name, None)
+        if method is None:
+            continue
+
+        def changed(self, *args, _method=method, **kwargs):
+            self._refresh()
+            result = _method(self, *args, **kwargs)
+            self._writeBack()
+            return result
+
+        changed.__name__ = name
+        changed.__doc__ = method.__doc__
+        setattr(view, name, changed)
+    return view
+
+
+class RectView(WriteThrough, pygame.Rect):
+    """The rect of a stored sprite."""
+
+    plain = pygame.Rect
+
+
+class DirectionView(WriteThrough, pygame.math.Vector2):
+    """The direction of a stored sprite."""
+
+    plain = pygame.math.Vector2
+
+
+_writingThrough(RectView, ('__setitem__', 'clamp_ip', 'inflate_ip', 'move_ip', 'scale_by_ip', 'union_ip',
+                           'unionall_ip', 'update', 'normalize'))
+_writingThrough(DirectionView, ('__setitem__', '__iadd__', '__isub__', '__imul__', '__itruediv__',
+                                '__ifloordiv__', 'update', 'from_polar', 'scale_to_length', 'normalize_ip',
+                                'rotate_ip', 'rotate_rad_ip', 'reflect_ip', 'clamp_magnitude_ip',
+                                'move_towards_ip'))
+
+
+class Component:
+    """
+    An attribute of a sprite kept in the arrays of an EntityStore while the sprite belongs to one.
+
+    Outside a store the value lives in the sprite itself, as a plain attribute would.
+
+    Args:
+        name (str): The name of the attribute, which the store reads and writes.
+        view (Type[WriteThrough]): The view mutable values are returned in while the sprite is stored, so
+            that changing them in place changes the store; None for immutable values.
+    """
+
+    def __init__(self, name, view=None):
+        self.name = name
+        self.view = view
+        self.cached = '_' + name + 'View'
+
+    def __get__(self, sprite, owner=None):
+        if sprite is None:
+            return self
+        store = sprite.store
+        if store is None:
+            return sprite.__dict__[self.name]
+        if self.view is None:
+            return store.read(self.name, sprite.slot)
+        view = sprite.__dict__.get(self.cached)
+        if view is None:
+            view = sprite.__dict__[self.cached] = self.view.bind(sprite, self.name)
+        else:
+            view.plain.update(view, store.fields(self.name, sprite.slot))
+        return view
+
+    def __set__(self, sprite, value):
+        if sprite.store is None:
+            sprite.__dict__[self.name] = value
+        else:
+            sprite.store.write(self.name, sprite.slot, value)
+
+
+class EntityStore:
+    """
+    The components of the ghosts of a level in contiguous arrays, with the systems that update them all at once.
+
+    Args:
+        wallGrid (WallGrid): The walls the ghosts are pushed out of.
+        navGraph (NavGraph): The exits the ghosts pick their turns from.
+        distanceField (DistanceField): The distances targeted ghosts follow.
+        house (Iterable[Tuple[int, int]]): The (column, row) of the tiles of the ghost house, where a ghost may
+            turn back.
+        seed (int): Seeds the random turns of the ghosts.
+        capacity (int): The number of ghosts room is made for up front.
+
+    Attributes:
+        sprites (List[Ghost]): The view of every stored ghost, in the order of the arrays.
+        runs (np.ndarray): runs[index * 4 + direction] is the number of tiles a ghost leaving a tile in a
+            direction goes straight on before its next stop, 0 where it steers on every tile.
+        ahead (np.ndarray): The number of pixels every ghost still goes straight on before it is steered again.
+        fileLeft, fileTop, fileRight, fileBottom (np.ndarray): The tiles every ghost was last filed under in the
+            spatial hash of its group, if the group has one.
+    """
+
+    COLUMNS = {
+        'x': np.int32, 'y': np.int32, 'width': np.int16, 'height': np.int16, 'dx': np.int8, 'dy': np.int8,
+        'speed': np.int16, 'exits': np.uint8, 'previousWay': np.uint8, 'behaviour': np.uint8, 'corner': np.uint8,
+        'targetX': np.int32, 'targetY': np.int32, 'hasTarget': np.bool_, 'hasField': np.bool_, 'ahead': np.int32,
+        'fileLeft': np.int32, 'fileTop': np.int32, 'fileRight': np.int32, 'fileBottom': np.int32,
+    }
+
+    def __init__(self, wallGrid, navGraph, distanceField, house=(), seed: int = None, capacity: int = 64):
+        self.wallGrid = wallGrid
+        self.distanceField = distanceField
+        self.size = wallGrid.size
+        self.mapWidth = wallGrid.width
+        self.mapHeight = wallGrid.height
+        self.wallBytes = wallGrid.mask
+        self.exitBytes = bytes(navGraph.exits)
+        self.wallMask = np.frombuffer(self.wallBytes, dtype=np.uint8)
+        self.exitMask = np.frombuffer(self.exitBytes, dtype=np.uint8)
+        # the walls with a border of open tiles, so that the corners of ghosts need no bounds checks
+        self.paddedWalls = (np.pad(self.wallMask.reshape(self.mapHeight, self.mapWidth), 1) == 1).ravel()
+        self.houseMask = np.zeros(self.mapWidth * self.mapHeight, dtype=np.intp)
+        for col, row in house:
+            self.houseMask[row * self.mapWidth + col] = 1
+        self.runs = self._corridorRuns(navGraph)
+        # exits are only refreshed on the tiles strictly between the two edge columns
+        self.tunnelLeft = wallGrid.tunnelLeft
+        self.tunnelRight = wallGrid.tunnelRight
+        self.exitLimit = (self.mapWidth - 1) * self.size
+        self.random = np.random.default_rng(seed)
+        self.sprites = []
+        self.count = 0
+        for name, dtype in self.COLUMNS.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+
+    def __len__(self):
+        return self.count
+
+    def seed(self, seed):
+        """Seed the random turns of the ghosts again, e.g. for a new game on the same level."""
+        self.random = np.random.default_rng(seed)
+
+    def _grow(self):
+        """Double the room of every array."""
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros(len(column) * 2, dtype=column.dtype)
+            grown[:self.count] = column[:self.count]
+            setattr(self, name, grown)
+
+    def attach(self, sprite):
+        """
+        Move the state of a sprite into the arrays, making the sprite a view of them.
+
+        Args:
+            sprite (Ghost): The sprite, which must not belong to a store yet.
+        """
+        if self.count == len(self.x):
+            self._grow()
+        state = sprite.__dict__
+        slot = self.count
+        rect = state.pop('rect')
+        direction = state.pop('direction')
+        target = state.pop('target')
+        self.x[slot], self.y[slot] = rect.x, rect.y
+        self.width[slot], self.height[slot] = rect.width, rect.height
+        self.dx[slot], self.dy[slot] = int(direction.x), int(direction.y)
+        self.speed[slot] = state.pop('speed')
+        self.exits[slot] = state.pop('exits')
+        self.previousWay[slot] = state.pop('previousWay')
+        self.behaviour[slot] = BEHAVIOURS.index(sprite.behaviour)
+        self.corner[slot] = sprite.corner
+        self.hasField[slot] = sprite.distanceField is not None
+        self.hasTarget[slot] = target is not None
+        self.targetX[slot], self.targetY[slot] = target or (0, 0)
+        self.ahead[slot] = 0
+        self._file(slot)
+        self.sprites.append(sprite)
+        self.count += 1
+        sprite.store = self
+        sprite.slot = slot
+
+    def detach(self, sprite):
+        """
+        Copy the state of a sprite back into it and take it out of the arrays.
+
+        Args:
+            sprite (Ghost): A sprite of the store.
+        """
+        slot = sprite.slot
+        state = sprite.__dict__
+        for name in ('rect', 'direction', 'speed', 'exits', 'previousWay', 'target'):
+            state[name] = self.read(name, slot)
+        sprite.store = None
+        sprite.slot = None
+        last = self.count - 1
+        if slot != last:
+            for name in self.COLUMNS:
+                column = getattr(self, name)
+                column[slot] = column[last]
+            moved = self.sprites[last]
+            self.sprites[slot] = moved
+            moved.slot = slot
+        self.sprites.pop()
+        self.count = last
+
+    def fields(self, name, slot):
+        """Return the values of the rect or direction of a stored sprite."""
+        if name == 'rect':
+            return self.x.item(slot), self.y.item(slot), self.width.item(slot), self.height.item(slot)
+        return self.dx.item(slot), self.dy.item(slot)
+
+    def read(self, name, slot):
+        """Return a component of a stored sprite as the sprite attribute it stands for."""
+        if name == 'rect':
+            return pygame.Rect(self.fields(name, slot))
+        if name == 'direction':
+            return pygame.math.Vector2(self.fields(name, slot))
+        if name == 'target':
+            return (self.targetX.item(slot), self.targetY.item(slot)) if self.hasTarget[slot] else None
+        return getattr(self, name).item(slot)
+
+    def write(self, name, slot, value):
+        """Set a component of a stored sprite from the sprite attribute it stands for, steering it on its next tile."""
+        self.ahead[slot] = 0
+        if name == 'rect':
+            self.x[slot], self.y[slot], self.width[slot], self.height[slot] = value
+        elif name == 'direction':
+            self.dx[slot], self.dy[slot] = int(value[0]), int(value[1])
+        elif name == 'target':
+            self.hasTarget[slot] = value is not None
+            self.targetX[slot], self.targetY[slot] = value or (0, 0)
+        else:
+            getattr(self, name)[slot] = value
+
+    def _file(self, slot):
+        """Record the tiles a ghost covers as the ones it is filed under."""
+        size = self.size
+        x, y = int(self.x[slot]), int(self.y[slot])
+        self.fileLeft[slot], self.fileTop[slot] = x // size, y // size
+        self.fileRight[slot] = (x + int(self.width[slot]) - 1) // size
+        self.fileBottom[slot] = (y + int(self.height[slot]) - 1) // size
+
+    def _corridorRuns(self, navGraph):
+        """
+        Return how many tiles a ghost leaving every tile in every direction goes straight on before its next stop.
+
+        A ghost stops at the junctions of the navigation graph, on the tiles of the ghost house, where
+        it may turn back, and on the two columns at either edge of the map, since the exits of the edge
+        columns are not refreshed and the ghost must come to them from the tile next to them. The runs
+        are counted backwards along every corridor of the graph; tiles on no corridor keep 0 and are
+        steered on every tile.
+        """
+        width = self.mapWidth
+        runs = np.zeros(width * self.mapHeight * 4, dtype=np.int32)
+
+        def stop(index):
+            col = index % width
+            return index in navGraph.junctions or self.houseMask[index] or col < 2 or col >= width - 2
+
+        for junction, corridors in navGraph.edges.items():
+            for direction, (end, length) in corridors.items():
+                tiles = [junction]
+                for _ in range(length - 1):
+                    tiles.append(navGraph.neighbour(tiles[-1], direction))
+                run = 0
+                for tile, following in zip(reversed(tiles), reversed(tiles[1:] + [end])):
+                    run = 1 if stop(following) else run + 1
+                    if 0 < tile % width < width - 1:
+                        runs[tile * 4 + direction] = run
+        return runs
+
+    def _walls(self, x, y):
+        """Return whether the pixels lie inside walls; pixels outside the map are open."""
+        col = x // self.size
+        row = y // self.size
+        inside = (col >= 0) & (col < self.mapWidth) & (row >= 0) & (row < self.mapHeight)
+        index = np.where(inside, row * self.mapWidth + col, 0)
+        return inside & (self.wallMask[index] == 1)
+
+    def _cornerWalls(self, x, y, right, bottom):
+        """Return whether any corner of every rectangle lies inside a wall; corners outside the map are open."""
+        size = self.size
+        width = self.mapWidth
+        height = self.mapHeight
+        left = np.clip(x // size, -1, width) + 1
+        right = np.clip(right // size, -1, width) + 1
+        top = (np.clip(y // size, -1, height) + 1) * (width + 2)
+        bottom = (np.clip(bottom // size, -1, height) + 1) * (width + 2)
+        walls = self.paddedWalls
+        return walls[top + left] | walls[top + right] | walls[bottom + left] | walls[bottom + right]
+
+    def _wall(self, x, y):
+        """Return whether a pixel lies inside a wall, as _walls does for arrays."""
+        col = x // self.size
+        row = y // self.size
+        inside = 0 <= col < self.mapWidth and 0 <= row < self.mapHeight
+        return inside and self.wallBytes[row * self.mapWidth + col] == 1
+
+    def refreshExits(self):
+        """Give every ghost standing exactly on a tile inside the map the exits of that tile."""
+        n = self.count
+        size = self.size
+        if n <= SCALAR_LIMIT:
+            for slot, (x, y, ahead) in enumerate(zip(self.x[:n].tolist(), self.y[:n].tolist(),
+                                                     self.ahead[:n].tolist())):
+                if 0 < x < self.exitLimit and x % size == 0 and y % size == 0 and ahead <= 0:
+                    row = y // size
+                    self.exits[slot] = (self.exitBytes[row * self.mapWidth + x // size]
+                                        if 0 <= row < self.mapHeight else SIDEWAYS)
+            return
+        x = self.x[:n]
+        y = self.y[:n]
+        onTile = np.flatnonzero((x > 0) & (x < self.exitLimit) & (x % size == 0) & (y % size == 0)
+                                & (self.ahead[:n] <= 0))
+        if not onTile.size:
+            return
+        col = x[onTile] // size
+        row = y[onTile] // size
+        inside = (row >= 0) & (row < self.mapHeight)
+        self.exits[onTile] = np.where(inside, self.exitMask[np.where(inside, row * self.mapWidth + col, 0)],
+                                      SIDEWAYS)
+
+    def targeted(self):
+        """Return whether any ghost has a behaviour other than random."""
+        if self.count <= SCALAR_LIMIT:
+            return any(behaviour != RANDOM for behaviour in self.behaviour[:self.count].tolist())
+        return bool((self.behaviour[:self.count] != RANDOM).any())
+
+    def aim(self, chase, ambush, corners):
+        """
+        Point every targeted ghost at the tile its behaviour is after.
+
+        Args:
+            chase (Tuple[int, int]): The tile chasing ghosts head for.
+            ambush (Tuple[int, int]): The tile ambushing ghosts head for.
+            corners (Sequence[Tuple[int, int]]): The tiles scattering ghosts head for, by corner.
+        """
+        n = self.count
+        if n <= SCALAR_LIMIT:
+            for slot, (behaviour, corner) in enumerate(zip(self.behaviour[:n].tolist(), self.corner[:n].tolist())):
+                if behaviour != RANDOM:
+                    tile = chase if behaviour == CHASE else ambush if behaviour == AMBUSH else corners[corner]
+                    self.targetX[slot], self.targetY[slot] = tile
+                    self.hasTarget[slot] = True
+            return
+        behaviour = self.behaviour[:n]
+        for kind, tile in ((CHASE, chase), (AMBUSH, ambush)):
+            chosen = behaviour == kind
+            self.targetX[:n][chosen], self.targetY[:n][chosen] = tile
+            self.hasTarget[:n][chosen] = True
+        scatter = np.flatnonzero(behaviour == SCATTER)
+        if scatter.size:
+            corners = np.asarray(corners, dtype=np.int32)[self.corner[scatter]]
+            self.targetX[scatter] = corners[:, 0]
+            self.targetY[scatter] = corners[:, 1]
+            self.hasTarget[scatter] = True
+
+    def wrapTunnel(self):
+        """Move the ghosts that left the map through the tunnel to its other end."""
+        n = self.count
+        if n <= SCALAR_LIMIT:
+            for slot, x in enumerate(self.x[:n].tolist()):
+                if x > self.tunnelRight:
+                    self.x[slot] = self.tunnelLeft
+                elif x < self.tunnelLeft:
+                    self.x[slot] = self.tunnelRight
+            return
+        x = self.x[:n]
+        x[x > self.tunnelRight] = self.tunnelLeft
+        x[x < self.tunnelLeft] = self.tunnelRight
+
+    def steer(self):
+        """
+        Turn every ghost standing exactly on a tile it stops at.
+
+        A ghost never turns back unless it is stuck or in the ghost house, keeps going if it has a
+        single way on, follows the distance field towards its target if it has one, and otherwise
+        picks one of its ways at random. It then goes straight on for the run of its way before it is
+        steered again.
+        """
+        n = self.count
+        size = self.size
+        if n <= SCALAR_LIMIT:
+            for slot, (x, y, ahead) in enumerate(zip(self.x[:n].tolist(), self.y[:n].tolist(),
+                                                     self.ahead[:n].tolist())):
+                if x % size or y % size or ahead > 0:
+                    continue
+                col = x // size
+                row = y // size
+                inside = 0 <= col < self.mapWidth and 0 <= row < self.mapHeight
+                index = row * self.mapWidth + col if inside else 0
+                exits = self.exits.item(slot)
+                choices = OPEN_CHOICES[exits] if inside and self.houseMask[index] else \
+                    TURN_CHOICES[exits][self.previousWay.item(slot)]
+                way = choices[0] if choices else NO_WAY
+                if len(choices) > 1:
+                    if self.hasTarget[slot] and self.hasField[slot]:
+                        way = self.distanceField.direction((col, row), (self.targetX.item(slot),
+                                                                        self.targetY.item(slot)), choices)
+                    else:
+                        way = choices[int(self.random.random() * len(choices))]
+                self.previousWay[slot] = way
+                self.ahead[slot] = self.runs.item(index * 4 + way) * size if inside and way < 4 else 0
+                if way < 4:
+                    self.dx[slot], self.dy[slot] = DIRECTIONS[way]
+            return
+        x = self.x[:n]
+        y = self.y[:n]
+        onTile = np.flatnonzero((x % size == 0) & (y % size == 0) & (self.ahead[:n] <= 0))
+        if not onTile.size:
+            return
+        tileX = x[onTile]
+        tileY = y[onTile]
+        col = tileX // size
+        row = tileY // size
+        inside = (col >= 0) & (col < self.mapWidth) & (row >= 0) & (row < self.mapHeight)
+        index = np.where(inside, row * self.mapWidth + col, 0)
+        house = np.where(inside, self.houseMask[index], 0)
+        exits = self.exits[onTile]
+        previousWay = self.previousWay[onTile]
+        choices = CHOICES[house, exits, previousWay]
+        counts = CHOICE_COUNTS[house, exits, previousWay]
+        ways = choices[:, 0].copy()
+        several = counts > 1
+        targeted = several & self.hasTarget[onTile] & self.hasField[onTile]
+        if targeted.any():
+            ways[targeted] = self.distanceField.directions(
+                col[targeted], row[targeted],
+                self.targetX[onTile[targeted]], self.targetY[onTile[targeted]], choices[targeted], counts[targeted])
+        randomly = several & ~targeted
+        if randomly.any():
+            picks = (self.random.random(int(randomly.sum())) * counts[randomly]).astype(np.intp)
+            ways[randomly] = choices[randomly, picks]
+        self.previousWay[onTile] = ways
+        self.ahead[onTile] = np.where(inside & (ways < 4), self.runs[index * 4 + (ways & 3)], 0) * size
+        turning = onTile[ways < 4]
+        steps = STEPS[ways[ways < 4]]
+        self.dx[turning] = steps[:, 0]
+        self.dy[turning] = steps[:, 1]
+
+    def move(self):
+        """Move every ghost by its speed in its direction, along the run it is on."""
+        n = self.count
+        if n <= SCALAR_LIMIT:
+            for slot in range(n):
+                speed = self.speed.item(slot)
+                self.x[slot] = self.x.item(slot) + self.dx.item(slot) * speed
+                self.y[slot] = self.y.item(slot) + self.dy.item(slot) * speed
+                self.ahead[slot] = max(self.ahead.item(slot) - speed, 0)
+            return
+        self.x[:n] += self.dx[:n] * self.speed[:n]
+        self.y[:n] += self.dy[:n] * self.speed[:n]
+        ahead = self.ahead[:n]
+        np.maximum(ahead - self.speed[:n], 0, out=ahead)
+
+    def resolveWalls(self):
+        """Push every ghost that ran into a wall back against its direction of travel, onto the edge of the wall."""
+        n = self.count
+        size = self.size
+        if n <= SCALAR_LIMIT:
+            wall = self._wall
+            for slot, (x, y, width, height) in enumerate(zip(self.x[:n].tolist(), self.y[:n].tolist(),
+                                                             self.width[:n].tolist(), self.height[:n].tolist())):
+                right = x + width - 1
+                bottom = y + height - 1
+                if not (wall(x, y) or wall(right, y) or wall(x, bottom) or wall(right, bottom)):
+                    continue
+                self.ahead[slot] = 0
+                dx = self.dx.item(slot)
+                dy = self.dy.item(slot)
+                if dx:
+                    self.x[slot] = (x // size + 1) * size if dx < 0 else right // size * size - width
+                elif dy:
+                    self.y[slot] = (y // size + 1) * size if dy < 0 else bottom // size * size - height
+            return
+        x = self.x[:n]
+        y = self.y[:n]
+        right = x + self.width[:n] - 1
+        bottom = y + self.height[:n] - 1
+        blocked = np.flatnonzero(self._cornerWalls(x, y, right, bottom))
+        if not blocked.size:
+            return
+        self.ahead[blocked] = 0
+        dx = self.dx[blocked]
+        dy = self.dy[blocked]
+        bx = x[blocked]
+        by = y[blocked]
+        x[blocked] = np.where(dx < 0, (bx // size + 1) * size,
+                              np.where(dx > 0, right[blocked] // size * size - self.width[blocked], bx))
+        y[blocked] = np.where(dx != 0, by, np.where(dy < 0, (by // size + 1) * size,
+                                                   np.where(dy > 0, bottom[blocked] // size * size
+                                                            - self.height[blocked], by)))
+
+    def overlapping(self, rect):
+        """
+        Return the slots of the ghosts overlapping a rectangle.
+
+        Args:
+            rect (pygame.Rect): The rectangle in pixels, usually the player's.
+
+        Returns:
+            np.ndarray: The slots, in the order of the arrays.
+        """
+        n = self.count
+        x = self.x[:n]
+        y = self.y[:n]
+        return np.flatnonzero((x < rect.right) & (x + self.width[:n] > rect.left)
+                              & (y < rect.bottom) & (y + self.height[:n] > rect.top))
+
+    def refiled(self):
+        """
+        Return the slots of the ghosts that crossed into other tiles since they were last filed, as filed again.
+
+        Returns:
+            List[int]: The slots, in the order of the arrays.
+        """
+        n = self.count
+        size = self.size
+        if n <= SCALAR_LIMIT:
+            moved = []
+            for slot, (x, y, width, height) in enumerate(zip(self.x[:n].tolist(), self.y[:n].tolist(),
+                                                             self.width[:n].tolist(), self.height[:n].tolist())):
+                tiles = (x // size, y // size, (x + width - 1) // size, (y + height - 1) // size)
+                if tiles != (self.fileLeft.item(slot), self.fileTop.item(slot), self.fileRight.item(slot),
+                             self.fileBottom.item(slot)):
+                    self.fileLeft[slot], self.fileTop[slot], self.fileRight[slot], self.fileBottom[slot] = tiles
+                    moved.append(slot)
+            return moved
+        x = self.x[:n]
+        y = self.y[:n]
+        left = x // size
+        top = y // size
+        right = (x + self.width[:n] - 1) // size
+        bottom = (y + self.height[:n] - 1) // size
+        moved = np.flatnonzero((left != self.fileLeft[:n]) | (top != self.fileTop[:n])
+                               | (right != self.fileRight[:n]) | (bottom != self.fileBottom[:n]))
+        if moved.size:
+            self.fileLeft[moved] = left[moved]
+            self.fileTop[moved] = top[moved]
+            self.fileRight[moved] = right[moved]
+            self.fileBottom[moved] = bottom[moved]
+        return moved.tolist()
+
+    def moveTo(self, slots, x, y):
+        """Put some ghosts on a position, e.g. back in the ghost house."""
+        self.x[slots] = x
+        self.y[slots] = y
+        self.ahead[slots] = 0
+
+
+class EntityGroup(pygame.sprite.Group):
+    """
+    A sprite group whose sprites are views of an EntityStore while they belong to it.
+
+    Updating the group steers every ghost of the store at once instead of calling update on each sprite.
+    Given a spatial hash, the group files its ghosts in it while they belong to it, and refreshing the
+    group refiles only the ghosts the systems of the store moved into other tiles.
+
+    Args:
+        store (EntityStore): The store the sprites are kept in.
+        *sprites: The sprites to add.
+        broadphase (SpatialHash): The hash the sprites are filed in, None to find them by scanning the store.
+    """
+
+    def __init__(self, store, *sprites, broadphase=None):
+        self.store = store
+        self.broadphase = broadphase
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self.store.attach(sprite)
+        if self.broadphase is not None:
+            self.broadphase.insert(sprite, self)
+
+    def remove_internal(self, sprite):
+        if self.broadphase is not None:
+            self.broadphase.remove(sprite)
+        super().remove_internal(sprite)
+        self.store.detach(sprite)
+
+    def refresh(self):
+        """Refile the ghosts that crossed into other tiles in the spatial hash of the group."""
+        if self.broadphase is None:
+            return
+        sprites = self.store.sprites
+        move = self.broadphase.move
+        for slot in self.store.refiled():
+            move(sprites[slot])
+
+    def update(self, *args, **kwargs):
+        """Wrap the ghosts through the tunnel and turn the ones standing on a tile."""
+        self.store.wrapTunnel()
+        self.store.steer()
+
+    def collide(self, rect):
+        """Return the sprites overlapping a rectangle, found through the spatial hash of the group if it has one."""
+        if self.broadphase is not None:
+            self.refresh()
+            return self.broadphase.collide(rect, self)
+        sprites = self.store.sprites
+        return [sprites[slot] for slot in self.store.overlapping(rect).tolist()]
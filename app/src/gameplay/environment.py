@@ -0,0 +1,238 @@
+"""
+Module wrapping a headless Level in a Gym-style environment for training agents.
+
+An environment is reset with an optional seed and stepped one simulation tick at a time with a
+discrete action. Observations are uint8 NumPy grids with one channel per kind of object and one
+cell per tile, and the reward of a step is the number of points Level.coins gained during it.
+VectorEnvironment steps several independent levels in one call and stacks their results.
+
+The levels of a vector are stepped one after another, so a vector runs at about the rate of a
+single environment: on the stock level, with its few ghosts moved by the scalar systems of the
+entity store, both run random play at some 8-10k environment steps per second on one core. The
+benchmark suite steps both and fails below its MIN_STEPS_PER_SECOND.
+
+Run this module from the app/src directory to measure the throughput on one core:
+
+    python gameplay/environment.py
+"""
+
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pygame
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+
+from app.src.gameplay.level import Level
+from app.src.settings.settings import screen_width, screen_height, tile_size
+
+# the action of index n steers the player in ACTIONS[n], None keeps the queued turn
+ACTIONS = (None, 'up', 'right', 'down', 'left')
+
+# the channels of an observation; the pellet channel holds the COIN, POWER and CHERRY values of the pellet field
+WALLS, PELLETS, GHOSTS, PLAYER = range(4)
+CHANNELS = 4
+
+
+def headlessSurface():
+    """
+    Return a surface to build levels on, opening a display with the SDL dummy driver if there is none.
+
+    Sprites convert their images for the display, so one has to exist even when nothing is shown.
+
+    Returns:
+        pygame.Surface: A surface the size of the screen.
+    """
+    if pygame.display.get_surface() is None:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        pygame.display.init()
+        pygame.font.init()
+        return pygame.display.set_mode((screen_width, screen_height))
+    return pygame.Surface((screen_width, screen_height))
+
+
+class Environment:
+    """
+    A single headless level with a reset / step interface.
+
+    Args:
+        skin (str): The name of the player skin.
+        level (CompiledLevel): The level to play, the start level if None.
+        maxTicks (int): The number of ticks after which an episode is truncated.
+        surface (pygame.Surface): The surface the level is built on, a headless one if None.
+
+    Attributes:
+        level (Level): The level of the current episode.
+        observation (np.ndarray): The (CHANNELS, height, width) grid of the last step.
+    """
+
+    def __init__(self, skin: str = 'original', level=None, maxTicks: int = 10000, surface=None):
+        self.skin = skin
+        self.compiledLevel = level
+        self.maxTicks = maxTicks
+        self.surface = surface or headlessSurface()
+        self.level = None
+        self.observation = None
+
+    def reset(self, seed: int = None):
+        """
+        Start a new episode.
+
+        Args:
+            seed (int): Seeds the random choices of the level, a random seed if None.
+
+        Returns:
+            Tuple[np.ndarray, dict]: The first observation and the episode info.
+        """
+        if self.level:
+            self.level.reset(seed)
+        else:
+            self.level = Level(self.surface, self.skin, level=self.compiledLevel, controls=None, seed=seed)
+        levelMap = self.level.levelMap
+        self.observation = np.zeros((CHANNELS, levelMap.height, levelMap.width), dtype=np.uint8)
+        self.observation[WALLS] = np.frombuffer(bytes(levelMap.wallMask), dtype=np.uint8).reshape(
+            levelMap.height, levelMap.width)
+        return self._observe(), self._info()
+
+    def step(self, action):
+        """
+        Advance the level by one tick.
+
+        Args:
+            action (int): The index of the action in ACTIONS.
+
+        Returns:
+            Tuple[np.ndarray, int, bool, bool, dict]: The observation, the reward, whether the episode ended
+            by the player dying or winning, whether it was cut off after maxTicks, and the episode info.
+        """
+        level = self.level
+        coins = level.coins
+        level.update(ACTIONS[action])
+        terminated = not level.alive or level.win
+        truncated = not terminated and level.clock.ticks >= self.maxTicks
+        return self._observe(), level.coins - coins, terminated, truncated, self._info()
+
+    def _info(self):
+        """Return the episode info of the current tick."""
+        return {'coins': self.level.coins, 'ticks': self.level.clock.ticks, 'boss': self.level.boss,
+                'alive': self.level.alive}
+
+    def _mark(self, channel, group, value=1):
+        """Set the cells of a channel under the centres of every sprite of a group."""
+        height, width = channel.shape
+        for sprite in group.sprites():
+            col = sprite.rect.centerx // tile_size
+            row = sprite.rect.centery // tile_size
+            if 0 <= col < width and 0 <= row < height:
+                channel[row, col] = value
+
+    def _observe(self):
+        """Update the observation grid from the sprites of the level."""
+        level = self.level
+        observation = self.observation
+        observation[PELLETS] = level.pellets.grid
+        observation[GHOSTS] = 0
+        self._mark(observation[GHOSTS], level.ghost_sprites)
+        if level.boss == 1:
+            self._mark(observation[GHOSTS], level.bossGhost)
+        elif level.boss == 2:
+            self._mark(observation[GHOSTS], level.devil)
+            if level.devil.sprite:
+                self._mark(observation[GHOSTS], level.devil.sprite.fireballs)
+        observation[PLAYER] = 0
+        self._mark(observation[PLAYER], level.player)
+        return observation.copy()
+
+
+class VectorEnvironment:
+    """
+    Several independent environments stepped together.
+
+    Episodes that end are reset right away, so every call returns a live observation for every
+    environment; the info of the finished episode is kept under 'final'.
+
+    Args:
+        count (int): The number of environments.
+        **kwargs: Passed on to every Environment.
+    """
+
+    def __init__(self, count: int, **kwargs):
+        self.environments = [Environment(**kwargs) for _ in range(count)]
+
+    def reset(self, seed: int = None):
+        """
+        Start a new episode in every environment.
+
+        Args:
+            seed (int): Seeds the environments with seed, seed + 1, ... if given.
+
+        Returns:
+            Tuple[np.ndarray, List[dict]]: The stacked observations and the episode infos.
+        """
+        results = [environment.reset(None if seed is None else seed + number)
+                   for number, environment in enumerate(self.environments)]
+        return np.stack([observation for observation, _ in results]), [info for _, info in results]
+
+    def step(self, actions):
+        """
+        Advance every environment by one tick.
+
+        Args:
+            actions (Sequence[int]): The action of every environment.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, List[dict]]: The stacked observations,
+            rewards, terminated and truncated flags, and the episode infos.
+        """
+        count = len(self.environments)
+        observations = np.empty((count,) + self.environments[0].observation.shape, dtype=np.uint8)
+        rewards = np.zeros(count, dtype=np.int32)
+        terminated = np.zeros(count, dtype=bool)
+        truncated = np.zeros(count, dtype=bool)
+        infos = []
+        for number, (environment, action) in enumerate(zip(self.environments, actions)):
+            observation, rewards[number], terminated[number], truncated[number], info = environment.step(action)
+            if terminated[number] or truncated[number]:
+                observation, fresh = environment.reset()
+                info = dict(fresh, final=info)
+            observations[number] = observation
+            infos.append(info)
+        return observations, rewards, terminated, truncated, infos
+
+
+def measure(count: int = 1, steps: int = 5000, seed: int = 0):
+    """
+    Measure the throughput of random play.
+
+    Args:
+        count (int): The number of environments stepped together, 1 for a single Environment.
+        steps (int): The number of calls to step.
+        seed (int): The seed of the environments and of the random actions.
+
+    Returns:
+        float: The number of environment steps per second, counting every environment of a vector.
+    """
+    actions = random.Random(seed)
+    if count == 1:
+        environment = Environment()
+        environment.reset(seed)
+        start = time.perf_counter()
+        for _ in range(steps):
+            _, _, terminated, truncated, _ = environment.step(actions.randrange(len(ACTIONS)))
+            if terminated or truncated:
+                environment.reset()
+    else:
+        environment = VectorEnvironment(count)
+        environment.reset(seed)
+        start = time.perf_counter()
+        for _ in range(steps):
+            environment.step([actions.randrange(len(ACTIONS)) for _ in range(count)])
+    return count * steps / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    for instances in (1, 8, 32):
+        print(f'{instances} environment(s): {measure(instances, 5000 // instances):.0f} steps/s')
@@ -1,385 +1,606 @@
-"""This module contains the Level class, which represents a level in the game."""
-import time
+"""
+This module contains the Level class, which represents a level in the game.
+
+The simulation and the drawing of a level are separate passes. Level.update advances the game by
+one fixed tick of its SimulationClock and never touches the screen, so a level can be stepped
+headless for bots, tests and replays, while Level.draw renders the current state. Level.run does
+both and is what the game calls once per frame. Power-ups, boss screens and spawns end through
+timers of a Scheduler on the clock, which fire at the start of the tick they are due on.
+
+The map may be bigger than the screen: a Camera follows the player, the walls and pellets are
+composed from the visible chunks of a TileLayer, and only the sprites in view are drawn, so the
+cost of a frame follows the size of the screen rather than the size of the map.
+"""
+
+import random
 
 from app.src.settings.tiles import *
-from app.src.settings.additional import csv_layout, slicingImage, importFolder
-from app.src.settings.settings import startLevel, tile_size
+from app.src.settings.additional import assets
+from app.src.settings.profiler import profiler
+from app.src.settings.skins import skins
+from app.src.settings.settings import startLevel, startLevelCompiled, tile_size, ghostBehaviours, gameFont
+from app.src.settings.text import text
 from app.src.entities.enemy import Ghost, GhostBoss, Devil
-from app.src.entities.player import Player
+from app.src.entities.player import Player, keyboardControls
+from app.src.entities.pool import SpritePool
+from app.src.gameplay.camera import Camera
+from app.src.gameplay.clock import SimulationClock
+from app.src.gameplay.distancefield import DistanceField
+from app.src.gameplay.entitystore import EntityGroup, EntityStore
+from app.src.gameplay.navigation import NavGraph
+from app.src.gameplay.pelletfield import PelletField, COIN, POWER, CHERRY
+from app.src.gameplay.renderer import DirtyRenderer
+from app.src.gameplay.scheduler import Scheduler
+from app.src.gameplay.spatialhash import SpatialHash, HashedGroup, HashedGroupSingle
+from app.src.gameplay.tilelayer import TileLayer
 from app.src.gameplay.userinterface import UI
+from app.src.gameplay.wallgrid import WallGrid
 from app.src.menu.screensplash import Screen
 
+# the methods timed as stages of a frame while the profiler is enabled
+PROFILED_STAGES = ('update', 'updatePlayer', 'powerUp', 'wallCollision', 'coinCollision', 'cherryCollision',
+                   'fakeCollisionsGhost', 'ghostTargets', 'updateGhosts', 'enemyCollision', 'wallCollisionGhosts',
+                   'firstBossUpdate', 'firstBossScreen', 'secondBossUpdate', 'secondBossScreen', 'shieldCollision',
+                   'deadOrNot', 'draw', 'drawBusted', 'renderBackground')
+
 
 class Level:
     """
     This class represents a level in the game.
     """
 
-    def __init__(self, surface, skin, testing: bool = False, test: str = None):
+    def __init__(self, surface, skin, testing: bool = False, test: str = None, level=None, clock=None,
+                 controls=keyboardControls, seed: int = None):
+        """
+        Initialize the level.
+
+        Args:
+            surface (pygame.Surface): The surface the level is drawn on.
+            skin (str): The name of the player skin.
+            testing (bool): Whether the level runs one of the test scenarios.
+            test (str): The test scenario to run.
+            level (CompiledLevel): The level to play, the start level if None.
+            clock (SimulationClock): The clock the gameplay timers read, a new one if None.
+            controls (Callable[[], str]): Returns the direction the player asks for every tick, or None
+                for a level steered only through the actions passed to update.
+            seed (int): Seeds every random choice made in the level, a random seed if None.
+        """
         self.testing = testing
         self.test = test
-        self.powerup_start_time = None
-        self.bossScreenTimer = None
         self.surface = surface
-        self.previousSkin = None
         self.skin = skin
+        self.spawnRate = 5
+        self.fireballSpawnRate = 0.5
+        self.clock = clock or SimulationClock()
+        self.timers = Scheduler(self.clock)
+        self.controls = controls
+        self.seed = seed if seed is not None else random.randrange(1 << 63)
+        self.random = random.Random(self.seed)
+        self.recorder = None
+        self.UI = UI(self.surface)
+        self.renderer = DirtyRenderer(self.surface)
+        self.resetState()
+        skins.preload(self.skin)
+        self.loadLevel(level or assets.level(startLevelCompiled, startLevel))
+        profiler.watch(self, PROFILED_STAGES)
+
+    def resetState(self):
+        """Set the score, the flags and the timers of the level to those of a new game"""
+        self.timers.clear()
+        self.powerUpTimer = None
+        self.bossTimer = None
         self.invincible = None
-        self.invincible_start_time = None
+        self.invincibleTimer = None
         self.coins = 0
         self.win = False
-        self.spawnRate = 5
-        self.fireballSpawnRate = 0.5
-        self.fireballTimer = None
-        self.spawnTimer = time.time()
+        self.action = None
         self.speedupTimer = None
         self.speedup = False
         self.alive = True
+        self.causeOfDeath = None
         self.boss = 0
+        self.bossScreen = False
+        self.paused = False
         self.godMode = False
-        self.godMode_start_time = None
-        self.font = pygame.font.Font('../fonts/Retro Gaming.ttf', 30)
-        self.UI = UI(self.surface)
+        self.dirtyRects = None
+        self.splash = 0
+        self.shownSplash = None
+        self.staleBackground = True
+
+    def loadLevel(self, level):
+        """
+        Build the sprites of the level from a compiled level.
+
+        Args:
+            level (CompiledLevel): The compiled level to play.
+        """
+        self.levelMap = level
+        self.wallGrid = WallGrid(level)
+        self.navGraph = NavGraph(level)
+        self.distanceField = DistanceField.forLevel(level, self.navGraph)
+        self.broadphase = SpatialHash()
+        house = level.ghostHouse()
+        self.ghosts = EntityStore(self.wallGrid, self.navGraph, self.distanceField, house, self.seed)
+        # eaten ghosts go back to the first tile of the ghost house, or to their own spawn on a level without one
+        self.ghostHome = (house[0][0] * tile_size, house[0][1] * tile_size) if house else None
 
-        player_layout = csv_layout(startLevel['pacman'])
         self.player = pygame.sprite.GroupSingle()
-        self.fakePlayer = pygame.sprite.Group()
-        self.playerSetup(player_layout)
-
-        self.walls_layout = csv_layout(startLevel['walls'])
-        self.walls_sprites = self.create_tile_group(self.walls_layout, 'walls')
-
-        coins_layout = csv_layout(startLevel['coin'])
-        self.coins_sprites = self.create_tile_group(coins_layout, 'coin')
-
-        self.basic_powerup_layout = csv_layout(startLevel['BasicPower'])
-        self.basic_powerup_sprites = self.create_tile_group(self.basic_powerup_layout, 'BasicPower')
-
-        self.cherry_layout = csv_layout(startLevel['cherry'])
-        self.cherry_sprites = self.create_tile_group(self.cherry_layout, 'cherry')
-
-        ghost_layout = csv_layout(startLevel['ghost'])
-        self.ghost_sprites = self.create_tile_group(ghost_layout, 'ghost')
-
-        speed_layout = csv_layout(startLevel['speed'])
-        self.speed_sprites = self.create_tile_group(speed_layout, 'speed')
-
-        shield_layout = csv_layout(startLevel['shield'])
-        self.shield_sprites = self.create_tile_group(shield_layout, 'shield')
-
-        bossGhost_layout = csv_layout(startLevel['bossGhost'])
-        self.bossGhost = pygame.sprite.GroupSingle()
-        self.bossGhostSetup(bossGhost_layout)
-
-        self.devil = pygame.sprite.GroupSingle()
-        self.devil.add(Devil(tile_size, 288, 320))
-
-    def playerSetup(self, layout):
+        self.playerSetup(level.spawnsOf('pacman'))
+
+        self.pellets = PelletField.forLevel(level)
+        self.tiles = TileLayer(level, self.pellets)
+        self.camera = Camera(self.surface.get_size(), (level.width * tile_size, level.height * tile_size))
+        self.renderer.camera = self.camera
+        self.ghost_sprites = self.ghostsSetup(level.spawnsOf('ghost'))
+        self.ghostPool = SpritePool(Ghost)
+        self.speed_sprites = self.create_tile_group(level.spawnsOf('speed'), 'speed')
+        self.shield_sprites = self.create_tile_group(level.spawnsOf('shield'), 'shield')
+
+        self.bossGhost = HashedGroupSingle(self.broadphase)
+        self.bossGhostSetup(level.spawnsOf('bossGhost'))
+
+        self.devil = HashedGroupSingle(self.broadphase)
+        self.devilSetup(level.spawnsOf('devil') or house[len(house) // 2:][:1])
+        self.staleBackground = True
+
+        # the sprites of every group when the level starts, restored by reset and the boss screens
+        self.snapshot = {name: tuple(getattr(self, name).sprites()) for name in (
+            'ghost_sprites', 'speed_sprites', 'shield_sprites', 'bossGhost', 'devil')}
+
+    def restoreGroup(self, name):
+        """Fill a group of the level with the sprites it started with"""
+        group = getattr(self, name)
+        group.empty()
+        group.add(self.snapshot[name])
+
+    def reset(self, seed: int = None):
+        """
+        Start a new game on the level, restoring the initial snapshot instead of loading or building anything.
+
+        The level then plays exactly like a new Level built with the same seed.
+
+        Args:
+            seed (int): Seeds every random choice made in the level, a random seed if None.
+        """
+        self.seed = seed if seed is not None else random.randrange(1 << 63)
+        self.random.seed(self.seed)
+        self.ghosts.seed(self.seed)
+        self.clock.reset()
+        self.recorder = None
+        self.resetState()
+        self.pellets.reset()
+        self.ghostPool.releaseAll(self.ghost_sprites)
+        self.player.sprite.reset()
+        for sprite in self.snapshot['ghost_sprites'] + self.snapshot['bossGhost'] + self.snapshot['devil']:
+            sprite.reset()
+        for name in self.snapshot:
+            self.restoreGroup(name)
+        self.renderer.invalidate()
+
+    def renderBackground(self):
+        """Compose the walls and the remaining pellets in view into the cached background"""
+        if self.staleBackground:
+            self.tiles.invalidate()
+            self.staleBackground = False
+        background = self.renderer.background
+        if background is None:
+            background = pygame.Surface(self.surface.get_size()).convert()
+        self.tiles.compose(background, self.camera.view)
+        self.renderer.setBackground(background)
+
+    def togglePause(self):
+        """Pause or resume the level; the clock and every timer on it stand still while it is paused"""
+        self.paused = not self.paused
+
+    def invalidate(self):
+        """Redraw the whole level on the next frame, e.g. after something else drew over it"""
+        self.renderer.invalidate()
+        self.shownSplash = None
+
+    def erasePellets(self, rects):
+        """Erase collected pellets from the tile layer and the cached background"""
+        if self.staleBackground:
+            return
+        for rect in rects:
+            self.tiles.erase(rect)
+            if self.renderer.background is not None:
+                rect = self.camera.toScreen(rect)
+                self.renderer.background.fill('black', rect)
+                self.renderer.restore(rect)
+
+    def playerCell(self):
+        """Return the (column, row) of the tile the player spawns on"""
+        return self.player.sprite.origin_x // tile_size, self.player.sprite.origin_y // tile_size
+
+    def playerSetup(self, cells):
         """Set up the player."""
-        for indexY, row in enumerate(layout):
-            for indexX, value in enumerate(row):
-                x = indexX * tile_size
-                y = indexY * tile_size
-                if value != '-1':
-                    sprite = Player(tile_size, x, y, self.skin)
-                    self.player.add(sprite)
-                    self.fakePlayer.add(Fake(tile_size, x, y - tile_size, sprite.rect))
-                    self.fakePlayer.add(Fake(tile_size, x, y + tile_size, sprite.rect))
-                    self.fakePlayer.add(Fake(tile_size, x - tile_size, y, sprite.rect))
-                    self.fakePlayer.add(Fake(tile_size, x + tile_size, y, sprite.rect))
-
-    def bossGhostSetup(self, layout):
+        for indexX, indexY in cells:
+            x = indexX * tile_size
+            y = indexY * tile_size
+            sprite = Player(tile_size, x, y, self.skin, self.clock)
+            self.player.add(sprite)
+
+    def bossGhostSetup(self, cells):
         """Set up the Ghost Boss."""
-        for indexY, row in enumerate(layout):
-            for indexX, value in enumerate(row):
-                x = indexX * tile_size
-                y = indexY * tile_size
-                if value != '-1':
-                    sprite = GhostBoss(tile_size, x, y)
-                    self.bossGhost.add(sprite)
+        for indexX, indexY in cells:
+            sprite = GhostBoss(tile_size, indexX * tile_size, indexY * tile_size, self.ghostPool, self.levelMap)
+            self.bossGhost.add(sprite)
+
+    def devilSetup(self, cells):
+        """Set up the Devil, in the middle of the ghost house on a level that does not place it."""
+        for indexX, indexY in cells:
+            sprite = Devil(tile_size, indexX * tile_size, indexY * tile_size, self.levelMap, self.timers, self.random,
+                           self.broadphase)
+            self.devil.add(sprite)
+
+    def ghostsSetup(self, cells):
+        """Create the group of ghosts, handing out the configured behaviours in turn."""
+        sprite_group = EntityGroup(self.ghosts, broadphase=self.broadphase)
+        for number, (indexX, indexY) in enumerate(cells):
+            behaviour = ghostBehaviours[number % len(ghostBehaviours)]
+            sprite = Ghost(tile_size, indexX * tile_size, indexY * tile_size, behaviour, self.distanceField)
+            sprite.corner = number % 4
+            sprite_group.add(sprite)
+        return sprite_group
 
     def wallCollision(self):
         """ Check for collisions between player and walls """
         player = self.player.sprite
-        if player.rect.x > 605:
-            player.rect.x = -25
-        elif player.rect.x < -25:
-            player.rect.x = 605
+        tunnelLeft = self.wallGrid.tunnelLeft
+        tunnelRight = self.wallGrid.tunnelRight
+        if player.rect.x > tunnelRight:
+            player.rect.x = tunnelLeft
+        elif player.rect.x < tunnelLeft:
+            player.rect.x = tunnelRight
         player.rect.x += player.direction.x * player.speed
         player.rect.y += player.direction.y * player.speed
         next_pos = player.rect.move(player.direction.x * player.speed, player.direction.y * player.speed)
-        for wall in self.walls_sprites.sprites():
-            if wall.rect.clipline(player.rect.center, next_pos.center):
-                player.rect.x -= player.direction.x * player.speed
-                player.rect.y -= player.direction.y * player.speed
-                break
+        if self.wallGrid.segmentBlocked(player.rect.center, next_pos.center):
+            player.rect.x -= player.direction.x * player.speed
+            player.rect.y -= player.direction.y * player.speed
         else:
             player.rect = next_pos
-        for sprite in self.walls_sprites.sprites():
-            if sprite.rect.colliderect(player.rect):
-                if player.direction.x < 0:
-                    player.rect.left = sprite.rect.right
-                elif player.direction.x > 0:
-                    player.rect.right = sprite.rect.left
-                elif player.direction.y < 0:
-                    player.rect.top = sprite.rect.bottom
-                elif player.direction.y > 0:
-                    player.rect.bottom = sprite.rect.top
+        self.wallGrid.pushOut(player.rect, player.direction)
 
     def wallCollisionGhosts(self):
-        """ Check for collisions between ghost and walls """
-        for sprite in self.ghost_sprites.sprites():
-            sprite.rect.x += sprite.direction.x * sprite.speed
-            sprite.rect.y += sprite.direction.y * sprite.speed
-            for wall in self.walls_sprites.sprites():
-                if wall.rect.colliderect(sprite.rect):
-                    if sprite.direction.x < 0:
-                        sprite.rect.left = wall.rect.right
-                    elif sprite.direction.x > 0:
-                        sprite.rect.right = wall.rect.left
-                    elif sprite.direction.y < 0:
-                        sprite.rect.top = wall.rect.bottom
-                    elif sprite.direction.y > 0:
-                        sprite.rect.bottom = wall.rect.top
-
-    def fakeMove(self):
-        """Move rectangle around player"""
-        for sprite in self.fakePlayer.sprites():
-            sprite.rect.x = self.player.sprite.rect.x + sprite.deviationX
-            sprite.rect.y = self.player.sprite.rect.y + sprite.deviationY
-
-    def fakeCollisions(self):
-        """ Check for collisions between rectangles around player and walls """
-        collisions = pygame.sprite.groupcollide(self.fakePlayer, self.walls_sprites, False, False)
-        for fake in self.fakePlayer.sprites():
-            if fake in collisions:
-                if fake.location == 'up':
-                    self.player.sprite.possibleMoves[0] = 0
-                elif fake.location == 'right':
-                    self.player.sprite.possibleMoves[1] = 0
-                elif fake.location == 'down':
-                    self.player.sprite.possibleMoves[2] = 0
-                elif fake.location == 'left':
-                    self.player.sprite.possibleMoves[3] = 0
-            else:
-                if fake.location == 'up':
-                    self.player.sprite.possibleMoves[0] = 1
-                elif fake.location == 'right':
-                    self.player.sprite.possibleMoves[1] = 1
-                elif fake.location == 'down':
-                    self.player.sprite.possibleMoves[2] = 1
-                elif fake.location == 'left':
-                    self.player.sprite.possibleMoves[3] = 1
+        """ Move every ghost and push the ones that ran into a wall back out """
+        self.ghosts.move()
+        self.ghosts.resolveWalls()
+
+    def playerPossibleMoves(self):
+        """Check which of the tiles around the player are free of walls"""
+        self.player.sprite.possibleMoves = self.wallGrid.possibleMoves(self.player.sprite.rect)
 
     def fakeCollisionsGhost(self):
-        """Check for possible moves for a ghost"""
-        for sprite in self.ghost_sprites.sprites():
-            cal = sprite.rect.x // 32
-            row = sprite.rect.y // 32
-            if 0 < sprite.rect.x < 576:
-                if not sprite.rect.x % 32 and not sprite.rect.y % 32:
-                    if self.walls_layout[row + 1][cal] == '-1':
-                        sprite.possibleMoves[2] = 1
-                    else:
-                        sprite.possibleMoves[2] = 0
-                    if self.walls_layout[row - 1][cal] == '-1':
-                        sprite.possibleMoves[0] = 1
-                    else:
-                        sprite.possibleMoves[0] = 0
-                    if self.walls_layout[row][cal + 1] == '-1':
-                        sprite.possibleMoves[1] = 1
-                    else:
-                        sprite.possibleMoves[1] = 0
-                    if self.walls_layout[row][cal - 1] == '-1':
-                        sprite.possibleMoves[3] = 1
-                    else:
-                        sprite.possibleMoves[3] = 0
+        """Check for possible moves for every ghost"""
+        self.ghosts.refreshExits()
+
+    def ghostTargets(self):
+        """Point every targeted ghost at the tile its behaviour is after"""
+        if not self.ghosts.targeted():
+            return
+        player = self.player.sprite
+        playerTile = (player.rect.centerx // tile_size, player.rect.centery // tile_size)
+        self.ghosts.aim(self.distanceField.nearestWalkable(*playerTile),
+                        self.distanceField.nearestWalkable(playerTile[0] + int(player.direction.x) * 4,
+                                                           playerTile[1] + int(player.direction.y) * 4),
+                        self.distanceField.corners)
+
+    def updateGhosts(self):
+        """Turn every ghost"""
+        self.ghost_sprites.update()
+
+    def spriteCounts(self):
+        """Return the number of sprites of every kind, as shown by the profiler overlay"""
+        return {
+            'ghosts': len(self.ghost_sprites),
+            'coins': self.pellets.remaining(COIN),
+            'fireballs': len(self.devil.sprite.impact) + len(self.devil.sprite.fireballs) if self.devil.sprite else 0,
+            'pooled': sum(stats['free'] for stats in self.poolStats().values()),
+        }
+
+    def poolStats(self):
+        """Return the occupancy of the pools the spawned ghosts, impact points and fireballs are recycled through"""
+        devil = self.snapshot['devil']
+        return {'ghosts': self.ghostPool.stats(), **(devil[0].poolStats() if devil else {})}
 
     def enemyCollision(self):
         """Check for collisions between ghost and player"""
-        collide = pygame.sprite.spritecollide(self.player.sprite, self.ghost_sprites, False)
+        self.ghost_sprites.refresh()
+        collide = self.broadphase.collide(self.player.sprite.rect, self.ghost_sprites)
         if collide and not self.godMode:
             self.alive = False
+            self.causeOfDeath = 'ghost'
         elif collide and self.godMode:
             self.coins += 50
-            for ghosts in collide:
-                ghosts.rect.x = 256
-                ghosts.rect.y = 320
+            for sprite in collide:
+                self.ghosts.moveTo(sprite.slot, *(self.ghostHome or sprite.spawn.topleft))
 
     def deadOrNot(self):
         """Check if player is alive"""
         if not self.alive:
             self.win = True
-            self.coins_sprites.empty()
-            self.surface.fill((113, 116, 168))
-            TheEnd = self.font.render('BUSTED', False, 'white')
-            Coins = self.font.render(f'Score: {self.coins}', False, 'white')
-            CoinsRect = Coins.get_rect(topleft=(230, 270))
-            TheEndRect = TheEnd.get_rect(topleft=(250, 320))
-            self.surface.blit(TheEnd, TheEndRect)
-            self.surface.blit(Coins, CoinsRect)
+            self.pellets.clear(COIN)
+
+    def drawBusted(self):
+        """Draw the screen shown when the player is caught"""
+        self.surface.fill((113, 116, 168))
+        TheEnd = text.render(gameFont, 30, 'BUSTED')
+        Coins = text.render(gameFont, 30, f'Score: {self.coins}')
+        CoinsRect = Coins.get_rect(topleft=(230, 270))
+        TheEndRect = TheEnd.get_rect(topleft=(250, 320))
+        self.surface.blit(TheEnd, TheEndRect)
+        self.surface.blit(Coins, CoinsRect)
 
     def coinCollision(self):
         """Check for collisions between player and coins"""
-        if not self.coins_sprites.sprites() and not self.boss:
+        if not self.pellets.remaining(COIN) and not self.boss:
             self.boss = 1
-            self.bossScreenTimer = time.time()
-        collide = pygame.sprite.spritecollide(self.player.sprite, self.coins_sprites, True)
+            self.startBossScreen()
+        collide = self.pellets.collect(self.player.sprite.rect, COIN)
         if collide:
             self.coins += 1
+            self.erasePellets(collide)
 
     def cherryCollision(self):
         """Check for collisions between player and cherry"""
-        collide = pygame.sprite.spritecollide(self.player.sprite, self.cherry_sprites, True)
+        collide = self.pellets.collect(self.player.sprite.rect, CHERRY)
         if collide:
             self.coins += 50
+            self.erasePellets(collide)
 
     def powerUp(self):
         """Check for collisions between player and powerup"""
-        collide = pygame.sprite.spritecollide(self.player.sprite, self.basic_powerup_sprites, True)
+        collide = self.pellets.collect(self.player.sprite.rect, POWER)
         if collide:
-            self.godMode = True
-            self.previousSkin = importFolder('../images/pacman/' + self.skin)
-            self.player.sprite.frames = importFolder('../images/PowerPelletEffect')
-            self.powerup_start_time = time.time()
+            self.erasePellets(collide)
+            self.startPowerUp()
+
+    def startPowerUp(self):
+        """Make the player able to eat ghosts and bosses for five seconds"""
+        self.godMode = True
+        self.player.sprite.addEffect(skins.effect('power'))
+        self.timers.cancel(self.powerUpTimer)
+        self.powerUpTimer = self.timers.after(5, self.endPowerUp)
+
+    def endPowerUp(self):
+        """Expire the power-up"""
+        self.godMode = False
+        self.player.sprite.removeEffect(skins.effect('power'))
 
     def firstBossCollision(self):
         """Check for collisions between player and Ghost boss"""
-        if self.player.sprite.rect.colliderect(self.bossGhost.sprite.rect) and self.godMode:
+        collide = self.broadphase.collide(self.player.sprite.rect, self.bossGhost)
+        if collide and self.godMode:
             if not self.bossGhost.sprite.lives:
                 self.coins += 100
                 self.bossGhost.sprite.kill()
                 self.boss = 2
-                self.bossScreenTimer = time.time()
+                self.startBossScreen()
             else:
                 self.bossGhost.sprite.lives -= 1
-        elif self.player.sprite.rect.colliderect(self.bossGhost.sprite.rect) and not self.godMode:
+        elif collide and not self.godMode:
             self.alive = False
+            self.causeOfDeath = 'ghostBoss'
 
     def fireballCollision(self):
         """Check for collisions between player and fireball"""
-        collide = pygame.sprite.spritecollide(self.player.sprite, self.devil.sprite.fireballs, True)
+        if not self.devil.sprite:
+            return
+        collide = self.broadphase.collide(self.player.sprite.rect, self.devil.sprite.fireballs, True)
         if collide and not self.invincible:
             self.alive = False
-
-    def create_tile_group(self, layout, sprite_type):
-        """Create a group of tiles"""
-        sprite_group = pygame.sprite.Group()
-        for indexY, row in enumerate(layout):
-            for indexX, value in enumerate(row):
-                if value != '-1':
-                    x = indexX * tile_size
-                    y = indexY * tile_size
-                    if sprite_type == 'walls':
-                        walls_tile_list = slicingImage('../images/tiles set.png')
-                        tileSurface = walls_tile_list[int(value)]
-                        sprite = StaticTile(tile_size, x, y, tileSurface)
-                    elif sprite_type == 'coin':
-                        sprite = Coin(tile_size, x, y)
-                    elif sprite_type == 'BasicPower':
-                        sprite = BasicPower(tile_size, x, y)
-                    elif sprite_type == 'cherry':
-                        sprite = Cherry(tile_size, x, y)
-                    elif sprite_type == 'ghost':
-                        sprite = Ghost(tile_size, x, y)
-                    elif sprite_type == 'speed':
-                        sprite = Speed(tile_size, x, y)
-                    elif sprite_type == 'shield':
-                        sprite = Shield(tile_size, x, y)
-                    sprite_group.add(sprite)
+            self.causeOfDeath = 'fireball'
+
+    def create_tile_group(self, cells, sprite_type):
+        """Create a group of tiles on the given (column, row) cells"""
+        sprite_group = HashedGroup(self.broadphase)
+        for indexX, indexY in cells:
+            x = indexX * tile_size
+            y = indexY * tile_size
+            if sprite_type == 'speed':
+                sprite = Speed(tile_size, x, y)
+            elif sprite_type == 'shield':
+                sprite = Shield(tile_size, x, y)
+            sprite_group.add(sprite)
         return sprite_group
 
     def secondBossCollision(self):
         """Check for collisions between player and Devil boss"""
-        if self.player.sprite.rect.colliderect(self.devil.sprite.rect) and self.godMode:
+        collide = self.broadphase.collide(self.player.sprite.rect, self.devil)
+        if collide and self.godMode:
             self.coins += 100
             self.boss = 3
-        elif self.player.sprite.rect.colliderect(self.devil.sprite.rect) and not self.godMode and not self.invincible:
+        elif collide and not self.godMode and not self.invincible:
             self.alive = False
+            self.causeOfDeath = 'devil'
 
     def speedCollision(self):
         """Check for collisions between player and speed boost"""
-        collide = pygame.sprite.spritecollide(self.player.sprite, self.speed_sprites, True)
+        collide = self.broadphase.collide(self.player.sprite.rect, self.speed_sprites, True)
         if collide:
             self.speedup = True
             self.player.sprite.speed = 2
-            self.speedupTimer = time.time()
+            self.timers.cancel(self.speedupTimer)
+            self.speedupTimer = self.timers.after(5, self.endSpeedUp)
+
+    def endSpeedUp(self):
+        """Expire the speed boost"""
+        self.speedup = False
+        self.player.sprite.speed = 1
 
     def shieldCollision(self):
         """Check for collisions between player and powerup"""
-        collide = pygame.sprite.spritecollide(self.player.sprite, self.shield_sprites, True)
+        collide = self.broadphase.collide(self.player.sprite.rect, self.shield_sprites, True)
         if collide:
             self.invincible = True
-            self.previousSkin = importFolder('../images/pacman/' + self.skin)
-            self.player.sprite.frames = importFolder('../images/shield')
-            self.invincible_start_time = time.time()
+            self.player.sprite.addEffect(skins.effect('shield'))
+            self.timers.cancel(self.invincibleTimer)
+            self.invincibleTimer = self.timers.after(5, self.endShield)
+
+    def endShield(self):
+        """Expire the shield"""
+        self.invincible = False
+        self.player.sprite.removeEffect(skins.effect('shield'))
+
+    def startBossScreen(self):
+        """Show the splash of the current boss for two seconds, stopping the timer of the previous boss"""
+        self.bossScreen = True
+        self.timers.cancel(self.bossTimer)
+        self.bossTimer = self.timers.after(2, self.endBossScreen)
+
+    def endBossScreen(self):
+        """Start the fight with the current boss: ghost spawns for the first, fireballs for the second"""
+        self.bossScreen = False
+        if self.boss == 1:
+            # the first ghost comes no sooner than the spawn rate after the start of the game
+            delay = max(self.spawnRate - self.clock.now(), 0)
+            self.bossTimer = self.timers.every(self.spawnRate, self.spawnGhost, delay=delay)
+        elif self.boss == 2:
+            self.bossTimer = self.timers.every(self.fireballSpawnRate, self.castFireball)
+
+    def spawnGhost(self):
+        """Let the Ghost boss spawn a ghost"""
+        if self.bossGhost.sprite:
+            self.bossGhost.sprite.spawnEnemy(self.ghost_sprites)
+
+    def castFireball(self):
+        """Let the Devil cast a fireball near the player"""
+        if self.devil.sprite:
+            self.devil.sprite.castFireball(self.player.sprite.rect.x, self.player.sprite.rect.y)
+
     def firstBossUpdate(self):
         """Updating the first boss"""
         self.bossGhost.update()
-        self.bossGhost.draw(self.surface)
+        self.broadphase.refresh(self.bossGhost)
         self.firstBossCollision()
-        if time.time() - self.spawnTimer > self.spawnRate:
-            self.spawnTimer = time.time()
-            self.bossGhost.sprite.spawnEnemy(self.ghost_sprites)
+
     def firstBossScreen(self):
         """Updating the screen of first boss"""
         self.player.sprite.direction = pygame.math.Vector2(0, 0)
         self.player.sprite.rect.x = self.player.sprite.origin_x
         self.player.sprite.rect.y = self.player.sprite.origin_y
+        self.ghostPool.releaseAll(self.ghost_sprites)
         self.ghost_sprites.empty()
-        screen = Screen(self.boss)
-        screen.run(self.surface)
-        self.cherry_sprites.empty()
-        self.basic_powerup_sprites = self.create_tile_group(self.basic_powerup_layout, 'BasicPower')
+        self.pellets.clear(CHERRY)
+        self.pellets.reset(POWER)
+        self.staleBackground = True
+        self.splash = self.boss
+
     def secondBossUpdate(self):
         """Updating the second boss"""
-        self.shield_sprites.draw(self.surface)
-        self.speed_sprites.draw(self.surface)
-        self.devil.update(self.surface)
-        self.devil.draw(self.surface)
         self.speedCollision()
         self.shieldCollision()
-        if self.invincible and time.time() - self.invincible_start_time > 5:
-            self.invincible = False
-            self.player.sprite.frames = self.previousSkin
-        if self.speedup and time.time() - self.speedupTimer > 5:
-            self.speedup = False
-            self.player.sprite.speed = 1
-        if time.time() - self.fireballTimer > self.fireballSpawnRate:
-            self.devil.sprite.castFireball(self.player.sprite.rect.x, self.player.sprite.rect.y)
-            self.fireballTimer = time.time()
         self.fireballCollision()
         self.secondBossCollision()
+
     def secondBossScreen(self):
         """Updating the screen of second boss"""
-        self.fireballTimer = time.time()
         self.player.sprite.direction = pygame.math.Vector2(0, 0)
         self.player.sprite.rect.x = self.player.sprite.origin_x
         self.player.sprite.rect.y = self.player.sprite.origin_y
         self.bossGhost.empty()
+        self.ghostPool.releaseAll(self.ghost_sprites)
         self.ghost_sprites.empty()
-        self.cherry_sprites.empty()
-        self.basic_powerup_sprites.empty()
-        self.basic_powerup_sprites = self.create_tile_group(self.cherry_layout, 'BasicPower')
-        screen = Screen(self.boss)
-        screen.run(self.surface)
+        self.pellets.clear(CHERRY)
+        self.pellets.clear(POWER)
+        self.pellets.fill(POWER, self.levelMap.spawnsOf('cherry'))
+        self.staleBackground = True
+        self.splash = self.boss
+
+    def updatePlayer(self, action=None):
+        """Move the player for one tick"""
+        self.powerUp()
+        self.playerPossibleMoves()
+        if action is None and self.controls:
+            action = self.controls()
+        self.action = action
+        self.player.update(action)
+
+    def update(self, action=None):
+        """
+        Advance the simulation by one fixed tick without drawing anything.
+
+        Args:
+            action (str): The direction to steer the player in, one of 'up', 'right', 'down' and 'left',
+                or None to ask the controls of the level.
+        """
+        self.clock.advance()
+        self.timers.run()
+        self.splash = 0
+        self.updatePlayer(action)
+        self.wallCollision()
+        self.coinCollision()
+        self.cherryCollision()
+        self.fakeCollisionsGhost()
+        self.ghostTargets()
+        self.updateGhosts()
+        self.enemyCollision()
+        self.wallCollisionGhosts()
+        if self.boss == 1:
+            if self.bossScreen:
+                self.firstBossScreen()
+            else:
+                self.firstBossUpdate()
+        elif self.boss == 2:
+            if self.bossScreen:
+                self.secondBossScreen()
+            else:
+                self.secondBossUpdate()
+        elif self.boss == 3:
+            self.win = True
+            self.devil.empty()
+            self.splash = self.boss
+        self.deadOrNot()
+        if self.recorder:
+            self.recorder.record(self)
+
+    def draw(self):
+        """Draw the current state of the level and record the areas of the surface that changed"""
+        if not self.alive or self.splash:
+            shown = (self.alive, self.splash, self.coins)
+            if shown == self.shownSplash:
+                self.dirtyRects = []
+                return
+            if self.alive:
+                Screen(self.splash, self.coins).run(self.surface)
+            else:
+                self.drawBusted()
+            self.shownSplash = shown
+            self.renderer.invalidate()
+            self.dirtyRects = None
+            return
+        self.shownSplash = None
+        if self.camera.follow(self.player.sprite.rect) or self.staleBackground:
+            self.renderBackground()
+        self.player.sprite.animate()
+        self.renderer.begin()
+        self.renderer.draw(self.player)
+        self.renderer.draw(self.ghost_sprites)
+        self.renderer.add(self.UI.showCoin(self.coins))
+        if self.boss == 1:
+            self.renderer.draw(self.bossGhost)
+        elif self.boss == 2:
+            self.renderer.draw(self.shield_sprites)
+            self.renderer.draw(self.speed_sprites)
+            if self.devil.sprite:
+                self.renderer.draw(self.devil.sprite.impact)
+                self.renderer.draw(self.devil.sprite.fireballs)
+                self.renderer.draw(self.devil)
+        self.dirtyRects = self.renderer.end()
+
     def run(self):
-        """Run the level"""
+        """Run the level for one frame"""
         if self.testing and self.test == 'start':
             return 'Game started'
-        if self.godMode and time.time() - self.powerup_start_time > 5:
-            self.godMode = False
-            self.player.sprite.frames = self.previousSkin
-        self.powerUp()
-        self.fakeMove()
-        self.fakeCollisions()
-        self.player.update()
         if self.testing:
+            self.updatePlayer()
             match self.test:
                 case 'collision':
-                    self.coins_sprites.add(Coin(tile_size, self.player.sprite.origin_x, self.player.sprite.origin_y))
-                    return pygame.sprite.spritecollide(self.player.sprite, self.coins_sprites, True)
+                    self.pellets.fill(COIN, [self.playerCell()])
+                    return self.pellets.collect(self.player.sprite.rect, COIN)
                 case 'score':
-                    self.coins_sprites.add(Coin(tile_size, self.player.sprite.origin_x, self.player.sprite.origin_y))
+                    self.pellets.fill(COIN, [self.playerCell()])
                     self.coinCollision()
                     return self.coins
                 case 'ghost_collision':
@@ -389,37 +610,9 @@ class Level:
                     self.enemyCollision()
                     return self.alive
                 case 'powerup_collision':
-                    self.basic_powerup_sprites.add(
-                        BasicPower(tile_size, self.player.sprite.origin_x, self.player.sprite.origin_y))
-                    self.basic_powerup_sprites.draw(self.surface)
+                    self.pellets.fill(POWER, [self.playerCell()])
                     self.powerUp()
                     return self.godMode
-        self.wallCollision()
-        self.coinCollision()
-        self.cherryCollision()
-        self.fakeCollisionsGhost()
-        self.fakePlayer.draw(self.surface)
-        self.walls_sprites.draw(self.surface)
-        self.coins_sprites.draw(self.surface)
-        self.basic_powerup_sprites.draw(self.surface)
-        self.cherry_sprites.draw(self.surface)
-        self.player.draw(self.surface)
-        self.ghost_sprites.draw(self.surface)
-        self.ghost_sprites.update()
-        self.enemyCollision()
-        self.wallCollisionGhosts()
-        self.UI.showCoin(self.coins)
-        if self.boss == 1 and time.time() - self.bossScreenTimer > 2:
-            self.firstBossUpdate()
-        elif self.boss == 1 and time.time() - self.bossScreenTimer < 2:
-            self.firstBossScreen()
-        elif self.boss == 2 and time.time() - self.bossScreenTimer > 2:
-            self.secondBossUpdate()
-        elif self.boss == 2 and time.time() - self.bossScreenTimer < 2:
-            self.secondBossScreen()
-        elif self.boss == 3:
-            self.win = True
-            self.devil.empty()
-            screen = Screen(self.boss, self.coins)
-            screen.run(self.surface)
-        self.deadOrNot()
+        if not self.paused:
+            self.update()
+        self.draw()
@@ -0,0 +1,59 @@
+"""
+Module containing the LevelPool class, which keeps finished levels to start the next games on.
+
+Building a Level sets up its wall grid, navigation graph, distance field and every sprite. A level
+taken back by the pool is restarted with Level.reset instead, which only restores the snapshot the
+level took of its sprites when it was built, so starting a new game loads and builds nothing.
+"""
+
+from app.src.gameplay.level import Level
+
+
+class LevelPool:
+    """
+    Idle levels by skin, reset and handed out again instead of building new ones.
+
+    Args:
+        surface (pygame.Surface): The surface the levels are drawn on.
+        **options: Passed on to every Level built, e.g. controls or level.
+
+    Attributes:
+        built (int): The number of levels built so far.
+        reused (int): The number of levels handed out again after a reset.
+    """
+
+    def __init__(self, surface, **options):
+        self.surface = surface
+        self.options = options
+        self.built = 0
+        self.reused = 0
+        self._idle = {}
+
+    def acquire(self, skin: str, seed: int = None):
+        """
+        Return a level ready for a new game.
+
+        Args:
+            skin (str): The name of the player skin.
+            seed (int): Seeds every random choice made in the level, a random seed if None.
+
+        Returns:
+            Level: An idle level of the skin after a reset, or a new one if there is none.
+        """
+        idle = self._idle.get(skin)
+        if idle:
+            level = idle.pop()
+            level.reset(seed)
+            self.reused += 1
+            return level
+        self.built += 1
+        return Level(self.surface, skin, seed=seed, **self.options)
+
+    def release(self, level):
+        """
+        Give back a level that is no longer played, to be reset by a later acquire.
+
+        Args:
+            level (Level): The level.
+        """
+        self._idle.setdefault(level.skin, []).append(level)
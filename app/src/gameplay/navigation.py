@@ -0,0 +1,133 @@
+"""
+This module contains the NavGraph class, the navigation graph ghosts move on.
+
+Directions are numbered the way ghost steering and possibleMoves number them: 0 is up, 1 is right,
+2 is down and 3 is left. The exits of a tile are stored as a bitmask with bit n set when
+direction n is open, and TURN_CHOICES maps every exit bitmask and previous direction to the
+directions a ghost may pick at that tile, so a ghost never builds a candidate list at run time.
+Junctions are linked by straight corridors of known length, so a ghost leaving a junction knows
+where it stops next without looking at the tiles in between.
+"""
+
+UP, RIGHT, DOWN, LEFT = range(4)
+DIRECTIONS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+ALL_EXITS = 0b1111
+# the exits of the tiles in the middle of a straight corridor, up and down or left and right
+STRAIGHT_EXITS = ((1 << UP) | (1 << DOWN), (1 << LEFT) | (1 << RIGHT))
+
+
+def exitDirections(exits):
+    """Return the directions that are open in an exit bitmask, in ascending order."""
+    return tuple(direction for direction in range(4) if exits & (1 << direction))
+
+
+def _turnChoices(exits, previousWay):
+    """Return the directions a ghost may take, never reversing unless it is stuck."""
+    choices = [direction for direction in exitDirections(exits) if direction != (previousWay + 2) % 4]
+    return tuple(choices) or (4,)
+
+
+# TURN_CHOICES[exits][previousWay] for every bitmask and every previous direction, 4 meaning no direction
+TURN_CHOICES = tuple(tuple(_turnChoices(exits, previousWay) for previousWay in range(5)) for exits in range(16))
+OPEN_CHOICES = tuple(exitDirections(exits) for exits in range(16))
+
+
+class NavGraph:
+    """
+    The navigation graph of a level, built once from its wall layer.
+
+    Every walkable tile gets the bitmask of its legal exits. Every tile where a ghost does anything
+    but go straight on, a crossing, a fork, a corner or a dead end, is a junction, and every
+    junction is linked through each of its exits to the junction at the other end of the straight
+    corridor, together with the length of that corridor in tiles. The left and right edges of the
+    map wrap around, as the tunnel does.
+
+    Args:
+        level (CompiledLevel): The level to build the graph from.
+
+    Attributes:
+        exits (bytearray): The exit bitmask of every tile in row-major order, 0 for walls.
+        junctions (FrozenSet[int]): The indices of the junction tiles.
+        edges (dict): Maps a junction index to a dictionary of direction -> (junction index, corridor length).
+    """
+
+    def __init__(self, level):
+        self.width = level.width
+        self.height = level.height
+        self.exits = bytearray(self.width * self.height)
+        for row in range(self.height):
+            for col in range(self.width):
+                if level.isWall(col, row):
+                    continue
+                mask = 0
+                for direction, (dx, dy) in enumerate(DIRECTIONS):
+                    if not level.isWall(col + dx, row + dy):
+                        mask |= 1 << direction
+                self.exits[row * self.width + col] = mask
+        self.junctions = frozenset(index for index, mask in enumerate(self.exits)
+                                   if mask and mask not in STRAIGHT_EXITS)
+        self.edges = {junction: self._corridors(junction) for junction in self.junctions}
+
+    def index(self, col, row):
+        """Return the index of a tile."""
+        return row * self.width + col
+
+    def cell(self, index):
+        """Return the (column, row) of a tile index."""
+        return index % self.width, index // self.width
+
+    def exitsAt(self, col, row):
+        """Return the exit bitmask of a tile. Tiles outside the map only lead sideways, along the tunnel."""
+        if 0 <= col < self.width and 0 <= row < self.height:
+            return self.exits[row * self.width + col]
+        return (1 << RIGHT) | (1 << LEFT)
+
+    def neighbour(self, index, direction):
+        """
+        Return the tile reached by leaving a tile in a direction, wrapping around the left and right edges.
+
+        Args:
+            index (int): The index of the tile.
+            direction (int): The direction to leave in.
+
+        Returns:
+            int: The index of the neighbouring tile, or None if it lies above or below the map.
+        """
+        col, row = self.cell(index)
+        dx, dy = DIRECTIONS[direction]
+        row += dy
+        if not 0 <= row < self.height:
+            return None
+        return row * self.width + (col + dx) % self.width
+
+    def _corridors(self, junction):
+        """Follow every exit of a junction straight on to the junction at the other end of its corridor."""
+        corridors = {}
+        for direction in exitDirections(self.exits[junction]):
+            tile = self.neighbour(junction, direction)
+            length = 1
+            while tile is not None and tile not in self.junctions and length <= len(self.exits):
+                tile = self.neighbour(tile, direction)
+                length += 1
+            if tile is not None and tile in self.junctions:
+                corridors[direction] = (tile, length)
+        return corridors
+
+    def isJunction(self, col, row):
+        """Return whether a tile is a junction."""
+        return 0 <= col < self.width and 0 <= row < self.height and self.index(col, row) in self.junctions
+
+    def corridor(self, col, row, direction):
+        """
+        Return where the corridor leaving a junction in a direction ends.
+
+        Args:
+            col (int): The column of the junction.
+            row (int): The row of the junction.
+            direction (int): The direction of the corridor.
+
+        Returns:
+            Tuple[int, int]: The index of the junction at the other end and the corridor length in tiles,
+            or None if there is no such corridor.
+        """
+        return self.edges.get(self.index(col, row), {}).get(direction)
@@ -0,0 +1,120 @@
+"""
+This module contains the OpenCellIndex class, the cached neighbourhoods of open cells the Devil targets.
+
+For every tile the index keeps the open cells of the square window around it, in row-major order,
+so picking a target near the player is one random choice from a prepared tuple instead of a scan
+of the wall layer. The window of the Devil's radius is prepared for every tile of the map when the
+index is built, unless the map has more than PREPARED_TILES tiles; other windows are prepared on
+their first use. Indexes are cached by the wall layer they were built from and shared by every
+impact point of every level with the same walls; only the CACHED_INDEXES most recently used walls
+keep their index in the cache.
+"""
+
+from collections import OrderedDict
+
+_cache = OrderedDict()
+
+# the radius of the window impact points are placed in, in tiles
+DEFAULT_RADIUS = 2
+# the number of tiles of the largest map whose windows are all prepared when its index is built
+PREPARED_TILES = 4096
+# the number of indexes kept in the cache, by the wall layer they were built from
+CACHED_INDEXES = 4
+
+
+class OpenCellIndex:
+    """
+    The open cells around every tile of a level.
+
+    Args:
+        level (CompiledLevel): The level.
+        radius (int): The radius prepared for every tile right away on maps of up to PREPARED_TILES tiles.
+    """
+
+    def __init__(self, level, radius: int = DEFAULT_RADIUS):
+        self.width = level.width
+        self.height = level.height
+        self.mask = bytes(level.wallMask)
+        self._windows = {}
+        if self.width * self.height > PREPARED_TILES:
+            return
+        for row in range(self.height):
+            for col in range(self.width):
+                self.around(col, row, radius)
+
+    @classmethod
+    def forLevel(cls, level):
+        """
+        Return the open-cell index of a level, reusing a cached one while the wall layer is unchanged.
+
+        Args:
+            level (CompiledLevel): The level.
+
+        Returns:
+            OpenCellIndex: The index.
+        """
+        key = (level.width, bytes(level.wallMask))
+        index = _cache.get(key)
+        if index is None:
+            index = _cache[key] = cls(level)
+            if len(_cache) > CACHED_INDEXES:
+                _cache.popitem(last=False)
+        else:
+            _cache.move_to_end(key)
+        return index
+
+    def around(self, col, row, radius: int = DEFAULT_RADIUS):
+        """
+        Return the open cells of the window around a tile, clipped to the map.
+
+        Args:
+            col (int): The column of the tile, which may lie outside the map in the tunnels.
+            row (int): The row of the tile.
+            radius (int): The number of tiles the window reaches out in every direction.
+
+        Returns:
+            Tuple[Tuple[int, int], ...]: The (column, row) of every open cell, in row-major order.
+        """
+        key = (radius, col, row)
+        window = self._windows.get(key)
+        if window is None:
+            width = self.width
+            mask = self.mask
+            window = tuple((x, y)
+                           for y in range(max(0, row - radius), min(self.height - 1, row + radius) + 1)
+                           for x in range(max(0, col - radius), min(width - 1, col + radius) + 1)
+                           if not mask[y * width + x])
+            self._windows[key] = window
+        return window
+
+    def choose(self, col, row, rng, radius: int = DEFAULT_RADIUS):
+        """
+        Pick a random open cell near a tile.
+
+        Args:
+            col (int): The column of the tile.
+            row (int): The row of the tile.
+            rng (random.Random): The random generator making the choice.
+            radius (int): The number of tiles the window reaches out in every direction.
+
+        Returns:
+            Tuple[int, int]: The (column, row) of the cell.
+        """
+        return rng.choice(self.around(col, row, radius))
+
+    def volley(self, col, row, count, rng, radius: int = DEFAULT_RADIUS):
+        """
+        Pick several different open cells near a tile.
+
+        Args:
+            col (int): The column of the tile.
+            row (int): The row of the tile.
+            count (int): The number of cells wanted; fewer are returned if the window has fewer open cells.
+            rng (random.Random): The random generator making the choice.
+            radius (int): The number of tiles the window reaches out in every direction.
+
+        Returns:
+            List[Tuple[int, int]]: The (column, row) of every cell.
+        """
+        window = self.around(col, row, radius)
+        return rng.sample(window, min(count, len(window)))
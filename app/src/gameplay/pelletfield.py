@@ -0,0 +1,173 @@
+"""
+This module contains the PelletField class, a tile-indexed grid of the pellets of a level.
+
+Every tile holds at most one pellet, stored as one byte of a NumPy grid instead of a sprite, and the
+field counts how many pellets of every kind are left. Collecting only looks at the few tiles under
+the player, checking whether a kind is cleared is a lookup, and the pellets are only drawn when a
+chunk of the cached tile layer of the level is baked.
+"""
+
+import numpy as np
+import pygame
+
+from app.src.settings.additional import assets
+from app.src.settings.settings import tile_size
+
+# the kinds of pellets, which are also the values of the grid; NONE marks a tile without a pellet
+NONE, COIN, POWER, CHERRY = range(4)
+
+IMAGES = {
+    COIN: '../images/PacDot.png',
+    POWER: '../images/PowerPellet.png',
+    CHERRY: '../images/SimpleCherry.png',
+}
+
+
+class PelletField:
+    """
+    The pellets of a level on a grid of tiles, with a count of the pellets left of every kind.
+
+    Args:
+        width (int): The number of tiles in a row.
+        height (int): The number of rows.
+        size (int): The size of a tile in pixels.
+
+    Attributes:
+        grid (np.ndarray): The (height, width) uint8 grid holding the kind of the pellet on every tile.
+    """
+
+    def __init__(self, width: int, height: int, size: int = tile_size):
+        self.width = width
+        self.height = height
+        self.size = size
+        self.grid = np.zeros((height, width), dtype=np.uint8)
+        self._remaining = [0] * (CHERRY + 1)
+        self._initial = self.grid.copy()
+
+    @classmethod
+    def forLevel(cls, level, size: int = tile_size):
+        """
+        Build the field of a compiled level, with its coins, power pellets and cherries.
+
+        Args:
+            level (CompiledLevel): The compiled level.
+            size (int): The size of a tile in pixels.
+
+        Returns:
+            PelletField: The field, whose current pellets are also the ones reset restores.
+        """
+        field = cls(level.width, level.height, size)
+        field.fill(COIN, level.spawnsOf('coin'))
+        field.fill(POWER, level.spawnsOf('BasicPower'))
+        field.fill(CHERRY, level.spawnsOf('cherry'))
+        field.save()
+        return field
+
+    def remaining(self, kind):
+        """Return the number of pellets of a kind left on the field."""
+        return self._remaining[kind]
+
+    def fill(self, kind, cells):
+        """
+        Put a pellet of a kind on tiles, replacing the pellets on them.
+
+        Args:
+            kind (int): COIN, POWER or CHERRY.
+            cells (Iterable[Tuple[int, int]]): The (column, row) of every tile.
+        """
+        for col, row in cells:
+            if 0 <= col < self.width and 0 <= row < self.height:
+                previous = self.grid[row, col]
+                if previous:
+                    self._remaining[previous] -= 1
+                self.grid[row, col] = kind
+                self._remaining[kind] += 1
+
+    def clear(self, kind):
+        """Remove every pellet of a kind."""
+        if self._remaining[kind]:
+            self.grid[self.grid == kind] = NONE
+            self._remaining[kind] = 0
+
+    def cells(self, kind):
+        """Return the (column, row) of every pellet of a kind."""
+        rows, cols = np.nonzero(self.grid == kind)
+        return list(zip(cols.tolist(), rows.tolist()))
+
+    def rect(self, col, row):
+        """Return the area in pixels of the pellet on a tile."""
+        return pygame.Rect(col * self.size, row * self.size, self.size, self.size)
+
+    def collect(self, rect, kind):
+        """
+        Remove the pellets of a kind that overlap a rectangle.
+
+        Args:
+            rect (pygame.Rect): The rectangle in pixels, usually the player's.
+            kind (int): COIN, POWER or CHERRY.
+
+        Returns:
+            List[pygame.Rect]: The areas of the collected pellets, empty if there were none.
+        """
+        collected = []
+        if not self._remaining[kind] or rect.width <= 0 or rect.height <= 0:
+            return collected
+        size = self.size
+        grid = self.grid
+        for row in range(max(rect.top // size, 0), min((rect.bottom - 1) // size + 1, self.height)):
+            for col in range(max(rect.left // size, 0), min((rect.right - 1) // size + 1, self.width)):
+                if grid[row, col] == kind:
+                    grid[row, col] = NONE
+                    collected.append(self.rect(col, row))
+        self._remaining[kind] -= len(collected)
+        return collected
+
+    def draw(self, surface, area=None):
+        """
+        Draw the pellets left on the field.
+
+        Args:
+            surface (pygame.Surface): The surface to draw on.
+            area (pygame.Rect): Draw only the pellets on the tiles this area of the field covers, with the
+                top left of the area at the top left of the surface; every pellet if None.
+        """
+        if area is None:
+            for kind, path in IMAGES.items():
+                image = assets.image(path)
+                surface.blits([(image, self.rect(col, row)) for col, row in self.cells(kind)], False)
+            return
+        size = self.size
+        left = max(area.left // size, 0)
+        top = max(area.top // size, 0)
+        grid = self.grid[top:max((area.bottom - 1) // size + 1, top), left:max((area.right - 1) // size + 1, left)]
+        for kind, path in IMAGES.items():
+            rows, cols = np.nonzero(grid == kind)
+            if not rows.size:
+                continue
+            image = assets.image(path)
+            x = (cols + left) * size - area.left
+            y = (rows + top) * size - area.top
+            surface.blits([(image, point) for point in zip(x.tolist(), y.tolist())], False)
+
+    def save(self):
+        """Keep the current pellets as the ones reset restores."""
+        self._initial = self.grid.copy()
+
+    def reset(self, kind=None):
+        """
+        Restore the saved pellets.
+
+        Args:
+            kind (int): Restore only the pellets of this kind, or every pellet if None.
+        """
+        if kind is None:
+            np.copyto(self.grid, self._initial)
+        else:
+            self.clear(kind)
+            np.copyto(self.grid, self._initial, where=self._initial == kind)
+        self._recount()
+
+    def _recount(self):
+        """Count the pellets of every kind from the grid."""
+        self._remaining = np.bincount(self.grid.ravel(), minlength=len(self._remaining)).tolist()
+        self._remaining[NONE] = 0
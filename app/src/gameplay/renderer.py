@@ -0,0 +1,96 @@
+"""
+This module contains the DirtyRenderer class, which redraws only the parts of the screen that change.
+
+The static parts of a level are baked into a background surface. Every frame the renderer restores
+the background under everything it drew in the previous frame, draws the moving sprites again and
+reports the union of both as the dirty rectangles to push to the display. With a camera, the
+background is the part of the map in view, and only the sprites in view are drawn, shifted onto it.
+"""
+
+import pygame
+
+
+class DirtyRenderer:
+    """
+    A dirty-rectangle renderer drawing on top of a cached background.
+
+    Args:
+        surface (pygame.Surface): The surface to draw on, usually the display.
+        camera (Camera): The view of the map shown on the surface, or None to draw every sprite where it is.
+
+    Attributes:
+        background (pygame.Surface): The cached background, or None until one is set.
+        dirtyRects (List[pygame.Rect]): The rectangles changed by the last frame, or None if the whole
+            surface changed.
+    """
+
+    def __init__(self, surface, camera=None):
+        self.surface = surface
+        self.camera = camera
+        self.background = None
+        self.dirtyRects = None
+        self._full = True
+        self._previous = []
+        self._drawn = []
+        self._restore = []
+
+    def setBackground(self, background):
+        """Use a new background and redraw the whole surface on the next frame."""
+        self.background = background
+        self.invalidate()
+
+    def invalidate(self):
+        """Update the whole display for this frame and redraw the whole surface on the next one, e.g. after a splash screen."""
+        self._full = True
+        self.dirtyRects = None
+
+    def restore(self, rect):
+        """Copy an area of the background back onto the surface on the next frame."""
+        self._restore.append(pygame.Rect(rect))
+
+    def begin(self):
+        """Start a frame by restoring the background under everything drawn in the previous frame."""
+        self._drawn = []
+        if self._full:
+            self.surface.blit(self.background, (0, 0))
+            self.dirtyRects = None
+            self._full = False
+        else:
+            self.dirtyRects = self._previous + self._restore
+            blit = self.surface.blit
+            for rect in self.dirtyRects:
+                blit(self.background, rect, rect)
+        self._restore = []
+
+    def draw(self, group):
+        """
+        Draw every sprite of a group that is in view.
+
+        Args:
+            group (pygame.sprite.AbstractGroup): The sprites to draw.
+        """
+        camera = self.camera
+        if camera is None:
+            blits = [(sprite.image, sprite.rect) for sprite in group.sprites()]
+        elif camera.x or camera.y:
+            x, y = camera.offset
+            blits = [(sprite.image, sprite.rect.move(-x, -y)) for sprite in camera.visible(group)]
+        else:
+            blits = [(sprite.image, sprite.rect) for sprite in camera.visible(group)]
+        self._drawn.extend(self.surface.blits(blits))
+
+    def add(self, rects):
+        """Record areas that were drawn on the surface directly."""
+        self._drawn.extend(rects)
+
+    def end(self):
+        """
+        Finish a frame.
+
+        Returns:
+            List[pygame.Rect]: The rectangles to update on the display, or None to update all of it.
+        """
+        self._previous = self._drawn
+        if self.dirtyRects is not None:
+            self.dirtyRects.extend(self._drawn)
+        return self.dirtyRects
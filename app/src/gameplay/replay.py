@@ -0,0 +1,188 @@
+"""
+Module for recording the input of a level into a compact replay and playing it back.
+
+Every random choice of a level comes from a generator seeded with Level.seed and every timer reads
+its SimulationClock, so the seed and the player input are all it takes to re-simulate a run. The
+input is stored as run-length-encoded deltas: only the ticks where the direction passed to
+Player.move changes are kept, each as one varint holding the length of the run of unchanged
+ticks before it and the new direction.
+
+The state of the level is folded into a chained CRC32 after every tick, and the chain is stored
+every hashInterval ticks and at the end, so playback finds the first stretch of ticks where the
+simulation drifted from the recording.
+
+The binary format is a header, the encoded input and the stored hashes as little-endian uint32.
+"""
+
+import struct
+import sys
+import zlib
+from array import array
+
+from app.src.gameplay.environment import headlessSurface
+from app.src.gameplay.level import Level
+from app.src.gameplay.pelletfield import COIN, POWER, CHERRY
+
+MAGIC = b'PACRPL01'
+HEADER = struct.Struct('<8sQIIIII')
+
+DIRECTIONS = ('up', 'right', 'down', 'left')
+
+
+def stateHash(level, previous: int = 0):
+    """
+    Fold the state of a level into a chained CRC32.
+
+    Args:
+        level (Level): The level.
+        previous (int): The hash of the previous tick.
+
+    Returns:
+        int: The hash of this tick.
+    """
+    player = level.player.sprite
+    values = [level.clock.ticks, level.coins, level.boss, level.alive, level.win, bool(level.godMode),
+              bool(level.invincible), level.speedup, player.rect.x, player.rect.y, int(player.direction.x),
+              int(player.direction.y), level.pellets.remaining(COIN),
+              level.pellets.remaining(POWER), level.pellets.remaining(CHERRY), len(level.ghost_sprites)]
+    groups = [level.ghost_sprites, level.bossGhost]
+    if level.devil.sprite:
+        groups += [level.devil.sprite.impact, level.devil.sprite.fireballs]
+    for group in groups:
+        for sprite in group.sprites():
+            values += (sprite.rect.x, sprite.rect.y)
+    return zlib.crc32(array('i', values).tobytes(), previous)
+
+
+def _writeVarint(data, value):
+    """Append an unsigned integer to a bytearray, seven bits per byte."""
+    while value > 0x7F:
+        data.append(value & 0x7F | 0x80)
+        value >>= 7
+    data.append(value)
+
+
+def _readVarints(data):
+    """Yield the unsigned integers encoded in a byte string."""
+    value = 0
+    shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            yield value
+            value = 0
+            shift = 0
+
+
+def _hashes(data):
+    """Return stored hashes as bytes in the little-endian file layout."""
+    hashes = array('I', data)
+    if sys.byteorder != 'little':
+        hashes.byteswap()
+    return hashes.tobytes()
+
+
+class Recorder:
+    """
+    Records the input and the state hashes of a level while it is played.
+
+    Attach it with level.recorder = Recorder(level.seed) before the first tick.
+
+    Args:
+        seed (int): The seed of the recorded level.
+        hashInterval (int): The number of ticks between two stored hashes, 1 to store one per tick.
+    """
+
+    def __init__(self, seed: int, hashInterval: int = 60):
+        self.seed = seed
+        self.hashInterval = hashInterval
+        self.ticks = 0
+        self.inputs = bytearray()
+        self.hashes = []
+        self.hash = 0
+        self._direction = None
+        self._changed = 0
+
+    def record(self, level):
+        """Record the input and the state of a level after one of its ticks."""
+        self.ticks = level.clock.ticks
+        if level.action and level.action != self._direction:
+            _writeVarint(self.inputs, (self.ticks - self._changed) << 2 | DIRECTIONS.index(level.action))
+            self._direction = level.action
+            self._changed = self.ticks
+        self.hash = stateHash(level, self.hash)
+        if not self.ticks % self.hashInterval:
+            self.hashes.append(self.hash)
+
+    def toBytes(self):
+        """Return the recording in the replay binary format."""
+        header = HEADER.pack(MAGIC, self.seed, self.ticks, self.hashInterval, self.hash, len(self.inputs),
+                             len(self.hashes))
+        return header + bytes(self.inputs) + _hashes(self.hashes)
+
+    def save(self, path):
+        """Write the recording to a replay file."""
+        with open(path, 'wb') as replayFile:
+            replayFile.write(self.toBytes())
+
+
+class Replay:
+    """
+    A recorded run, read back from the replay binary format.
+
+    Args:
+        data (bytes): The replay.
+
+    Attributes:
+        seed (int): The seed of the level.
+        ticks (int): The number of recorded ticks.
+        inputs (Dict[int, str]): Maps every tick where the direction changed to the new direction.
+        hashes (array): The chained state hash stored every hashInterval ticks.
+        finalHash (int): The chained state hash after the last tick.
+    """
+
+    def __init__(self, data):
+        magic, self.seed, self.ticks, self.hashInterval, self.finalHash, inputLength, hashCount = \
+            HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError('Not a replay')
+        offset = HEADER.size + inputLength
+        self.inputs = {}
+        tick = 0
+        for value in _readVarints(data[HEADER.size:offset]):
+            tick += value >> 2
+            self.inputs[tick] = DIRECTIONS[value & 3]
+        self.hashes = array('I')
+        self.hashes.frombytes(data[offset:offset + hashCount * 4])
+        if sys.byteorder != 'little':
+            self.hashes.byteswap()
+
+    @classmethod
+    def load(cls, path):
+        """Read a replay file."""
+        with open(path, 'rb') as replayFile:
+            return cls(replayFile.read())
+
+    def play(self, surface=None, level=None):
+        """
+        Re-simulate the recorded run headless and check it against the stored hashes.
+
+        Args:
+            surface (pygame.Surface): The surface the level is built on, a headless one if None.
+            level (CompiledLevel): The level that was recorded, the start level if None.
+
+        Returns:
+            int: The last tick of the first stretch of ticks whose hash differs from the recording, or None
+            if the whole run was reproduced.
+        """
+        game = Level(surface or headlessSurface(), 'original', level=level, controls=None, seed=self.seed)
+        current = 0
+        for tick in range(1, self.ticks + 1):
+            game.update(self.inputs.get(tick))
+            current = stateHash(game, current)
+            if not tick % self.hashInterval and self.hashes[tick // self.hashInterval - 1] != current:
+                return tick
+        if current != self.finalHash:
+            return self.ticks
+        return None
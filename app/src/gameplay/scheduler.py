@@ -0,0 +1,157 @@
+"""
+This module contains the Scheduler class, the timers of a level on its simulation clock.
+
+Power-ups, boss screens, ghost spawns, impact points and fireballs register a callback that fires
+once their time is up, instead of comparing the clock against a start time every frame. The timers
+are kept in a heap ordered by the tick they are due on, so a tick only looks at the front of the
+heap and costs the same however many timers are pending. Timers count simulation ticks, so they
+hold still whenever the level is paused or not stepped at all.
+"""
+
+import heapq
+import itertools
+import math
+
+
+class Timer:
+    """
+    A callback waiting in a scheduler.
+
+    Attributes:
+        due (int): The tick the timer fires on, or None if it never fires.
+        interval (float): The seconds between two calls of a repeating timer, or None if it fires once.
+        active (bool): Whether the timer is still waiting to fire.
+    """
+
+    __slots__ = ('scheduler', 'due', 'callback', 'args', 'interval', 'active')
+
+    def __init__(self, scheduler, callback, args, interval=None):
+        self.scheduler = scheduler
+        self.due = None
+        self.callback = callback
+        self.args = args
+        self.interval = interval
+        self.active = True
+
+    def cancel(self):
+        """Stop the timer from firing, if it has not already."""
+        if self.active:
+            self.active = False
+            self.scheduler._cancelled(self)
+
+
+class Scheduler:
+    """
+    Callbacks fired on the tick of a simulation clock they are due on.
+
+    Args:
+        clock (SimulationClock): The clock the delays are measured on.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self._heap = []
+        self._order = itertools.count()
+        self._stale = 0
+
+    def __len__(self):
+        return len(self._heap) - self._stale
+
+    def dueTick(self, delay: float, start: int = None):
+        """
+        Return the first tick more than a number of seconds after another one.
+
+        Args:
+            delay (float): The seconds to wait.
+            start (int): The tick to wait from, the current one if None.
+
+        Returns:
+            int: The tick, or None if the delay is infinite.
+        """
+        if math.isinf(delay):
+            return None
+        rate = self.clock.rate
+        start = self.clock.ticks if start is None else start
+        origin = start / rate
+        due = max(start + int(delay * rate), start)
+        while due / rate - origin <= delay:
+            due += 1
+        while due - 1 > start and (due - 1) / rate - origin > delay:
+            due -= 1
+        return due
+
+    def after(self, delay: float, callback, *args):
+        """
+        Call a function once, on the first tick more than a number of seconds from now.
+
+        Args:
+            delay (float): The seconds to wait; an infinite delay never fires.
+            callback (Callable): The function.
+            *args: The arguments the function is called with.
+
+        Returns:
+            Timer: The timer, which can be cancelled.
+        """
+        timer = Timer(self, callback, args)
+        self._push(timer, self.dueTick(delay))
+        return timer
+
+    def every(self, interval: float, callback, *args, delay: float = None):
+        """
+        Call a function repeatedly, every time a number of seconds went by since the last call.
+
+        Args:
+            interval (float): The seconds between two calls.
+            callback (Callable): The function.
+            *args: The arguments the function is called with.
+            delay (float): The seconds before the first call, the interval if None.
+
+        Returns:
+            Timer: The timer, which can be cancelled.
+        """
+        timer = Timer(self, callback, args, interval)
+        self._push(timer, self.dueTick(interval if delay is None else delay))
+        return timer
+
+    def cancel(self, timer):
+        """Cancel a timer, doing nothing if it is None."""
+        if timer is not None:
+            timer.cancel()
+
+    def _push(self, timer, due):
+        """Put a timer in the heap, unless it never fires."""
+        timer.due = due
+        if due is not None:
+            heapq.heappush(self._heap, (due, next(self._order), timer))
+
+    def _cancelled(self, timer):
+        """Count a cancelled timer left in the heap, dropping them all once they are half of it."""
+        if timer.due is None:
+            return
+        self._stale += 1
+        if self._stale > 32 and self._stale * 2 > len(self._heap):
+            self._heap = [entry for entry in self._heap if entry[2].active]
+            heapq.heapify(self._heap)
+            self._stale = 0
+
+    def run(self):
+        """Fire every timer due on the current tick of the clock, in the order they were registered."""
+        heap = self._heap
+        ticks = self.clock.ticks
+        while heap and heap[0][0] <= ticks:
+            timer = heapq.heappop(heap)[2]
+            if not timer.active:
+                self._stale -= 1
+                continue
+            if timer.interval is None:
+                timer.active = False
+            else:
+                self._push(timer, self.dueTick(timer.interval, ticks))
+            timer.callback(*timer.args)
+
+    def clear(self):
+        """Cancel every timer."""
+        for entry in self._heap:
+            entry[2].active = False
+        self._heap = []
+        self._stale = 0
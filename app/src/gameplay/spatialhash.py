@@ -0,0 +1,180 @@
+"""
+This module contains the SpatialHash class, the broadphase every dynamic collision of a level goes through.
+
+Sprites are filed in buckets keyed by the tiles their rectangles cover. A query only looks at the
+sprites in the buckets under the queried rectangle, so testing the player against a group costs
+the same whether the group holds four ghosts or four hundred. Groups built on a hash file their
+sprites when they are added and drop them when they are removed or killed, and sprites that move
+are refiled only when the tiles they cover change.
+"""
+
+import pygame
+
+from app.src.settings.settings import tile_size
+
+
+class SpatialHash:
+    """
+    Buckets of sprites keyed by (column, row) tile.
+
+    Every sprite is filed by at most one group of a hash.
+
+    Args:
+        size (int): The size of a tile in pixels.
+    """
+
+    def __init__(self, size: int = tile_size):
+        self.size = size
+        self._buckets = {}
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _cells(self, rect):
+        """Return the tiles a rectangle covers."""
+        size = self.size
+        left = rect.left // size
+        top = rect.top // size
+        right = (rect.right - 1) // size
+        bottom = (rect.bottom - 1) // size
+        if left == right and top == bottom:
+            return ((left, top),)
+        return tuple((col, row) for row in range(top, bottom + 1) for col in range(left, right + 1))
+
+    def insert(self, sprite, group):
+        """
+        File a sprite under the tiles its rectangle covers.
+
+        Args:
+            sprite (pygame.sprite.Sprite): The sprite.
+            group (pygame.sprite.AbstractGroup): The group the sprite is filed for.
+        """
+        self.remove(sprite)
+        self._file(sprite, group, self._cells(sprite.rect))
+
+    def _file(self, sprite, group, cells):
+        """Put a sprite in the buckets of some tiles."""
+        self._entries[sprite] = (group, cells)
+        buckets = self._buckets
+        for cell in cells:
+            bucket = buckets.get(cell)
+            if bucket is None:
+                buckets[cell] = {sprite: group}
+            else:
+                bucket[sprite] = group
+
+    def remove(self, sprite):
+        """Take a sprite out of the hash, if it is filed."""
+        entry = self._entries.pop(sprite, None)
+        if entry is None:
+            return
+        buckets = self._buckets
+        for cell in entry[1]:
+            bucket = buckets[cell]
+            del bucket[sprite]
+            if not bucket:
+                del buckets[cell]
+
+    def move(self, sprite):
+        """Refile a sprite whose rectangle may have moved, touching the buckets only if its tiles changed."""
+        entry = self._entries.get(sprite)
+        if entry is None:
+            return
+        cells = self._cells(sprite.rect)
+        if cells == entry[1]:
+            return
+        self.remove(sprite)
+        self._file(sprite, entry[0], cells)
+
+    def refresh(self, group):
+        """Refile every sprite of a group that moved."""
+        move = self.move
+        for sprite in group.sprites():
+            move(sprite)
+
+    def collide(self, rect, group, dokill: bool = False):
+        """
+        Return the sprites of a group whose rectangles overlap a rectangle.
+
+        Args:
+            rect (pygame.Rect): The rectangle in pixels, usually the player's.
+            group (pygame.sprite.AbstractGroup): The group to test against.
+            dokill (bool): Whether to kill the sprites found.
+
+        Returns:
+            List[pygame.sprite.Sprite]: The overlapping sprites.
+        """
+        found = {}
+        buckets = self._buckets
+        for cell in self._cells(rect):
+            bucket = buckets.get(cell)
+            if bucket:
+                for sprite, owner in bucket.items():
+                    if owner is group and sprite not in found and rect.colliderect(sprite.rect):
+                        found[sprite] = None
+        if dokill:
+            for sprite in found:
+                sprite.kill()
+        return list(found)
+
+    def clear(self):
+        """Take every sprite out of the hash."""
+        self._buckets.clear()
+        self._entries.clear()
+
+
+class HashedGroup(pygame.sprite.Group):
+    """
+    A sprite group that files its sprites in a spatial hash while they belong to it.
+
+    Args:
+        broadphase (SpatialHash): The hash the sprites are filed in.
+        *sprites: The sprites to add.
+    """
+
+    def __init__(self, broadphase, *sprites):
+        self.broadphase = broadphase
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self.broadphase.insert(sprite, self)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.broadphase.remove(sprite)
+
+    def collide(self, rect):
+        """Return the sprites of the group overlapping a rectangle, found through the hash."""
+        return self.broadphase.collide(rect, self)
+
+
+class HashedGroupSingle(pygame.sprite.GroupSingle):
+    """
+    A single-sprite group that files its sprite in a spatial hash while it belongs to it.
+
+    Args:
+        broadphase (SpatialHash): The hash the sprite is filed in.
+        sprite (pygame.sprite.Sprite): The sprite to add.
+    """
+
+    def __init__(self, broadphase, sprite=None):
+        self.broadphase = broadphase
+        super().__init__(sprite)
+
+    def add_internal(self, sprite, layer=None):
+        # GroupSingle drops the sprite it replaces without always going through remove_internal
+        current = self.sprite
+        if current is not None and current is not sprite:
+            self.broadphase.remove(current)
+        super().add_internal(sprite, layer)
+        self.broadphase.insert(sprite, self)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.broadphase.remove(sprite)
+
+    def collide(self, rect):
+        """Return the sprites of the group overlapping a rectangle, found through the hash."""
+        return self.broadphase.collide(rect, self)
@@ -0,0 +1,127 @@
+"""
+This module contains the TileLayer class, the walls and pellets of a level pre-rendered in square chunks.
+
+The map is cut into chunks of CHUNK_TILES tiles per side, and a chunk is only baked, with its walls
+and the pellets left on it, the first time it comes into view. Composing the background of a frame
+blits the few chunks the camera sees, so its cost follows the size of the screen and not the size
+of the map. The most recently seen chunks are kept, and the others are dropped and baked again
+from the wall layer and the pellet field if they come back into view.
+"""
+
+from collections import OrderedDict
+
+import pygame
+
+from app.src.settings.additional import assets
+from app.src.settings.settings import tile_size
+
+# the number of tiles on a side of a chunk
+CHUNK_TILES = 8
+# the number of baked chunks kept, enough for several screens
+MAX_CHUNKS = 64
+
+
+class TileLayer:
+    """
+    The static layer of a level, baked chunk by chunk.
+
+    Args:
+        level (CompiledLevel): The level whose walls are drawn.
+        pellets (PelletField): The pellets drawn on top of the walls.
+        size (int): The size of a tile in pixels.
+        chunkTiles (int): The number of tiles on a side of a chunk.
+        maxChunks (int): The number of baked chunks kept.
+
+    Attributes:
+        baked (int): The number of chunks baked so far.
+    """
+
+    def __init__(self, level, pellets, size: int = tile_size, chunkTiles: int = CHUNK_TILES,
+                 maxChunks: int = MAX_CHUNKS):
+        self.level = level
+        self.pellets = pellets
+        self.size = size
+        self.chunkTiles = chunkTiles
+        self.chunkSize = size * chunkTiles
+        self.maxChunks = maxChunks
+        self.tiles = assets.tiles('../images/tiles set.png')
+        self.baked = 0
+        self._chunks = OrderedDict()
+
+    def __len__(self):
+        return len(self._chunks)
+
+    def invalidate(self):
+        """Drop every baked chunk, e.g. after the pellets changed all over the map."""
+        self._chunks.clear()
+
+    def _bake(self, chunkX, chunkY):
+        """Draw the walls and the pellets of a chunk on a new surface."""
+        chunkSize = self.chunkSize
+        surface = pygame.Surface((chunkSize, chunkSize)).convert()
+        surface.fill('black')
+        level = self.level
+        size = self.size
+        left = chunkX * self.chunkTiles
+        top = chunkY * self.chunkTiles
+        blits = []
+        for row in range(top, min(top + self.chunkTiles, level.height)):
+            for col in range(left, min(left + self.chunkTiles, level.width)):
+                value = level.tileAt(col, row)
+                if value != -1:
+                    blits.append((self.tiles[value], ((col - left) * size, (row - top) * size)))
+        surface.blits(blits, False)
+        self.pellets.draw(surface, pygame.Rect(chunkX * chunkSize, chunkY * chunkSize, chunkSize, chunkSize))
+        self.baked += 1
+        return surface
+
+    def chunk(self, chunkX, chunkY):
+        """
+        Return the surface of a chunk, baking it if it is not kept.
+
+        Args:
+            chunkX (int): The column of the chunk.
+            chunkY (int): The row of the chunk.
+
+        Returns:
+            pygame.Surface: The chunk.
+        """
+        key = (chunkX, chunkY)
+        surface = self._chunks.get(key)
+        if surface is None:
+            surface = self._chunks[key] = self._bake(chunkX, chunkY)
+            if len(self._chunks) > self.maxChunks:
+                self._chunks.popitem(last=False)
+        else:
+            self._chunks.move_to_end(key)
+        return surface
+
+    def _covered(self, rect):
+        """Return the chunks a rectangle of the map covers, inside the map."""
+        chunkSize = self.chunkSize
+        columns = -(-self.level.width // self.chunkTiles)
+        rows = -(-self.level.height // self.chunkTiles)
+        return [(chunkX, chunkY)
+                for chunkY in range(max(rect.top // chunkSize, 0), min((rect.bottom - 1) // chunkSize + 1, rows))
+                for chunkX in range(max(rect.left // chunkSize, 0), min((rect.right - 1) // chunkSize + 1, columns))]
+
+    def compose(self, surface, view):
+        """
+        Draw the area of the map in view on a surface, baking the chunks that come into view.
+
+        Args:
+            surface (pygame.Surface): The surface, as big as the view.
+            view (pygame.Rect): The area of the map shown.
+        """
+        surface.fill('black')
+        chunkSize = self.chunkSize
+        surface.blits([(self.chunk(chunkX, chunkY), (chunkX * chunkSize - view.x, chunkY * chunkSize - view.y))
+                       for chunkX, chunkY in self._covered(view)], False)
+
+    def erase(self, rect):
+        """Paint an area of the map black in the chunks that are kept, e.g. where a pellet was collected."""
+        chunkSize = self.chunkSize
+        for chunkX, chunkY in self._covered(rect):
+            surface = self._chunks.get((chunkX, chunkY))
+            if surface is not None:
+                surface.fill('black', rect.move(-chunkX * chunkSize, -chunkY * chunkSize))
@@ -4,7 +4,9 @@ This module contains the UI class that displays the coin and coin amount on the
 
 import pygame
 
-from app.src.settings.settings import tile_size
+from app.src.settings.additional import assets
+from app.src.settings.settings import tile_size, gameFont
+from app.src.settings.text import text
 
 
 class UI:
@@ -22,10 +24,9 @@ class UI:
         self.display = surface
 
         # coin
-        self.coin = pygame.image.load('../images/PacDot.png').convert_alpha()
+        self.coin = assets.image('../images/PacDot.png')
         self.coin = pygame.transform.scale(self.coin, (tile_size * 2, tile_size * 2))
         self.coinRect = self.coin.get_rect(topleft=(0, 230))
-        self.font = pygame.font.Font('../fonts/Retro Gaming.ttf', 20)
 
     def showCoin(self, amount):
         """
@@ -33,8 +34,8 @@ class UI:
 
         Args:
             amount (int): The amount of coins to display.
+
+        Returns:
+            List[pygame.Rect]: The areas of the surface that were drawn on.
         """
-        self.display.blit(self.coin, self.coinRect)
-        coinAmountSurface = self.font.render(str(amount), False, 'white')
-        coinAmountRect = coinAmountSurface.get_rect(topleft=(50, 250))
-        self.display.blit(coinAmountSurface, coinAmountRect)
+        return [self.display.blit(self.coin, self.coinRect), text.drawNumber(self.display, amount, (50, 250), gameFont, 20)]
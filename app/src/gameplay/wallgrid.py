@@ -0,0 +1,141 @@
+"""
+This module contains the WallGrid class, a tile-indexed occupancy grid of the walls of a level.
+
+The grid answers the questions the movement code used to answer by testing a rectangle against
+every wall sprite, by only looking at the few tiles the rectangle covers.
+"""
+
+import pygame
+
+from app.src.settings.settings import tile_size
+
+# the tunnel ends, in pixels past the left edge of the map and short of its right edge, where a sprite
+# leaves the map on one side and comes back on the other
+TUNNEL_OVERHANG = 25
+TUNNEL_INSET = 3
+
+
+class WallGrid:
+    """
+    A tile-indexed occupancy grid built once from the wall layer of a compiled level.
+
+    Args:
+        level (CompiledLevel): The level to build the grid from.
+        size (int): The size of a tile in pixels.
+
+    Attributes:
+        tunnelLeft (int): The x in pixels a sprite leaving the map on the left reappears at, and past which
+            it leaves on that side.
+        tunnelRight (int): The same on the right side of the map.
+    """
+
+    def __init__(self, level, size: int = tile_size):
+        self.width = level.width
+        self.height = level.height
+        self.size = size
+        self.mask = bytes(level.wallMask)
+        self.tunnelLeft = -TUNNEL_OVERHANG
+        self.tunnelRight = self.width * size - TUNNEL_INSET
+
+    def isWall(self, col, row):
+        """Return whether a tile is a wall. Tiles outside the map are open, which is what the tunnels rely on."""
+        if 0 <= col < self.width and 0 <= row < self.height:
+            return self.mask[row * self.width + col] == 1
+        return False
+
+    def _span(self, start, length):
+        """Return the range of tiles covered by a span of pixels."""
+        return range(start // self.size, (start + length - 1) // self.size + 1)
+
+    def rectBlocked(self, rect):
+        """
+        Return whether a rectangle overlaps any wall.
+
+        Args:
+            rect (pygame.Rect): The rectangle in pixels.
+
+        Returns:
+            bool: True if any tile under the rectangle is a wall.
+        """
+        for row in self._span(rect.y, rect.height):
+            for col in self._span(rect.x, rect.width):
+                if self.isWall(col, row):
+                    return True
+        return False
+
+    def pointBlocked(self, x, y):
+        """Return whether a pixel lies inside a wall."""
+        return self.isWall(x // self.size, y // self.size)
+
+    def segmentBlocked(self, start, end):
+        """
+        Return whether an axis-aligned segment crosses a wall.
+
+        The segment is at most a few pixels long, so testing both ends covers every tile it touches.
+
+        Args:
+            start (Tuple[int, int]): The first end of the segment.
+            end (Tuple[int, int]): The second end of the segment.
+
+        Returns:
+            bool: True if the segment touches a wall tile.
+        """
+        return self.pointBlocked(int(start[0]), int(start[1])) or self.pointBlocked(int(end[0]), int(end[1]))
+
+    def possibleMoves(self, rect):
+        """
+        Return which neighbouring positions of a rectangle are free of walls.
+
+        Args:
+            rect (pygame.Rect): The rectangle in pixels.
+
+        Returns:
+            List[int]: 1 if the rectangle moved one tile up, right, down or left would not overlap a wall, else 0.
+        """
+        return [
+            0 if self.rectBlocked(rect.move(0, -self.size)) else 1,
+            0 if self.rectBlocked(rect.move(self.size, 0)) else 1,
+            0 if self.rectBlocked(rect.move(0, self.size)) else 1,
+            0 if self.rectBlocked(rect.move(-self.size, 0)) else 1,
+        ]
+
+    def wallsNear(self, rect, margin: int = 2):
+        """
+        Return the rectangles of the walls around a rectangle in row-major order.
+
+        Args:
+            rect (pygame.Rect): The rectangle in pixels.
+            margin (int): The number of extra tiles to include on every side.
+
+        Returns:
+            List[pygame.Rect]: The wall rectangles.
+        """
+        rows = self._span(rect.y, rect.height)
+        cols = self._span(rect.x, rect.width)
+        walls = []
+        for row in range(rows.start - margin, rows.stop + margin):
+            for col in range(cols.start - margin, cols.stop + margin):
+                if self.isWall(col, row):
+                    walls.append(pygame.Rect(col * self.size, row * self.size, self.size, self.size))
+        return walls
+
+    def pushOut(self, rect, direction):
+        """
+        Move a rectangle out of the walls it overlaps, back against its direction of travel.
+
+        Args:
+            rect (pygame.Rect): The rectangle to move, changed in place.
+            direction (pygame.math.Vector2): The direction the rectangle is travelling in.
+        """
+        if not self.rectBlocked(rect):
+            return
+        for wall in self.wallsNear(rect):
+            if wall.colliderect(rect):
+                if direction.x < 0:
+                    rect.left = wall.right
+                elif direction.x > 0:
+                    rect.right = wall.left
+                elif direction.y < 0:
+                    rect.top = wall.bottom
+                elif direction.y > 0:
+                    rect.bottom = wall.top
@@ -2,12 +2,17 @@
 This module implements the main menu of the game.
 """
 
-import os
 import pygame
 
+from app.src.gameplay.clock import SimulationClock
 from app.src.gameplay.level import Level
+from app.src.gameplay.levelpool import LevelPool
+from app.src.gameplay.replay import Recorder
 from app.src.menu.button import Button
-from app.src.settings.settings import tile_size
+from app.src.settings.additional import assets
+from app.src.settings.profiler import profiler
+from app.src.settings.settings import tile_size, lastReplay
+from app.src.settings.skins import skins as skinRegistry
 from app.src.settings.tiles import AnimatedTile
 
 
@@ -29,9 +34,23 @@ class Menu:
         self.win = False
         self.skinShop = Skins(self.display)
         self.skinClick = False
-        self.startButton = Button(pygame.image.load('../images/buttons/start_btn.png').convert_alpha(), 234, 100)
-        self.exitButton = Button(pygame.image.load('../images/buttons/exit_btn.png').convert_alpha(), 234, 200)
-        self.skinsButton = Button(pygame.image.load('../images/buttons/skins_btn.png').convert_alpha(), 234, 300)
+        self.startButton = Button(assets.image('../images/buttons/start_btn.png'), 234, 100)
+        self.exitButton = Button(assets.image('../images/buttons/exit_btn.png'), 234, 200)
+        self.skinsButton = Button(assets.image('../images/buttons/skins_btn.png'), 234, 300)
+        self.levels = LevelPool(self.display)
+        profiler.watch(self, ('run', 'newLevel'))
+
+    def reset(self):
+        """
+        Go back to the menu after a game, keeping the level to start the next game on.
+        """
+        if self.level:
+            self.levels.release(self.level)
+        self.level = None
+        self.start = False
+        self.win = False
+        self.skinClick = False
+        self.skinShop.clicked = False
 
     def run(self):
         """
@@ -44,13 +63,12 @@ class Menu:
             return self.level.run()
         if self.startButton.update(self.display) and not self.start and not self.skinClick:
             self.start = True
-            self.level = Level(self.display, self.skin)
+            self.level = self.newLevel()
         elif self.exitButton.update(self.display) and not self.start and not self.skinClick:
             pygame.quit()
         elif self.skinsButton.update(self.display) and not self.start and not self.skinClick:
             self.skinClick = True
         elif self.start and not self.skinClick:
-            self.display.fill('black')
             self.level.run()
         elif self.skinClick and not self.start:
             self.display.fill((113, 116, 168))
@@ -59,9 +77,42 @@ class Menu:
                 self.skin = self.skinShop.getSelected()
                 self.skinClick = False
                 self.start = True
-                self.level = Level(self.display, self.skin)
-        if self.level and self.level.win:
+                self.level = self.newLevel()
+        if self.level and self.level.win and not self.win:
             self.win = True
+            if self.level.recorder:
+                self.level.recorder.save(lastReplay)
+
+    def newLevel(self):
+        """
+        Create a level for the selected skin that records its input.
+
+        Returns:
+            Level: The level, saved as a replay to lastReplay when the game ends.
+        """
+        level = self.levels.acquire(self.skin)
+        level.recorder = Recorder(level.seed)
+        return level
+
+    def levelRunning(self):
+        """
+        Check whether a level owns the screen.
+
+        Returns:
+            bool: True once a level has been started, as it then redraws its own background.
+        """
+        return bool(self.start and not self.skinClick and self.level)
+
+    def updateRects(self):
+        """
+        Get the areas of the screen changed by the last frame.
+
+        Returns:
+            List[pygame.Rect]: The changed areas, or None if the whole screen has to be updated.
+        """
+        if self.levelRunning():
+            return self.level.dirtyRects
+        return None
 
 
 class ShowCase(AnimatedTile, Button):
@@ -69,7 +120,7 @@ class ShowCase(AnimatedTile, Button):
     A button that displays an animated tile and returns the name of the selected skin when clicked.
     """
 
-    def __init__(self, size, x, y, title):
+    def __init__(self, size, x, y, title, clock=None):
         """
         Initialize the button.
 
@@ -78,24 +129,15 @@ class ShowCase(AnimatedTile, Button):
             x (int): The x-coordinate of the button.
             y (int): The y-coordinate of the button.
             title (str): The title of the skin.
+            clock (SimulationClock): The clock the animation follows.
         """
-        AnimatedTile.__init__(self, size, x, y, '../images/pacman/' + title)
+        AnimatedTile.__init__(self, size, x, y, skinRegistry.path(title), clock, (tile_size * 2, tile_size * 2))
         Button.__init__(self, self.image, x, y)
         self.name = title
         self.clicked = False
         self.rect = self.image.get_rect(topleft=(x, y))
         self.selected = False
 
-    def animation(self):
-        """
-        Animate the tile.
-        """
-        self.frameIndex += 0.15
-        if self.frameIndex >= len(self.frames):
-            self.frameIndex = 0
-        self.image = self.frames[int(self.frameIndex)]
-        self.image = pygame.transform.scale(self.image, (tile_size * 2, tile_size * 2))
-
     def click(self):
         """
         Handle the click event.
@@ -126,14 +168,22 @@ class Skins:
         """
         self.display = surface
         self.clicked = False
-        x = tile_size * 4
-        y = tile_size * 4
         self.selected = 'original'
-        self.skins = pygame.sprite.Group()
-        for skins in next(os.walk('../images/pacman/'))[1]:
-            sprite = ShowCase(tile_size, x, y, skins)
-            x += tile_size * 4
-            self.skins.add(sprite)
+        self.clock = SimulationClock()
+        self._skins = None
+        profiler.watch(self, ('run',))
+
+    @property
+    def skins(self):
+        """pygame.sprite.Group: The thumbnails of every skin, built the first time the shop is shown."""
+        if self._skins is None:
+            self._skins = pygame.sprite.Group()
+            x = tile_size * 4
+            y = tile_size * 4
+            for name in skinRegistry.names():
+                self._skins.add(ShowCase(tile_size, x, y, name, self.clock))
+                x += tile_size * 4
+        return self._skins
 
     def drawGroup(self):
         """
@@ -174,5 +224,6 @@ class Skins:
             None
         """
         self.drawGroup()
+        self.clock.advance()
         self.skins.update()
         self.skins.draw(self.display)
@@ -2,7 +2,8 @@
 This module defines the Screen class, which displays a title and description for a boss level in a Pygame window.
 """
 
-import pygame
+from app.src.settings.settings import gameFont
+from app.src.settings.text import text
 
 class Screen:
     """
@@ -12,8 +13,6 @@ class Screen:
         bossLevel (int): The level of the boss to display. Can be 1 or 2.
 
     Attributes:
-        titleFont (pygame.font.Font): The font used for the title.
-        descriptionFont (pygame.font.Font): The font used for the description.
         title (pygame.Surface): The rendered title text.
         titleRect (pygame.Rect): The rectangle that defines the position and size of the title text.
         description (pygame.Surface): The rendered description text.
@@ -22,21 +21,19 @@ class Screen:
 
     def __init__(self, bossLevel, score: int = None):
         """Initializes the Screen object with the given boss level."""
-        self.titleFont = pygame.font.Font('../fonts/Retro Gaming.ttf', 30)
-        self.descriptionFont = pygame.font.Font('../fonts/Retro Gaming.ttf', 20)
         if bossLevel == 1:
-            self.title = self.titleFont.render('The Spiritual King', False, 'white')
+            self.title = text.render(gameFont, 30, 'The Spiritual King')
             self.titleRect = self.title.get_rect(topleft=(160, 220))
-            self.description = self.descriptionFont.render('Use power-ups to kill the boss', False, 'white')
+            self.description = text.render(gameFont, 20, 'Use power-ups to kill the boss')
             self.descriptionRect = self.description.get_rect(topleft=(130, 320))
         elif bossLevel == 2:
-            self.title = self.titleFont.render('The Devil', False, 'white')
+            self.title = text.render(gameFont, 30, 'The Devil')
             self.titleRect = self.title.get_rect(topleft=(230, 220))
-            self.description = self.descriptionFont.render("Get close to the boss to kill him", False, 'white')
+            self.description = text.render(gameFont, 20, 'Get close to the boss to kill him')
             self.descriptionRect = self.description.get_rect(topleft=(130, 320))
         elif bossLevel == 3:
-            self.title = self.titleFont.render('WIN', False, 'white')
-            self.description = self.titleFont.render(f'Score: {score}', False, 'white')
+            self.title = text.render(gameFont, 30, 'WIN')
+            self.description = text.render(gameFont, 30, f'Score: {score}')
             self.titleRect = self.title.get_rect(topleft=(270, 220))
             self.descriptionRect = self.description.get_rect(topleft=(220, 270))
 
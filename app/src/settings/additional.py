@@ -1,8 +1,10 @@
 """Module containing additional utility functions for the game."""
 
+import io
 import os
 from csv import reader
 
+import pygame.font
 import pygame.image
 
 from app.src.settings.settings import tile_size
@@ -66,3 +68,244 @@ def importFolder(path):
             image = pygame.image.load(full_path).convert_alpha()
             surface_list.append(image)
     return surface_list
+
+
+class AssetManager:
+    """
+    A process-wide cache of loaded and converted images, fonts and levels.
+
+    Every image, sliced tileset and animation folder is decoded once and the
+    same surfaces are handed out to every caller afterwards, so the returned
+    surfaces and sequences must be treated as read-only. When an asset pack is
+    open, assets are built from the memory-mapped pack instead of the loose files.
+
+    Attributes:
+        hits (int): The number of requests answered from the cache.
+        misses (int): The number of requests that had to load from disk.
+    """
+
+    def __init__(self):
+        self._cache = {}
+        self.pack = None
+        self.hits = 0
+        self.misses = 0
+
+    def openPack(self, path):
+        """
+        Serve assets from a baked asset pack.
+
+        Args:
+            path (str): The path to the pack file.
+
+        Returns:
+            bool: Whether the pack was found and opened.
+        """
+        from app.src.settings.assetpack import AssetPack
+
+        if not os.path.isfile(path):
+            return False
+        self.closePack()
+        self.pack = AssetPack(path)
+        return True
+
+    def closePack(self):
+        """Stop serving assets from the asset pack and drop everything that was built from it."""
+        if self.pack:
+            self._cache.clear()
+            self.pack.close()
+            self.pack = None
+
+    def _get(self, kind, path, loader):
+        """Return a cached asset, loading it on the first request."""
+        key = (kind, os.path.normpath(path))
+        if key in self._cache:
+            self.hits += 1
+            return self._cache[key]
+        self.misses += 1
+        asset = loader(path)
+        self._cache[key] = asset
+        return asset
+
+    def image(self, path):
+        """
+        Return a shared converted image.
+
+        Args:
+            path (str): The path to the image file.
+
+        Returns:
+            pygame.Surface: The converted image.
+        """
+        return self._get('image', path, self._loadImage)
+
+    def _loadImage(self, path):
+        """Build an image from the pack or decode it from disk."""
+        if self.pack and self.pack.hasImage(path):
+            return self.pack.image(path)
+        return pygame.image.load(path).convert_alpha()
+
+    def _loadTiles(self, path):
+        """Slice a tileset, sharing the pixels of the packed image when possible."""
+        if self.pack and self.pack.hasImage(path):
+            surface = self.pack.image(path)
+            return tuple(surface.subsurface(pygame.Rect(x, y, tile_size, tile_size))
+                         for y in range(0, surface.get_height() - tile_size + 1, tile_size)
+                         for x in range(0, surface.get_width() - tile_size + 1, tile_size))
+        return tuple(slicingImage(path))
+
+    def _loadFolder(self, path):
+        """Load the frames of a folder from the pack or from disk."""
+        files = self.pack.folder(path) if self.pack else None
+        if files is None:
+            return tuple(importFolder(path))
+        return tuple(self.image(file) for file in files)
+
+    def tiles(self, path):
+        """
+        Return a shared tileset sliced into tiles.
+
+        Args:
+            path (str): The path to the tileset image.
+
+        Returns:
+            tuple: The tiles as Pygame surfaces.
+        """
+        return self._get('tiles', path, self._loadTiles)
+
+    def folder(self, path):
+        """
+        Return the shared frames of an animation folder.
+
+        Args:
+            path (str): The path to the folder.
+
+        Returns:
+            tuple: The frames as Pygame surfaces.
+        """
+        return self._get('folder', path, self._loadFolder)
+
+    def clip(self, path, size=None):
+        """
+        Return the shared animation clip of a folder, with its frames prepared in every orientation.
+
+        Args:
+            path (str): The path to the folder.
+            size (Tuple[int, int]): The size to scale the frames to, or None to keep their size.
+
+        Returns:
+            Clip: The clip.
+        """
+        from app.src.settings.animation import Clip
+
+        return self._get(('clip', size), path, lambda folder: Clip(self.folder(folder), size))
+
+    def font(self, path, size):
+        """
+        Return a shared font.
+
+        Args:
+            path (str): The path to the font file.
+            size (int): The size of the font.
+
+        Returns:
+            pygame.font.Font: The font.
+        """
+        return self._get(('font', size), path, lambda file: self._loadFont(file, size))
+
+    def _loadFont(self, path, size):
+        """Open a font from the pack or from disk."""
+        data = self.pack.font(path) if self.pack else None
+        if data is None:
+            return pygame.font.Font(path, size)
+        return pygame.font.Font(io.BytesIO(data), size)
+
+    def layout(self, path):
+        """
+        Return a shared level layout.
+
+        Args:
+            path (str): The path to the CSV file.
+
+        Returns:
+            list: The layout of the terrain as a list of lists of strings.
+        """
+        return self._get('layout', path, self._loadLayout)
+
+    def level(self, path, sources=None):
+        """
+        Return a shared compiled level.
+
+        Args:
+            path (str): The path to the compiled level file.
+            sources (dict): The per-layer CSV files to compile from when the compiled file is missing.
+
+        Returns:
+            CompiledLevel: The level.
+        """
+        return self._get('level', path, lambda file: self._loadLevel(file, sources))
+
+    def _loadLevel(self, path, sources):
+        """Read a compiled level from the pack or from disk, compiling it from its layers as a last resort."""
+        from app.src.settings.levelcompiler import CompiledLevel, compileLevel
+
+        data = self.pack.level(path) if self.pack else None
+        if data is None and os.path.isfile(path):
+            with open(path, 'rb') as levelFile:
+                data = levelFile.read()
+        if data is None:
+            return compileLevel(sources, self.layout)
+        return CompiledLevel.fromBytes(data)
+
+    def _loadLayout(self, path):
+        """Read a layout from the pack or parse it from disk."""
+        layout = self.pack.layout(path) if self.pack else None
+        if layout is None:
+            return csv_layout(path)
+        return layout
+
+    def preload(self, images=(), tilesets=(), folders=()):
+        """
+        Load assets ahead of time so later requests are cache hits.
+
+        Args:
+            images (Iterable[str]): Paths to single images.
+            tilesets (Iterable[str]): Paths to tileset images.
+            folders (Iterable[str]): Paths to animation folders.
+        """
+        for path in images:
+            self.image(path)
+        for path in tilesets:
+            self.tiles(path)
+        for path in folders:
+            self.folder(path)
+
+    def evict(self, path=None):
+        """
+        Drop cached assets so they are loaded again on the next request.
+
+        Args:
+            path (str): The path to evict. Evicts everything when omitted.
+        """
+        if path is None:
+            self._cache.clear()
+            return
+        path = os.path.normpath(path)
+        for key in [key for key in self._cache if key[1] == path]:
+            del self._cache[key]
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        Returns:
+            dict: The number of hits, misses and cached assets.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'cached': len(self._cache)}
+
+    def resetStats(self):
+        """Reset the hit and miss counters."""
+        self.hits = 0
+        self.misses = 0
+
+
+assets = AssetManager()
@@ -0,0 +1,218 @@
+"""
+Module for baking the game assets into a single indexed pack file and reading it back.
+
+The pack starts with a magic string and the length of a JSON index, followed by the index
+itself and the raw data blobs, each aligned to 64 bytes. Images are stored as BGRA pixel
+buffers, which is the pixel layout of surfaces converted with convert_alpha, so the runtime
+can memory-map the pack and build surfaces on top of it with pygame.image.frombuffer
+without copying or decoding anything.
+Fonts and compiled levels are stored as raw bytes and level layouts are stored already parsed
+inside the index.
+
+Run this module from the app/src directory to bake the pack:
+
+    python settings/assetpack.py
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+
+import pygame
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+
+from app.src.settings.additional import csv_layout
+from app.src.settings.settings import assetPack
+
+MAGIC = b'PACPACK1'
+HEADER = struct.Struct('<8sI')
+ALIGNMENT = 64
+
+
+def _dataStart(indexLength):
+    """Return the offset of the data section, which starts at the first aligned byte after the index."""
+    end = HEADER.size + indexLength
+    return end + (-end % ALIGNMENT)
+
+
+class AssetPack:
+    """
+    A read-only view of a baked asset pack.
+
+    Args:
+        path (str): The path to the pack file.
+
+    Attributes:
+        index (dict): The parsed index of the pack.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, indexLength = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            self._file.close()
+            raise ValueError(f'{path} is not an asset pack')
+        self.index = json.loads(bytes(self._map[HEADER.size:HEADER.size + indexLength]))
+        self._view = memoryview(self._map)[_dataStart(indexLength):]
+
+    def _blob(self, entry):
+        """Return a zero-copy view of a data blob."""
+        return self._view[entry['offset']:entry['offset'] + entry['length']]
+
+    def hasImage(self, path):
+        """Return whether the pack contains an image."""
+        return os.path.normpath(path) in self.index['images']
+
+    def image(self, path):
+        """
+        Return a surface that shares its pixels with the mapped pack.
+
+        Args:
+            path (str): The path of the original image file.
+
+        Returns:
+            pygame.Surface: The image.
+        """
+        entry = self.index['images'][os.path.normpath(path)]
+        return pygame.image.frombuffer(self._blob(entry), tuple(entry['size']), 'BGRA')
+
+    def folder(self, path):
+        """
+        Return the image paths of an animation folder in their original load order.
+
+        Args:
+            path (str): The path of the original folder.
+
+        Returns:
+            list: The image paths, or None if the folder is not in the pack.
+        """
+        return self.index['folders'].get(os.path.normpath(path))
+
+    def font(self, path):
+        """
+        Return the raw bytes of a font file.
+
+        Args:
+            path (str): The path of the original font file.
+
+        Returns:
+            bytes: The font data, or None if the font is not in the pack.
+        """
+        entry = self.index['fonts'].get(os.path.normpath(path))
+        return bytes(self._blob(entry)) if entry else None
+
+    def layout(self, path):
+        """
+        Return a parsed level layout.
+
+        Args:
+            path (str): The path of the original CSV file.
+
+        Returns:
+            list: The layout as a list of lists of strings, or None if it is not in the pack.
+        """
+        return self.index['layouts'].get(os.path.normpath(path))
+
+    def level(self, path):
+        """
+        Return the bytes of a compiled level.
+
+        Args:
+            path (str): The path of the original compiled level file.
+
+        Returns:
+            bytes: The compiled level, or None if it is not in the pack.
+        """
+        entry = self.index.get('levels', {}).get(os.path.normpath(path))
+        return bytes(self._blob(entry)) if entry else None
+
+    def close(self):
+        """
+        Release the mapping and the file handle.
+
+        Surfaces built from the pack keep the mapping alive, so while any of them are still
+        referenced the mapping is only unmapped once the last of them is garbage collected.
+        """
+        self._view = None
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+        self._file.close()
+
+
+def _files(directory, extension):
+    """Return the files with an extension below a directory, grouped by folder in os.walk order."""
+    folders = {}
+    for root, _, files in os.walk(directory):
+        for file in files:
+            if file.lower().endswith(extension):
+                folders.setdefault(os.path.normpath(root), []).append(os.path.normpath(os.path.join(root, file)))
+    return folders
+
+
+def bake(output=assetPack, images='../images', fonts='../fonts', levels='../levels'):
+    """
+    Bake every image, font, level layout and compiled level into a pack file.
+
+    Args:
+        output (str): The path of the pack to write.
+        images (str): The directory containing the images.
+        fonts (str): The directory containing the fonts.
+        levels (str): The directory containing the level CSV and compiled level files.
+
+    Returns:
+        dict: The index that was written.
+    """
+    index = {'images': {}, 'folders': {}, 'fonts': {}, 'layouts': {}, 'levels': {}}
+    blobs = []
+    offset = 0
+
+    def addBlob(data):
+        nonlocal offset
+        padding = -offset % ALIGNMENT
+        blobs.append(b'\0' * padding)
+        offset += padding
+        entry = {'offset': offset, 'length': len(data)}
+        blobs.append(data)
+        offset += len(data)
+        return entry
+
+    for folder, files in _files(images, '.png').items():
+        index['folders'][folder] = files
+        for file in files:
+            surface = pygame.image.load(file)
+            entry = addBlob(pygame.image.tobytes(surface, 'BGRA'))
+            entry['size'] = surface.get_size()
+            index['images'][file] = entry
+    for files in _files(fonts, '.ttf').values():
+        for file in files:
+            with open(file, 'rb') as fontFile:
+                index['fonts'][file] = addBlob(fontFile.read())
+    for files in _files(levels, '.csv').values():
+        for file in files:
+            index['layouts'][file] = csv_layout(file)
+    for files in _files(levels, '.lvl').values():
+        for file in files:
+            with open(file, 'rb') as levelFile:
+                index['levels'][file] = addBlob(levelFile.read())
+
+    encoded = json.dumps(index).encode('utf-8')
+    with open(output, 'wb') as packFile:
+        packFile.write(HEADER.pack(MAGIC, len(encoded)))
+        packFile.write(encoded)
+        packFile.write(b'\0' * (_dataStart(len(encoded)) - HEADER.size - len(encoded)))
+        for blob in blobs:
+            packFile.write(blob)
+    return index
+
+
+if __name__ == '__main__':
+    written = bake()
+    print(f"Baked {len(written['images'])} images, {len(written['fonts'])} fonts and "
+          f"{len(written['layouts'])} layouts into {assetPack}")
@@ -0,0 +1,187 @@
+"""
+Module for compiling the per-layer level CSV files into a single compact level.
+
+A compiled level keeps the wall layer as one typed grid of tile indices, where -1 marks an
+open cell, and every other layer as an entity-spawn table of (kind, column, row) entries.
+The wall mask and the open cells are derived once when the level is built.
+
+The binary format is a small header followed by the grid as little-endian int16 values and
+the spawn table as (kind, column, row) records, so a level is loaded with a single read.
+Run this module from the app/src directory to compile the start level:
+
+    python settings/levelcompiler.py
+"""
+
+import os
+import struct
+import sys
+from array import array
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+
+from app.src.settings.additional import csv_layout
+from app.src.settings.settings import startLevel, startLevelCompiled
+
+MAGIC = b'PACLVL01'
+HEADER = struct.Struct('<8sHHI')
+SPAWN = struct.Struct('<BHH')
+
+# the entity kinds of the spawn table; ghostHouse marks the tiles of the ghost house and devil the tile of the second boss
+KINDS = ('pacman', 'ghost', 'bossGhost', 'coin', 'BasicPower', 'cherry', 'speed', 'shield', 'ghostHouse', 'devil')
+
+
+class CompiledLevel:
+    """
+    A level with every layer merged into one compact representation.
+
+    Args:
+        width (int): The number of tiles in the X direction.
+        height (int): The number of tiles in the Y direction.
+        grid (array): The wall tile index of every cell in row-major order, -1 for open cells.
+        spawns (Iterable[Tuple[str, int, int]]): The entity-spawn table as (kind, column, row) entries.
+
+    Attributes:
+        wallMask (bytearray): 1 for every wall cell and 0 for every open cell, in row-major order.
+        openCells (Tuple[Tuple[int, int], ...]): The (column, row) of every open cell.
+    """
+
+    def __init__(self, width, height, grid, spawns):
+        self.width = width
+        self.height = height
+        self.grid = array('h', grid)
+        self.spawns = tuple(sorted(spawns, key=lambda spawn: (KINDS.index(spawn[0]), spawn[2], spawn[1])))
+        self.wallMask = bytearray(value != -1 for value in self.grid)
+        self.openCells = tuple((index % width, index // width)
+                               for index, wall in enumerate(self.wallMask) if not wall)
+        self._spawnsByKind = {kind: tuple((col, row) for spawnKind, col, row in self.spawns if spawnKind == kind)
+                              for kind in KINDS}
+
+    def tileAt(self, col, row):
+        """Return the wall tile index of a cell, -1 for open cells."""
+        return self.grid[row * self.width + col]
+
+    def isWall(self, col, row):
+        """Return whether a cell is a wall. Cells outside the map are open, which is what the tunnels rely on."""
+        if 0 <= col < self.width and 0 <= row < self.height:
+            return self.wallMask[row * self.width + col] == 1
+        return False
+
+    def spawnsOf(self, kind):
+        """
+        Return the cells where an entity kind spawns.
+
+        Args:
+            kind (str): One of the entity kinds in KINDS.
+
+        Returns:
+            Tuple[Tuple[int, int], ...]: The (column, row) of every spawn.
+        """
+        return self._spawnsByKind[kind]
+
+    def ghostHouse(self):
+        """
+        Return the tiles of the ghost house, where ghosts may turn back and eaten ghosts are sent to.
+
+        Returns:
+            Tuple[Tuple[int, int], ...]: The (column, row) of every tile, the ghost spawns if the level marks no house.
+        """
+        return self._spawnsByKind['ghostHouse'] or self._spawnsByKind['ghost']
+
+    def toBytes(self):
+        """Return the level in the compiled binary format."""
+        data = bytearray(HEADER.pack(MAGIC, self.width, self.height, len(self.spawns)))
+        grid = array('h', self.grid)
+        if sys.byteorder != 'little':
+            grid.byteswap()
+        data += grid.tobytes()
+        for kind, col, row in self.spawns:
+            data += SPAWN.pack(KINDS.index(kind), col, row)
+        return bytes(data)
+
+    @classmethod
+    def fromBytes(cls, data):
+        """
+        Build a level from the compiled binary format.
+
+        Args:
+            data (bytes): The compiled level.
+
+        Returns:
+            CompiledLevel: The level.
+        """
+        magic, width, height, spawnCount = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError('Not a compiled level')
+        offset = HEADER.size + width * height * 2
+        grid = array('h')
+        grid.frombytes(data[HEADER.size:offset])
+        if sys.byteorder != 'little':
+            grid.byteswap()
+        spawns = [(KINDS[kind], col, row) for kind, col, row in SPAWN.iter_unpack(data[offset:offset + spawnCount * SPAWN.size])]
+        return cls(width, height, grid, spawns)
+
+
+def compileLevel(layers, loader=csv_layout):
+    """
+    Merge the per-layer CSV files of a level into a compiled level.
+
+    Args:
+        layers (dict): Maps 'walls' and every kind in KINDS to the path of its CSV file; kinds without a
+            file have no spawns.
+        loader (Callable[[str], list]): The function used to read a CSV layout.
+
+    Returns:
+        CompiledLevel: The compiled level.
+    """
+    walls = [row for row in loader(layers['walls']) if row]
+    height = len(walls)
+    width = len(walls[0])
+    grid = array('h', (int(value) for row in walls for value in row))
+    spawns = []
+    for kind in KINDS:
+        if kind not in layers:
+            continue
+        for row, values in enumerate(loader(layers[kind])):
+            for col, value in enumerate(values):
+                if value != '-1':
+                    spawns.append((kind, col, row))
+    return CompiledLevel(width, height, grid, spawns)
+
+
+def tileLevel(level, columns, rows):
+    """
+    Repeat a level side by side into a bigger one, e.g. to stress the systems with a scaled-up map.
+
+    Args:
+        level (CompiledLevel): The level to repeat.
+        columns (int): The number of copies in the X direction.
+        rows (int): The number of copies in the Y direction.
+
+    Returns:
+        CompiledLevel: The tiled level, with the spawns of every copy.
+    """
+    width = level.width * columns
+    grid = array('h')
+    for _ in range(rows):
+        for row in range(level.height):
+            grid.extend(level.grid[row * level.width:(row + 1) * level.width] * columns)
+    spawns = [(kind, col + copyX * level.width, row + copyY * level.height)
+              for copyY in range(rows) for copyX in range(columns) for kind, col, row in level.spawns]
+    return CompiledLevel(width, level.height * rows, grid, spawns)
+
+
+def saveLevel(level, path):
+    """Write a compiled level to a file."""
+    with open(path, 'wb') as levelFile:
+        levelFile.write(level.toBytes())
+
+
+def loadLevel(path):
+    """Read a compiled level from a file with a single read."""
+    with open(path, 'rb') as levelFile:
+        return CompiledLevel.fromBytes(levelFile.read())
+
+
+if __name__ == '__main__':
+    saveLevel(compileLevel(startLevel), startLevelCompiled)
+    print(f'Compiled the start level into {startLevelCompiled}')
@@ -0,0 +1,163 @@
+"""
+Module containing the frame profiler, which times the stages of every frame while it is enabled.
+
+Objects register the methods that make up their stages with watch. While the profiler is
+disabled nothing else happens, so the game runs its plain methods with no overhead at all. When
+it is enabled, every registered method is replaced on its instance by a wrapper that records how
+long each call took, and the replacements are removed again when it is disabled.
+
+The recorded calls are summed per frame for the on-screen overlay and kept as complete events
+for an export in the Chrome trace format, which chrome://tracing and Perfetto open.
+"""
+
+import json
+import time
+import weakref
+from collections import deque
+
+import pygame
+
+from app.src.settings.additional import assets
+from app.src.settings.settings import gameFont
+
+
+class FrameProfiler:
+    """
+    Times registered stages per frame and keeps a trace of the latest calls.
+
+    Args:
+        maxEvents (int): The number of trace events kept, the oldest are dropped first.
+
+    Attributes:
+        enabled (bool): Whether the stages are being timed.
+        frameTime (float): The duration of the last complete frame in milliseconds.
+        stages (Dict[str, float]): The milliseconds spent in every stage during the last complete frame.
+        counts (Dict[str, int]): The sprite counts reported at the end of the last frame by the latest watched
+            object that has a spriteCounts method.
+    """
+
+    def __init__(self, maxEvents: int = 200000):
+        self.enabled = False
+        self.events = deque(maxlen=maxEvents)
+        self.frameTime = 0.0
+        self.stages = {}
+        self.counts = {}
+        self._watched = weakref.WeakKeyDictionary()
+        self._counter = None
+        self._current = {}
+        self._frameStart = None
+        self._origin = time.perf_counter_ns()
+
+    def watch(self, owner, names):
+        """
+        Register methods of an object as stages, timed whenever the profiler is enabled.
+
+        Args:
+            owner (object): The object whose methods are timed.
+            names (Iterable[str]): The names of the methods.
+        """
+        self._watched[owner] = tuple(names)
+        if hasattr(owner, 'spriteCounts'):
+            self._counter = weakref.ref(owner)
+        if self.enabled:
+            self._wrap(owner)
+
+    def _wrap(self, owner):
+        """Replace the registered methods of an object by timed wrappers."""
+        label = type(owner).__name__
+        for name in self._watched[owner]:
+            if name not in owner.__dict__:
+                setattr(owner, name, self._timed(f'{label}.{name}', getattr(owner, name)))
+
+    def _unwrap(self, owner):
+        """Remove the timed wrappers of an object."""
+        for name in self._watched[owner]:
+            owner.__dict__.pop(name, None)
+
+    def _timed(self, label, method):
+        """Return a wrapper recording the duration of every call of a method."""
+        clock = time.perf_counter_ns
+        record = self._record
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record(label, start, clock())
+        return timed
+
+    def _record(self, label, start, end):
+        """Record one call of a stage."""
+        self._current[label] = self._current.get(label, 0) + end - start
+        self.events.append((label, start, end))
+
+    def setEnabled(self, enabled: bool):
+        """Start or stop timing every watched object."""
+        if enabled == self.enabled:
+            return
+        self.enabled = enabled
+        for owner in list(self._watched):
+            if enabled:
+                self._wrap(owner)
+            else:
+                self._unwrap(owner)
+        self._current = {}
+        self._frameStart = None
+
+    def toggle(self):
+        """Switch the profiler on or off."""
+        self.setEnabled(not self.enabled)
+
+    def beginFrame(self):
+        """Mark the start of a frame."""
+        if self.enabled:
+            self._frameStart = time.perf_counter_ns()
+            self._current = {}
+
+    def endFrame(self):
+        """Mark the end of a frame and keep its statistics for the overlay."""
+        if not self.enabled or self._frameStart is None:
+            return
+        end = time.perf_counter_ns()
+        self.events.append(('frame', self._frameStart, end))
+        self.frameTime = (end - self._frameStart) / 1e6
+        self.stages = {label: duration / 1e6 for label, duration in self._current.items()}
+        counter = self._counter() if self._counter else None
+        self.counts = counter.spriteCounts() if counter else {}
+
+    def drawOverlay(self, surface, lines: int = 14):
+        """
+        Draw the frame time, the slowest stages and the sprite counts of the last frame.
+
+        Args:
+            surface (pygame.Surface): The surface to draw on.
+            lines (int): The number of text lines the panel has room for.
+
+        Returns:
+            pygame.Rect: The area of the panel.
+        """
+        font = assets.font(gameFont, 12)
+        panel = pygame.Surface((250, lines * 15 + 6))
+        texts = [f'frame {self.frameTime:.2f} ms']
+        slowest = sorted(self.stages.items(), key=lambda stage: stage[1], reverse=True)
+        texts += [f'{label} {duration:.3f} ms' for label, duration in slowest]
+        texts = texts[:lines - 1] + [' '.join(f'{name} {count}' for name, count in self.counts.items())]
+        for line, text in enumerate(texts):
+            panel.blit(font.render(text, False, 'white'), (4, 3 + line * 15))
+        return surface.blit(panel, (0, 0))
+
+    def exportTrace(self, path):
+        """
+        Write the recorded calls as a Chrome trace.
+
+        Args:
+            path (str): The path of the JSON file to write.
+        """
+        events = [{'name': label, 'ph': 'X', 'pid': 0, 'tid': 0, 'ts': (start - self._origin) / 1000,
+                   'dur': (end - start) / 1000} for label, start, end in self.events]
+        with open(path, 'w', encoding='utf-8') as traceFile:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, traceFile)
+
+
+profiler = FrameProfiler()
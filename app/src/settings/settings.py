@@ -4,13 +4,24 @@ The module represents the configuration settings for a game level.
 The module contains the following variables:
 
     tile_size: An integer representing the size of a single tile in pixels.
-    numberOfTileX: An integer representing the number of tiles in the X direction.
-    numberOfTileY: An integer representing the number of tiles in the Y direction.
+    numberOfTileX: An integer representing the number of tiles the screen shows in the X direction.
+    numberOfTileY: An integer representing the number of tiles the screen shows in the Y direction.
+    The size of a map comes from its level data; a map bigger than the screen scrolls with the player.
     screen_height: An integer representing the height of the game screen in pixels, calculated by multiplying numberOfTileY with tile_size.
     screen_width: An integer representing the width of the game screen in pixels, calculated by multiplying numberOfTileX with tile_size.
 
+    tickRate: An integer holding the number of fixed simulation ticks per simulated second, which is also the frame rate of the game.
+
+    gameFont: A string holding the path of the font every text of the game is written in.
+
+    assetPack: A string holding the path of the baked asset pack, which is used instead of the loose files when present.
+
 The module also includes the startLevel dictionary, which maps various elements of the start level to their corresponding
 file paths. The keys in the dictionary represent the elements, and the values represent the file paths.
+startLevelCompiled holds the path of the same level compiled into a single file, which is used when present.
+lastReplay holds the path the recording of the last game played is saved to.
+profileTrace holds the path the frame profiler exports its Chrome trace to.
+ghostBehaviours lists the behaviours ('random', 'chase', 'ambush' or 'scatter') given in turn to the ghosts of the level.
 """
 
 tile_size = 32
@@ -20,6 +31,12 @@ numberOfTileY = 22
 screen_height = numberOfTileY * tile_size
 screen_width = numberOfTileX * tile_size
 
+tickRate = 60
+
+gameFont = '../fonts/Retro Gaming.ttf'
+
+assetPack = '../assets.pack'
+
 startLevel = {
     'cherry': '../levels/start_level/start_level_cherry.csv',
     'coin': '../levels/start_level/start_level_coins.csv',
@@ -30,4 +47,12 @@ startLevel = {
     'bossGhost': '../levels/start_level/start_level_bossGhost.csv',
     'speed':  '../levels/start_level/start_level_speed.csv',
     'shield': '../levels/start_level/start_level_shield.csv',
+    'ghostHouse': '../levels/start_level/start_level_ghostHouse.csv',
+    'devil': '../levels/start_level/start_level_devil.csv',
 }
+startLevelCompiled = '../levels/start_level.lvl'
+
+lastReplay = '../last.replay'
+profileTrace = '../profile.json'
+
+ghostBehaviours = ('random',)
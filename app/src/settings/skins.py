@@ -0,0 +1,89 @@
+"""
+Module containing the SkinRegistry class, which hands out the clips of player skins and effects by name.
+
+Every clip comes from the shared cache of the asset manager, so a skin or effect is loaded and
+prepared once and handed out by reference afterwards. A level preloads the skin it is played with
+and every effect, so picking up a power pellet or a shield while playing never touches the disk.
+"""
+
+import os
+
+from app.src.settings.additional import assets
+
+SKINS = '../images/pacman/'
+
+# the clips shown over the player's skin while an effect lasts, by name
+EFFECTS = {
+    'power': '../images/PowerPelletEffect',
+    'shield': '../images/shield',
+}
+
+
+class SkinRegistry:
+    """
+    The player skins and effects, loaded on their first request and shared afterwards.
+
+    Args:
+        folder (str): The folder holding one animation folder per skin.
+        effects (Dict[str, str]): The animation folder of every effect, by name.
+    """
+
+    def __init__(self, folder: str = SKINS, effects=None):
+        self.folder = folder
+        self.effects = dict(EFFECTS if effects is None else effects)
+        self._names = None
+
+    def names(self):
+        """
+        Return the names of the available skins, listing the skin folder on the first call only.
+
+        Returns:
+            Tuple[str, ...]: The skin names.
+        """
+        if self._names is None:
+            self._names = tuple(next(os.walk(self.folder))[1])
+        return self._names
+
+    def path(self, name):
+        """Return the animation folder of a skin."""
+        return self.folder + name
+
+    def skin(self, name, size=None):
+        """
+        Return the shared clip of a skin.
+
+        Args:
+            name (str): The name of the skin.
+            size (Tuple[int, int]): The size to scale the frames to, or None to keep their size.
+
+        Returns:
+            Clip: The clip.
+        """
+        return assets.clip(self.path(name), size)
+
+    def effect(self, name):
+        """
+        Return the shared clip of an effect.
+
+        Args:
+            name (str): The name of the effect, one of the keys of effects.
+
+        Returns:
+            Clip: The clip.
+        """
+        return assets.clip(self.effects[name])
+
+    def preload(self, skin=None):
+        """
+        Prepare the clips of a skin and of every effect so requesting them later is a cache hit.
+
+        Args:
+            skin (str): The name of the skin, or None to prepare only the effects.
+        """
+        if skin is not None:
+            self.skin(skin)
+        for name in self.effects:
+            self.effect(name)
+
+
+skins = SkinRegistry()
@@ -0,0 +1,111 @@
+"""
+Module containing the TextCache class, which keeps rendered text so steady frames never render any.
+
+Fonts come from the shared font registry of the asset manager, and every rendered text surface
+is kept in a least-recently-used cache keyed by (font, size, text, colour, antialias). Numbers
+that change while playing, such as the score, are composited from cached digit glyphs instead,
+which draws exactly what rendering the whole number would.
+"""
+
+from collections import OrderedDict
+
+import pygame
+
+from app.src.settings.additional import assets
+
+DIGITS = '0123456789'
+
+
+class TextCache:
+    """
+    A least-recently-used cache of rendered text surfaces.
+
+    The returned surfaces are shared and must be treated as read-only.
+
+    Args:
+        capacity (int): The number of text surfaces kept.
+
+    Attributes:
+        hits (int): The number of requests served from the cache.
+        misses (int): The number of texts that had to be rendered.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._surfaces = OrderedDict()
+        self._glyphs = {}
+
+    def render(self, path, size, text, colour='white', antialias: bool = False):
+        """
+        Return a text rendered with a font.
+
+        Args:
+            path (str): The path to the font file.
+            size (int): The size of the font.
+            text (str): The text.
+            colour: The colour of the text, in any form pygame accepts.
+            antialias (bool): Whether the text is antialiased.
+
+        Returns:
+            pygame.Surface: The rendered text.
+        """
+        key = (path, size, text, colour, antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = assets.font(path, size).render(text, antialias, colour)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.capacity:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def _digits(self, path, size, colour):
+        """Return the glyph surface and the advance of every digit of a font."""
+        key = (path, size, colour)
+        if key not in self._glyphs:
+            font = assets.font(path, size)
+            self._glyphs[key] = tuple((font.render(digit, False, colour), font.metrics(digit)[0][4])
+                                      for digit in DIGITS)
+        return self._glyphs[key]
+
+    def drawNumber(self, surface, value, position, path, size, colour='white'):
+        """
+        Draw a non-negative whole number from cached digit glyphs.
+
+        Args:
+            surface (pygame.Surface): The surface to draw on.
+            value (int): The number.
+            position (Tuple[int, int]): The top left corner of the number.
+            path (str): The path to the font file.
+            size (int): The size of the font.
+            colour: The colour of the number.
+
+        Returns:
+            pygame.Rect: The area drawn on.
+        """
+        glyphs = self._digits(path, size, colour)
+        x, y = position
+        blits = []
+        for digit in str(value):
+            glyph, advance = glyphs[ord(digit) - 48]
+            blits.append((glyph, (x, y)))
+            x += advance
+        surface.blits(blits, False)
+        return pygame.Rect(position, (x - position[0], glyphs[0][0].get_height()))
+
+    def evict(self):
+        """Drop every cached surface."""
+        self._surfaces.clear()
+        self._glyphs.clear()
+
+    def stats(self):
+        """Return the number of cache hits and misses and the number of cached surfaces."""
+        return {'hits': self.hits, 'misses': self.misses, 'cached': len(self._surfaces)}
+
+
+text = TextCache()
@@ -5,7 +5,8 @@ This module contains classes for various tiles used in a game.
 
 """
 import pygame
-from app.src.settings.additional import importFolder
+from app.src.settings.additional import assets
+from app.src.settings.animation import Playhead
 
 
 class Tile(pygame.sprite.Sprite):
@@ -16,6 +17,7 @@ class Tile(pygame.sprite.Sprite):
         size (int): The size of the tile.
         x (int): The x-coordinate of the tile's position.
         y (int): The y-coordinate of the tile's position.
+        image (pygame.Surface): The image of the tile, or None for a blank one of the size of the tile.
 
     Attributes:
         image (pygame.Surface): The image of the tile.
@@ -23,10 +25,10 @@ class Tile(pygame.sprite.Sprite):
 
     """
 
-    def __init__(self, size, x, y):
+    def __init__(self, size, x, y, image=None):
         super().__init__()
-        self.image = pygame.Surface((size, size))
-        self.rect = self.image.get_rect(topleft=(x, y))
+        self.image = pygame.Surface((size, size)) if image is None else image
+        self.rect = pygame.Rect(x, y, size, size)
 
 
 class StaticTile(Tile):
@@ -42,40 +44,48 @@ class StaticTile(Tile):
     """
 
     def __init__(self, size, x, y, surface):
-        super().__init__(size, x, y)
-        self.image = surface
+        super().__init__(size, x, y, surface)
 
 
 class AnimatedTile(Tile):
     """
     A class for animated tiles.
 
+    The frames come from a clip shared by every tile animating the same folder; a tile only owns
+    the playhead that runs through it.
+
     Args:
         size (int): The size of the tile.
         x (int): The x-coordinate of the tile's position.
         y (int): The y-coordinate of the tile's position.
         path (str): The path to the folder containing the frames of the animation.
+        clock (SimulationClock): The clock the animation follows, or None to show the first frame.
+        frameSize (Tuple[int, int]): The size to scale the frames to, or None to keep their size.
 
     Attributes:
-        frames (List[pygame.Surface]): The list of frames of the animation.
-        frameIndex (int): The index of the current frame.
+        playhead (Playhead): The position of the tile in its clip.
     """
 
-    def __init__(self, size, x, y, path):
-        super().__init__(size, x, y)
-        self.frames = importFolder(path)
-        self.frameIndex = 0
-        self.image = self.frames[self.frameIndex]
+    def __init__(self, size, x, y, path, clock=None, frameSize=None):
+        playhead = Playhead(assets.clip(path, frameSize), clock)
+        super().__init__(size, x, y, playhead.frame())
+        self.playhead = playhead
+
+    @property
+    def clip(self):
+        """Clip: The shared clip the tile shows."""
+        return self.playhead.clip
+
+    @clip.setter
+    def clip(self, clip):
+        self.playhead.clip = clip
 
     def animation(self):
         """
-        Advances the animation to the next frame.
+        Shows the frame of the animation for the current time of the clock.
 
         """
-        self.frameIndex += 0.15
-        if self.frameIndex >= len(self.frames):
-            self.frameIndex = 0
-        self.image = self.frames[int(self.frameIndex)]
+        self.image = self.playhead.frame()
 
     def update(self):
         """
@@ -85,54 +95,6 @@ class AnimatedTile(Tile):
         self.animation()
 
 
-class Coin(StaticTile):
-    """
-    A class for coins.
-
-    Args:
-        size (int): The size of the coin.
-        x (int): The x-coordinate of the coin's position.
-        y (int): The y-coordinate of the coin's position.
-
-    """
-
-    def __init__(self, size, x, y):
-        super().__init__(size, x, y, pygame.image.load('../images/PacDot.png').convert_alpha())
-        self.rect = self.image.get_rect(topleft=(x, y))
-
-
-class BasicPower(StaticTile):
-    """
-    A class for basic power tiles.
-
-    Args:
-        size (int): The size of the power tile.
-        x (int): The x-coordinate of the power tile's position.
-        y (int): The y-coordinate of the power tile's position.
-
-    """
-
-    def __init__(self, size, x, y):
-        super().__init__(size, x, y, pygame.image.load('../images/PowerPellet.png').convert_alpha())
-        self.rect = self.image.get_rect(topleft=(x, y))
-
-
-class Cherry(StaticTile):
-    """
-    A class for cherry tiles.
-
-    Args:
-        size (int): The size of the cherry tile.
-        x (int): The x-coordinate of the cherry tile's position.
-        y (int): The y-coordinate of the cherry tile's position.
-
-    """
-
-    def __init__(self, size, x, y):
-        super().__init__(size, x, y, pygame.image.load('../images/SimpleCherry.png').convert_alpha())
-        self.rect = self.image.get_rect(topleft=(x, y))
-
-
 class Speed(StaticTile):
     """
     A class for speed tiles.
@@ -145,7 +107,7 @@ class Speed(StaticTile):
     """
 
     def __init__(self, size, x, y):
-        super().__init__(size, x, y, pygame.image.load('../images/speed.png').convert_alpha())
+        super().__init__(size, x, y, assets.image('../images/speed.png'))
         self.rect = self.image.get_rect(topleft=(x, y))
 
 
@@ -161,36 +123,6 @@ class Shield(StaticTile):
     """
 
     def __init__(self, size, x, y):
-        super().__init__(size, x, y, pygame.image.load('../images/shield/0.png').convert_alpha())
+        super().__init__(size, x, y, assets.image('../images/shield/0.png'))
         self.rect = self.image.get_rect(topleft=(x, y))
 
-
-class Fake(Tile):
-    """
-    A class for fake tiles.
-
-    Args:
-        size (int): The size of the fake tile.
-        x (int): The x-coordinate of the fake tile's position.
-        y (int): The y-coordinate of the fake tile's position.
-        origin (Tuple[int, int]): The coordinates of the original tile.
-
-    Attributes:
-        deviationX (int): The deviation in the x-coordinate from the original tile.
-        deviationY (int): The deviation in the y-coordinate from the original tile.
-        location (str): The location of the fake tile relative to the original tile.
-    """
-
-    def __init__(self, size, x, y, origin):
-        super().__init__(size, x, y)
-        self.rect = self.image.get_rect(topleft=(x, y))
-        self.deviationX = origin[0] - x
-        self.deviationY = origin[1] - y
-        if self.deviationY < 0:
-            self.location = 'up'
-        elif self.deviationY > 0:
-            self.location = 'down'
-        elif self.deviationX < 0:
-            self.location = 'left'
-        elif self.deviationX > 0:
-            self.location = 'right'
@@ -1,10 +1,53 @@
 """This module contains unit tests for the game functionality."""
+import hashlib
+import json
 import os
+import random
 import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
+import numpy as np
+import pygame
+import pytest
+
+from app.benchmarks.benchmark import MIN_STEPS_PER_SECOND, belowFloor, compare, run as runBenchmarks
 from app.src.game import main
+from app.src.entities.enemy import Ghost, GhostBoss
+from app.src.entities.player import Player
+from app.src.gameplay.batch import runBatch, summarise
+from app.src.gameplay.clock import SimulationClock
+from app.src.gameplay import distancefield, entitystore, opencells
+from app.src.gameplay.distancefield import CACHED_FIELDS, FLOW_FIELDS, DistanceField
+from app.src.gameplay.entitystore import BEHAVIOURS, CHOICES, CHOICE_COUNTS, EntityGroup, EntityStore
+from app.src.gameplay.environment import ACTIONS, CHANNELS, PLAYER, Environment, VectorEnvironment
+from app.src.gameplay.level import Level
+from app.src.gameplay.levelpool import LevelPool
+from app.src.gameplay.navigation import NavGraph, TURN_CHOICES, exitDirections
+from app.src.gameplay.opencells import CACHED_INDEXES, OpenCellIndex
+from app.src.gameplay.pelletfield import PelletField, COIN, POWER, CHERRY
+from app.src.gameplay.replay import Recorder, Replay, stateHash
+from app.src.gameplay.scheduler import Scheduler
+from app.src.gameplay.spatialhash import SpatialHash, HashedGroup, HashedGroupSingle
+from app.src.gameplay.wallgrid import WallGrid
+from app.src.menu.menu import Skins
+from app.src.settings.additional import assets
+from app.src.settings.animation import RIGHT, LEFT, DOWN, UP, Clip, FRAME_DURATION
+from app.src.settings.assetpack import bake
+from app.src.settings.profiler import profiler
+from app.src.settings.skins import skins
+from app.src.settings.text import text
+from app.src.settings.tiles import Shield
+from app.src.settings.levelcompiler import CompiledLevel, compileLevel, loadLevel, tileLevel
+from app.src.settings.settings import screen_width, screen_height, startLevel, startLevelCompiled, gameFont
+
+
+def makeScreen():
+    """
+    Initialise pygame and return a display surface for tests that build game objects directly.
+    """
+    pygame.init()
+    return pygame.display.set_mode((screen_width, screen_height))
 
 def test_menu():
     """
@@ -52,3 +95,849 @@ def test_basic_powerup():
     """
     response = main("powerup_collision")
     assert response is True
+
+
+def test_level_decodes_each_asset_once():
+    """
+    Test that building levels loads every asset from disk only once.
+    """
+    screen = makeScreen()
+    assets.evict()
+    assets.resetStats()
+    Level(screen, 'original')
+    stats = assets.stats()
+    assert stats['misses'] == stats['cached']
+    Level(screen, 'original')
+    assert assets.stats()['misses'] == stats['misses']
+    assert assets.stats()['hits'] > stats['hits']
+
+
+def test_asset_pack_matches_loose_files(tmp_path):
+    """
+    Test that surfaces and layouts served from a baked asset pack match the loose files.
+    """
+    makeScreen()
+    pack = str(tmp_path / 'assets.pack')
+    bake(pack)
+    assets.evict()
+    loose = pygame.image.tobytes(assets.image('../images/ghost/0.png'), 'RGBA')
+    layout = assets.layout('../levels/start_level/start_level_walls.csv')
+    assert assets.openPack(pack)
+    try:
+        assert pygame.image.tobytes(assets.image('../images/ghost/0.png'), 'RGBA') == loose
+        assert assets.layout('../levels/start_level/start_level_walls.csv') == layout
+        assert len(assets.tiles('../images/tiles set.png')) == 160
+    finally:
+        assets.closePack()
+
+
+def test_compiled_level_is_up_to_date():
+    """
+    Test that the shipped compiled level matches its per-layer CSV files.
+    """
+    compiled = compileLevel(startLevel)
+    assert loadLevel(startLevelCompiled).toBytes() == compiled.toBytes()
+    assert len(compiled.spawnsOf('coin')) == 153
+    assert compiled.isWall(0, 0) and not compiled.isWall(1, 1) and not compiled.isWall(-1, 10)
+    assert compiled.ghostHouse() == ((8, 10), (9, 10), (10, 10)) and compiled.spawnsOf('devil') == ((9, 10),)
+
+
+def test_player_movement_replay(monkeypatch):
+    """
+    Test that player movement on the wall grid replays the trajectory recorded with the sprite-based wall checks.
+    """
+    screen = makeScreen()
+    keys = [pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN, None]
+    pressed = {'key': None}
+
+    class Keys:
+        """Keyboard state holding a single pressed key."""
+        def __getitem__(self, key):
+            return key == pressed['key']
+
+    monkeypatch.setattr(pygame.key, 'get_pressed', Keys)
+    script = random.Random(99)
+    level = Level(screen, 'original')
+    level.ghost_sprites.empty()
+    trajectory = []
+    for frame in range(2000):
+        if not frame % 13:
+            pressed['key'] = script.choice(keys)
+        level.run()
+        player = level.player.sprite
+        trajectory.append((player.rect.x, player.rect.y, tuple(player.possibleMoves)))
+    assert hashlib.sha1(repr(trajectory).encode()).hexdigest() == '8e15b3577e84fe773dd1b75f3362b2eb6472ce21'
+
+
+def test_navigation_graph_corridors():
+    """
+    Test that every exit of the navigation graph leads to a tile with an exit back, and that every corridor is
+    straight and leads back to the junction it started from.
+    """
+    graph = NavGraph(compileLevel(startLevel))
+    assert graph.exitsAt(0, 0) == 0
+    for index, exits in enumerate(graph.exits):
+        for direction in exitDirections(exits):
+            neighbour = graph.neighbour(index, direction)
+            assert neighbour is not None and graph.exits[neighbour] & (1 << (direction + 2) % 4)
+    assert graph.junctions and graph.isJunction(1, 1) and not graph.isJunction(2, 1)
+    for junction, corridors in graph.edges.items():
+        for direction, (end, length) in corridors.items():
+            tile = junction
+            for _ in range(length):
+                tile = graph.neighbour(tile, direction)
+            assert tile == end and graph.corridor(*graph.cell(end), (direction + 2) % 4) == (junction, length)
+    assert TURN_CHOICES[0b1111][1] == (0, 1, 2)
+    assert TURN_CHOICES[0b0010][1] == (1,)
+    assert TURN_CHOICES[0b1000][1] == (4,)
+
+
+def test_distance_field_chase():
+    """
+    Test that the distance field wraps through the tunnel and that a chasing ghost catches a standing player.
+    """
+    screen = makeScreen()
+    level = Level(screen, 'original')
+    field = level.distanceField
+    assert field is DistanceField.forLevel(level.levelMap, level.navGraph)
+    assert field.distance((0, 10), (18, 10)) == 1
+    for row in range(-3, field.height + 3):
+        for col in range(-3, field.width + 3):
+            if field.slot(col, row) < 0:
+                assert field.nearestWalkable(col, row) == min(
+                    field.cells, key=lambda cell: abs(cell[0] - col) + abs(cell[1] - row))
+    level.ghost_sprites.empty()
+    level.ghost_sprites.add(Ghost(32, 32, 32, 'chase', field))
+    for _ in range(2000):
+        level.fakeCollisionsGhost()
+        level.ghostTargets()
+        level.ghost_sprites.update()
+        level.wallCollisionGhosts()
+        level.enemyCollision()
+        if not level.alive:
+            break
+    assert not level.alive
+
+
+def test_distance_field_flow_fields():
+    """
+    Test that flow fields steer like the all-pairs table and keep a big map from building it.
+    """
+    screen = makeScreen()
+    level = Level(screen, 'original')
+    field = level.distanceField
+    flows = DistanceField(level.navGraph, allPairsSlots=0)
+    assert flows.flowFields and not field.flowFields
+    rng = random.Random(1)
+    for _ in range(500):
+        start, target = rng.choice(field.cells), rng.choice(field.cells)
+        choices = tuple(rng.sample(range(5), rng.randrange(1, 5)))
+        assert flows.distance(start, target) == field.distance(start, target)
+        assert flows.direction(start, target, choices) == field.direction(start, target, choices)
+    walkers = rng.choices(field.cells, k=64)
+    targets = rng.choices(field.cells[:3], k=64)
+    columns = [np.array(values) for values in (*zip(*walkers), *zip(*targets))]
+    choices, counts = np.tile(np.arange(4), (64, 1)), np.full(64, 4)
+    assert (flows.directions(*columns, choices, counts) == field.directions(*columns, choices, counts)).all()
+    assert len(flows._flows) <= FLOW_FIELDS
+
+    big = Level(screen, 'original', level=tileLevel(level.levelMap, 4, 4), controls=None, seed=2)
+    assert big.distanceField.flowFields
+    big.ghost_sprites.empty()
+    big.ghost_sprites.add(Ghost(32, 32, 32, 'chase', big.distanceField))
+    for _ in range(60):
+        big.run()
+    assert big.distanceField._distances is None and big.distanceField._flows
+    with pytest.raises(ValueError):
+        big.distanceField.distances
+
+
+def test_eaten_ghosts_go_back_to_their_spawn_without_a_ghost_house():
+    """
+    Test that a level without ghost-house cells sends an eaten ghost back to its own spawn.
+    """
+    screen = makeScreen()
+    start = compileLevel(startLevel)
+    bare = CompiledLevel(start.width, start.height, start.grid,
+                         [spawn for spawn in start.spawns if spawn[0] not in ('ghost', 'ghostHouse', 'devil')])
+    level = Level(screen, 'original', level=bare, controls=None, seed=4)
+    assert level.ghostHome is None and not level.ghost_sprites
+    ghost = Ghost(32, 64, 32)
+    level.ghost_sprites.add(ghost)
+    ghost.rect = level.player.sprite.rect.copy()
+    level.godMode = True
+    level.enemyCollision()
+    assert level.alive and level.coins == 50 and ghost.rect.topleft == (64, 32)
+
+
+def test_second_boss_phase_runs_without_a_devil():
+    """
+    Test that a level without a Devil cell plays, draws and observes its second boss phase.
+    """
+    makeScreen()
+    start = compileLevel(startLevel)
+    bare = CompiledLevel(start.width, start.height, start.grid,
+                         [spawn for spawn in start.spawns if spawn[0] not in ('ghost', 'ghostHouse', 'devil')])
+    environment = Environment(level=bare)
+    environment.reset(5)
+    level = environment.level
+    assert not level.devil
+    level.boss = 2
+    level.endBossScreen()
+    for _ in range(60):
+        observation, *_ = environment.step(0)
+        level.draw()
+    assert level.alive and observation.shape == (CHANNELS, start.height, start.width)
+
+
+def test_field_and_index_caches_keep_only_the_recent_walls():
+    """
+    Test that the distance-field and open-cell caches drop the least recently used walls past their bound.
+    """
+    start = compileLevel(startLevel)
+    levels = [tileLevel(start, columns, 1) for columns in range(1, max(CACHED_FIELDS, CACHED_INDEXES) + 3)]
+    fields = [DistanceField.forLevel(level, NavGraph(level)) for level in levels]
+    indexes = [OpenCellIndex.forLevel(level) for level in levels]
+    assert len(distancefield._cache) == CACHED_FIELDS and len(opencells._cache) == CACHED_INDEXES
+    assert DistanceField.forLevel(levels[-1], NavGraph(levels[-1])) is fields[-1]
+    assert OpenCellIndex.forLevel(levels[-1]) is indexes[-1]
+    assert DistanceField.forLevel(levels[0], NavGraph(levels[0])) is not fields[0]
+    assert OpenCellIndex.forLevel(levels[0]) is not indexes[0]
+
+
+def test_dirty_rect_rendering():
+    """
+    Test that after the first full frame only the areas around moving sprites are redrawn.
+    """
+    screen = makeScreen()
+    level = Level(screen, 'original')
+    level.run()
+    assert level.dirtyRects is None
+    for _ in range(10):
+        level.run()
+        assert level.dirtyRects is not None
+        assert sum(rect.width * rect.height for rect in level.dirtyRects) < screen_width * screen_height // 10
+
+
+def test_headless_timers_follow_the_simulation_clock():
+    """
+    Test that a level stepped headless times its power-up in simulated ticks rather than wall-clock time.
+    """
+    screen = makeScreen()
+    level = Level(screen, 'original', controls=None)
+    level.ghost_sprites.empty()
+    level.startPowerUp()
+    for _ in range(level.clock.rate * 5):
+        level.update()
+    assert level.godMode
+    level.update('left')
+    assert not level.godMode
+    assert level.player.sprite.nextMove == 'left'
+    assert level.dirtyRects is None
+
+
+def test_vector_environment_steps_independent_levels():
+    """
+    Test that the vectorized environment returns stacked grid observations and restarts finished episodes.
+    """
+    makeScreen()
+    environment = VectorEnvironment(3, maxTicks=50)
+    observations, infos = environment.reset(seed=7)
+    assert observations.shape == (3, CHANNELS, 22, 19)
+    assert all(observation[PLAYER].sum() == 1 for observation in observations)
+    for _ in range(50):
+        observations, rewards, terminated, truncated, infos = environment.step([ACTIONS.index('left')] * 3)
+    assert rewards.shape == (3,)
+    assert all(terminated | truncated)
+    assert all('final' in info and info['ticks'] == 0 for info in infos)
+
+
+def test_batch_runner_is_reproducible():
+    """
+    Test that seeded games played on the process pool give the same records every time.
+    """
+    first = list(runBatch([3, 4], workers=1, maxTicks=600))
+    assert first == list(runBatch([3, 4], workers=1, maxTicks=600))
+    assert all(record.cause in ('ghost', 'timeout') and record.ticks <= 600 for record in first)
+    summary = summarise(first)
+    assert summary['games'] == 2 and sum(summary['causes'].values()) == 2
+
+
+def test_replay_reproduces_a_recorded_run():
+    """
+    Test that a recorded run replays headless with identical state hashes and that a changed input is caught.
+    """
+    screen = makeScreen()
+    script = random.Random(5)
+    pressed = {'direction': None}
+    level = Level(screen, 'original', controls=lambda: pressed['direction'], seed=11)
+    level.recorder = Recorder(level.seed, hashInterval=1)
+    for frame in range(600):
+        if not frame % 7:
+            pressed['direction'] = script.choice([None, 'up', 'right', 'down', 'left'])
+        level.run()
+    replay = Replay(level.recorder.toBytes())
+    assert replay.ticks == 600 and replay.seed == level.seed
+    assert replay.play() is None
+    first = min(replay.inputs)
+    replay.inputs[first] = 'up' if replay.inputs[first] != 'up' else 'down'
+    assert replay.play() is not None
+
+
+def test_benchmark_suite_flags_regressions():
+    """
+    Test that the benchmark suite times every phase and flags benchmarks slower than the baseline.
+    """
+    makeScreen()
+    results = runBenchmarks(frames=3, ghostCounts=(4,), builds=1, stressCounts=(8,))
+    assert {'init', 'run/pellets/4', 'run/boss1/4', 'run/boss2/4', 'draw/boss2/4',
+            'stress/collisions/8'} <= set(results['results'])
+    baseline = {'results': {name: dict(result) for name, result in results['results'].items()}}
+    baseline['results']['run/boss2/4']['median'] = results['results']['run/boss2/4']['median'] / 3
+    assert [regression['name'] for regression in compare(results, baseline)] == ['run/boss2/4']
+
+
+def test_benchmark_suite_fails_below_the_throughput_floor():
+    """
+    Test that the benchmark suite steps the environments and flags those slower than the floor.
+    """
+    makeScreen()
+    results = runBenchmarks(frames=3, ghostCounts=(), builds=1, stressCounts=(), swarmCounts=(), largeTilings=(),
+                            environmentCounts=(1, 4))
+    assert {'environment/step/1', 'environment/step/4'} <= set(results['results'])
+    results['results']['environment/step/1']['median'] = 1e6 / (MIN_STEPS_PER_SECOND * 2)
+    results['results']['environment/step/4']['median'] = 4e6 / (MIN_STEPS_PER_SECOND / 2)
+    assert belowFloor(results) == [{'name': 'environment/step/4', 'stepsPerSecond': MIN_STEPS_PER_SECOND // 2,
+                                    'floor': MIN_STEPS_PER_SECOND}]
+
+
+def test_profiler_times_stages_only_while_enabled(tmp_path):
+    """
+    Test that the profiler records the stages of a frame and exports a trace, and leaves no wrappers once disabled.
+    """
+    screen = makeScreen()
+    level = Level(screen, 'original', controls=None)
+    assert 'update' not in vars(level)
+    profiler.setEnabled(True)
+    try:
+        for _ in range(3):
+            profiler.beginFrame()
+            level.run()
+            profiler.endFrame()
+        assert {'Level.update', 'Level.wallCollision', 'Level.draw'} <= set(profiler.stages)
+        assert profiler.counts['coins'] == level.pellets.remaining(COIN)
+        assert profiler.drawOverlay(screen).width > 0
+        trace = tmp_path / 'profile.json'
+        profiler.exportTrace(str(trace))
+        events = json.loads(trace.read_text())['traceEvents']
+        assert {'frame', 'Level.updateGhosts'} <= {event['name'] for event in events}
+    finally:
+        profiler.setEnabled(False)
+    assert 'update' not in vars(level)
+
+
+def test_steady_frames_render_no_text():
+    """
+    Test that the score is composited from digit glyphs and that repeated frames render no text and load no fonts.
+    """
+    screen = makeScreen()
+    for value in (0, 7, 10, 153, 1024):
+        expected = assets.font(gameFont, 20).render(str(value), False, 'white')
+        composited = pygame.Surface(expected.get_size())
+        rect = text.drawNumber(composited, value, (0, 0), gameFont, 20)
+        reference = pygame.Surface(expected.get_size())
+        reference.blit(expected, (0, 0))
+        assert rect.size == expected.get_size()
+        assert pygame.image.tobytes(composited, 'RGB') == pygame.image.tobytes(reference, 'RGB')
+    level = Level(screen, 'original', controls=None)
+    level.alive = False
+    level.run()
+    level.run()
+    misses = text.stats()['misses']
+    fonts = assets.stats()['misses']
+    for _ in range(5):
+        level.run()
+        assert level.dirtyRects == []
+    assert text.stats()['misses'] == misses
+    level.alive = True
+    level.pellets.clear(COIN)
+    level.run()
+    misses = text.stats()['misses']
+    for _ in range(5):
+        level.run()
+        assert level.splash == 1
+    assert text.stats()['misses'] == misses
+    assert assets.stats()['misses'] == fonts
+
+
+def test_player_and_showcase_frames_are_pretransformed(monkeypatch):
+    """
+    Test that players share one clip per skin and that animating them or the skin shop transforms no surfaces.
+    """
+    screen = makeScreen()
+    first = Player(32, 32, 32, 'original')
+    second = Player(32, 64, 32, 'original')
+    assert first.clip is second.clip
+    shop = Skins(screen)
+    assert shop._skins is None
+    assert len(shop.skins) == len(skins.names())
+
+    def forbidden(*args):
+        raise AssertionError('surface transformed during a frame')
+
+    for name in ('flip', 'rotate', 'scale'):
+        monkeypatch.setattr(pygame.transform, name, forbidden)
+    for direction, orientation in (((1, 0), RIGHT), ((-1, 0), LEFT), ((0, 1), DOWN), ((0, -1), UP)):
+        first.direction = pygame.math.Vector2(direction)
+        for _ in range(10):
+            first.animate()
+        assert first.image in first.clip.oriented[orientation]
+    for _ in range(10):
+        shop.skins.update()
+    assert all(sprite.image.get_size() == (64, 64) for sprite in shop.skins)
+
+
+def test_animation_follows_simulation_time():
+    """
+    Test that animations follow the time of the clock however often they are drawn, and that spawned ghosts share their clip.
+    """
+    makeScreen()
+    clock = SimulationClock()
+    player = Player(32, 32, 32, 'original', clock)
+    frames = player.clip.frames
+    for _ in range(50):
+        player.animate()
+    assert player.image is frames[0]
+    clock.advance(round(FRAME_DURATION * clock.rate * 2.5))
+    player.animate()
+    assert player.image is frames[2]
+    clock.advance(round(FRAME_DURATION * clock.rate * len(frames)))
+    player.animate()
+    assert player.image is frames[2]
+
+    clip = Clip(frames[:2], durations=(0.1, 0.3))
+    assert [clip.index(time) for time in (0.05, 0.2, 0.39, 0.45)] == [0, 1, 1, 0]
+
+    boss = GhostBoss(32, 0, 0)
+    group = pygame.sprite.Group()
+    boss.spawnEnemy(group)
+    boss.spawnEnemy(group)
+    first, second = group.sprites()
+    assert first.clip is second.clip is Ghost(32, 0, 0).clip
+
+
+def test_effects_are_swapped_without_loading():
+    """
+    Test that picking up a power pellet or a shield loads nothing and that effects stack over the skin.
+    """
+    screen = makeScreen()
+    level = Level(screen, 'pizza', controls=None)
+    player = level.player.sprite
+    skin = player.clip
+    assets.resetStats()
+    level.pellets.fill(POWER, [level.playerCell()])
+    level.powerUp()
+    level.shield_sprites.add(Shield(32, player.rect.x, player.rect.y))
+    level.shieldCollision()
+    assert assets.misses == 0
+    assert player.clip is skins.effect('shield')
+    player.removeEffect(skins.effect('shield'))
+    assert player.clip is skins.effect('power')
+    player.removeEffect(skins.effect('power'))
+    assert player.clip is skin is skins.skin('pizza')
+
+
+def test_reset_level_plays_like_a_new_one(monkeypatch):
+    """
+    Test that a pooled level reset for a new game plays exactly like a new level and builds no sprites.
+    """
+    screen = makeScreen()
+    moves = ['left', 'up', 'right', 'down']
+
+    def play(level):
+        state = 0
+        for tick in range(600):
+            level.update(moves[tick // 20 % 4])
+            state = stateHash(level, state)
+        return state, level.coins, level.alive
+
+    pool = LevelPool(screen, controls=None)
+    level = pool.acquire('original', 3)
+    expected = play(level)
+    level.pellets.clear(COIN)
+    level.update()
+    pool.release(level)
+
+    def forbidden(*args, **kwargs):
+        raise AssertionError('sprite built by a reset')
+
+    for name in ('Ghost', 'GhostBoss', 'Devil', 'Player', 'Shield', 'Speed'):
+        monkeypatch.setattr(f'app.src.gameplay.level.{name}', forbidden)
+    again = pool.acquire('original', 3)
+    assert again is level and pool.built == 1 and pool.reused == 1
+    assert play(again) == expected
+    again.boss = 1
+    again.startBossScreen()
+    again.update()
+    assert again.pellets.remaining(POWER) == len(again.levelMap.spawnsOf('BasicPower'))
+
+
+def test_pellet_field_counts_and_collects_under_a_rectangle():
+    """
+    Test that the pellet field only collects the pellets under a rectangle and keeps its counts without scanning.
+    """
+    field = PelletField(4, 3)
+    field.fill(COIN, [(0, 0), (1, 0), (2, 0), (3, 2)])
+    field.fill(CHERRY, [(1, 1)])
+    field.save()
+    assert field.remaining(COIN) == 4 and field.remaining(CHERRY) == 1
+    assert field.collect(pygame.Rect(16, 0, 32, 32), COIN) == [pygame.Rect(0, 0, 32, 32), pygame.Rect(32, 0, 32, 32)]
+    assert field.collect(pygame.Rect(-20, 0, 32, 32), COIN) == []
+    assert field.remaining(COIN) == 2
+    field.fill(POWER, [(3, 2)])
+    assert field.remaining(COIN) == 1 and field.remaining(POWER) == 1
+    field.clear(CHERRY)
+    assert field.cells(CHERRY) == []
+    field.reset(COIN)
+    assert field.remaining(COIN) == 4 and field.remaining(POWER) == 0
+    field.reset()
+    assert field.remaining(CHERRY) == 1
+
+
+def test_spatial_hash_follows_groups_and_moving_sprites():
+    """
+    Test that hashed groups file their sprites as they are added, moved and killed, and that queries only find overlaps.
+    """
+    makeScreen()
+    broadphase = SpatialHash()
+    ghosts = HashedGroup(broadphase, *(Ghost(32, x * 32, 64) for x in range(10)))
+    others = HashedGroup(broadphase, Ghost(32, 64, 64))
+    assert len(broadphase) == 11
+    rect = pygame.Rect(70, 64, 32, 32)
+    assert broadphase.collide(rect, ghosts) == [ghosts.sprites()[2], ghosts.sprites()[3]]
+    assert broadphase.collide(rect, others) == others.sprites()
+    moved = ghosts.sprites()[9]
+    moved.rect.topleft = (80, 80)
+    broadphase.move(moved)
+    assert moved in broadphase.collide(rect, ghosts)
+    found = broadphase.collide(rect, ghosts, dokill=True)
+    assert len(found) == 3 and not any(sprite.alive() for sprite in found)
+    assert broadphase.collide(rect, ghosts) == [] and len(broadphase) == 8
+    ghosts.empty()
+    assert len(broadphase) == 1
+
+
+def test_hashed_single_group_unfiles_the_sprite_it_replaces():
+    """
+    Test that a sprite replaced in a hashed single-sprite group leaves the hash with it.
+    """
+    makeScreen()
+    broadphase = SpatialHash()
+    first, second, third = (Ghost(32, 64, 64) for _ in range(3))
+    single = HashedGroupSingle(broadphase, first)
+    single.add(second)
+    assert len(broadphase) == 1 and broadphase.collide(first.rect, single) == [second]
+    single.sprite = third
+    assert len(broadphase) == 1 and broadphase.collide(first.rect, single) == [third]
+    assert not first.alive() and not second.alive()
+    single.empty()
+    assert len(broadphase) == 0
+
+
+def test_devil_targets_open_cells_from_the_shared_index(monkeypatch):
+    """
+    Test that the open-cell index matches a scan of the walls and that the Devil casts without reading any file.
+    """
+    screen = makeScreen()
+    level = Level(screen, 'original', controls=None, seed=4)
+    levelMap = level.levelMap
+    index = OpenCellIndex.forLevel(levelMap)
+    assert level.devil.sprite.targets is index
+    for radius in (2, 4):
+        for col, row in ((-1, 10), (0, 0), (9, 10), (levelMap.width, 3)):
+            expected = tuple((x, y) for y in range(row - radius, row + radius + 1)
+                             for x in range(col - radius, col + radius + 1)
+                             if 0 <= x < levelMap.width and 0 <= y < levelMap.height and not levelMap.isWall(x, y))
+            assert index.around(col, row, radius) == expected
+    cells = index.volley(9, 10, 5, random.Random(1), 3)
+    assert len(set(cells)) == 5 and all(cell in index.around(9, 10, 3) for cell in cells)
+
+    def forbidden(*args, **kwargs):
+        raise AssertionError('file opened while targeting')
+
+    monkeypatch.setattr('builtins.open', forbidden)
+    devil = level.devil.sprite
+    devil.castFireball(9 * 32, 10 * 32)
+    devil.radius = 3
+    devil.castVolley(9 * 32, 10 * 32, 4)
+    assert len(devil.impact) == 5
+    assert all(not levelMap.isWall(impact.posX // 32, impact.posY // 32) for impact in devil.impact)
+
+
+def test_pools_recycle_ghosts_impacts_and_fireballs():
+    """
+    Test that killed ghosts, impact points and fireballs are respawned from their pools instead of built again.
+    """
+    screen = makeScreen()
+    level = Level(screen, 'original', controls=None, seed=5)
+    devil = level.devil.sprite
+    for _ in range(3):
+        devil.castVolley(9 * 32, 10 * 32, 3)
+        level.clock.advance(int(1.1 * level.clock.rate))
+        level.timers.run()
+        assert len(devil.impact) == 0 and len(devil.fireballs) == 3
+        assert devil.fireballs.sprites()[0].rect.size == (32, 32)
+        level.clock.advance(int(0.6 * level.clock.rate))
+        level.timers.run()
+        assert len(devil.fireballs) == 0
+    stats = level.poolStats()
+    assert stats['impacts'] == {'built': 3, 'reused': 6, 'live': 0, 'free': 3}
+    assert stats['fireballs'] == {'built': 3, 'reused': 6, 'live': 0, 'free': 3}
+
+    boss = level.bossGhost.sprite
+    boss.spawnEnemy(level.ghost_sprites)
+    ghost = level.ghost_sprites.sprites()[-1]
+    ghost.rect = ghost.rect.move(64, 0)
+    ghost.direction = pygame.math.Vector2(1, 0)
+    assert ghost.rect.center == (288 + 64 + 16, 320 + 16) and ghost.direction == pygame.math.Vector2(1, 0)
+    level.reset(5)
+    assert ghost not in level.ghost_sprites and level.poolStats()['ghosts']['free'] == 1
+    boss.spawnEnemy(level.ghost_sprites)
+    assert level.ghost_sprites.sprites()[-1] is ghost
+    assert ghost.rect.center == (288 + 16, 320 + 16) and ghost.direction == pygame.math.Vector2(0, 0)
+    assert level.spriteCounts()['pooled'] == 6
+
+
+def test_scheduler_fires_timers_on_the_tick_they_are_due():
+    """
+    Test that timers fire once their delay is over, can be cancelled, repeat, and stand still while the level is paused.
+    """
+    clock = SimulationClock(60)
+    timers = Scheduler(clock)
+    fired = []
+
+    def record(name):
+        fired.append((name, clock.ticks))
+
+    once = timers.after(0.5, record, 'once')
+    cancelled = timers.after(0.2, record, 'cancelled')
+    timers.every(1, record, 'every', delay=0)
+    timers.after(float('inf'), record, 'never')
+    cancelled.cancel()
+    assert len(timers) == 2
+    for _ in range(150):
+        clock.advance()
+        timers.run()
+    assert fired == [('every', 1), ('once', 31), ('every', 62), ('every', 123)] and not once.active
+    for _ in range(100):
+        timers.after(0.1, record, 'stale').cancel()
+    assert len(timers) == 1 and len(timers._heap) < 40
+
+    level = Level(makeScreen(), 'original', controls=None, seed=2)
+    level.ghost_sprites.empty()
+    level.startPowerUp()
+    level.togglePause()
+    for _ in range(level.clock.rate * 10):
+        level.run()
+    assert level.clock.ticks == 0 and level.godMode
+    level.togglePause()
+    for _ in range(level.clock.rate * 5 + 1):
+        level.run()
+    assert not level.godMode and not level.player.sprite.effects
+
+
+def test_entity_store_moves_every_ghost_at_once():
+    """
+    Test that ghosts are views of the arrays of the store and that its systems steer them like the distance field.
+    """
+    screen = makeScreen()
+    level = Level(screen, 'original', controls=None, seed=3)
+    field = level.distanceField
+    rng = random.Random(0)
+    for _ in range(2000):
+        house, exits, previousWay = rng.randrange(2), rng.randrange(16), rng.randrange(5)
+        start = (rng.randrange(-1, 20), rng.randrange(22))
+        target = rng.choice(field.cells)
+        choices, count = CHOICES[house, exits, previousWay], CHOICE_COUNTS[house, exits, previousWay]
+        if count:
+            expected = field.direction(start, target, tuple(int(way) for way in choices[:count]))
+            walker = (np.array([value]) for value in start + target)
+            assert field.directions(*walker, choices[None], np.array([count]))[0] == expected
+
+    store = level.ghosts
+    first, second = level.ghost_sprites.sprites()[:2]
+    moved = first.rect.move(32, 0)
+    first.rect = moved
+    assert first.store is store and store.x[first.slot] == moved.x
+    first.rect.x += 32
+    first.direction.x = -1
+    assert (store.x[first.slot], store.dx[first.slot]) == (moved.x + 32, -1)
+    first.rect.x -= 32
+    level.ghost_sprites.remove(first)
+    assert first.store is None and first.rect == moved
+    assert store.sprites[second.slot] is second and len(store) == len(level.ghost_sprites)
+
+    tiled = tileLevel(level.levelMap, 3, 2)
+    assert (tiled.width, tiled.height) == (level.levelMap.width * 3, level.levelMap.height * 2)
+    assert len(tiled.spawnsOf('ghost')) == 6 * len(level.levelMap.spawnsOf('ghost'))
+    navGraph = NavGraph(tiled)
+    swarm = EntityGroup(EntityStore(WallGrid(tiled), navGraph, None, seed=1))
+    cells = [cell for cell in tiled.openCells if navGraph.exitsAt(*cell)]
+    for col, row in rng.sample(cells, 500):
+        swarm.add(Ghost(32, col * 32, row * 32))
+    store = swarm.store
+    for _ in range(600):
+        store.refreshExits()
+        swarm.update()
+        store.move()
+        store.resolveWalls()
+    x, y = store.x[:len(store)], store.y[:len(store)]
+    assert not (store._walls(x, y) | store._walls(x + 31, y + 31)).any()
+    assert (store.ahead[:len(store)] > 0).any()
+    ghost = store.sprites[0]
+    assert ghost in swarm.collide(ghost.rect)
+
+
+def test_ghosts_skip_corridors_without_changing_their_paths():
+    """
+    Test that ghosts going straight down the corridors of the navigation graph move as if steered on every tile.
+    """
+    makeScreen()
+    level = tileLevel(compileLevel(startLevel), 2, 2)
+    navGraph = NavGraph(level)
+    field = DistanceField(navGraph)
+    junction = navGraph.index(1, 1)
+    assert navGraph.corridor(1, 1, 1) == (junction + 3, 3)
+    cells = random.Random(2).sample([cell for cell in level.openCells if navGraph.exitsAt(*cell)], 200)
+    stores = []
+    for skipping in (True, False):
+        store = EntityStore(WallGrid(level), navGraph, field, level.ghostHouse(), seed=7)
+        if not skipping:
+            store.runs[:] = 0
+        swarm = EntityGroup(store)
+        for number, (col, row) in enumerate(cells):
+            swarm.add(Ghost(32, col * 32, row * 32, BEHAVIOURS[number % 4], field))
+        stores.append((store, swarm))
+    assert stores[0][0].runs[junction * 4 + 1] == 3
+    for tick in range(600):
+        for store, swarm in stores:
+            store.refreshExits()
+            store.aim(field.cells[tick % 50], field.cells[-1 - tick % 70], field.corners)
+            swarm.update()
+            store.move()
+            store.resolveWalls()
+        skipped, stepped = (store for store, _ in stores)
+        for name in ('x', 'y', 'dx', 'dy'):
+            assert (getattr(skipped, name)[:200] == getattr(stepped, name)[:200]).all()
+    assert not stores[1][0].ahead.any()
+
+
+def test_few_ghosts_move_like_many(monkeypatch):
+    """
+    Test that the systems looping over a handful of ghosts move them exactly like the NumPy ones.
+    """
+    makeScreen()
+    level = compileLevel(startLevel)
+    navGraph = NavGraph(level)
+    field = DistanceField(navGraph)
+    cells = random.Random(6).sample([cell for cell in level.openCells if navGraph.exitsAt(*cell)], 12)
+    cells[:2] = level.ghostHouse()[:2]
+    stores = []
+    for limit in (entitystore.SCALAR_LIMIT, 0):
+        monkeypatch.setattr(entitystore, 'SCALAR_LIMIT', limit)
+        store = EntityStore(WallGrid(level), navGraph, field, level.ghostHouse(), seed=8)
+        swarm = EntityGroup(store, broadphase=SpatialHash())
+        for number, (col, row) in enumerate(cells):
+            ghost = Ghost(32, col * 32, row * 32, BEHAVIOURS[number % 4], field if number % 3 else None)
+            ghost.corner = number % 4
+            swarm.add(ghost)
+        stores.append((limit, store, swarm))
+    for tick in range(800):
+        results = []
+        for limit, store, swarm in stores:
+            monkeypatch.setattr(entitystore, 'SCALAR_LIMIT', limit)
+            store.refreshExits()
+            if store.targeted():
+                store.aim(field.cells[tick % 40], field.cells[-1 - tick % 60], field.corners)
+            swarm.update()
+            store.move()
+            store.resolveWalls()
+            if tick % 100 == 50:
+                store.moveTo(tick % 12, 288, 320)
+            results.append([store.refiled()] + [getattr(store, name)[:12].tolist() for name in store.COLUMNS])
+        assert results[0] == results[1]
+    wallGrid = WallGrid(level)
+    pushed = [(col * 32 + dx * 5, row * 32 + dy * 5, dx, dy) for col, row in level.openCells
+              for dx, dy in ((0, -1), (1, 0), (0, 1), (-1, 0)) if wallGrid.isWall(col + dx, row + dy)][::7][:12]
+    for limit, store, swarm in stores:
+        monkeypatch.setattr(entitystore, 'SCALAR_LIMIT', limit)
+        for slot, (x, y, dx, dy) in enumerate(pushed):
+            store.x[slot], store.y[slot], store.dx[slot], store.dy[slot] = x, y, dx, dy
+        store.resolveWalls()
+    assert stores[0][1].x[:12].tolist() == stores[1][1].x[:12].tolist() == [x - dx * 5 for x, _, dx, _ in pushed]
+    assert stores[0][1].y[:12].tolist() == stores[1][1].y[:12].tolist() == [y - dy * 5 for _, y, _, dy in pushed]
+
+
+def test_hashed_entity_group_refiles_the_ghosts_its_store_moves():
+    """
+    Test that ghosts moved by the systems of their store are found through the spatial hash like by scanning it.
+    """
+    makeScreen()
+    level = tileLevel(compileLevel(startLevel), 2, 2)
+    navGraph = NavGraph(level)
+    broadphase = SpatialHash()
+    store = EntityStore(WallGrid(level), navGraph, None, level.ghostHouse(), seed=5)
+    swarm = EntityGroup(store, broadphase=broadphase)
+    cells = random.Random(4).sample([cell for cell in level.openCells if navGraph.exitsAt(*cell)], 100)
+    for col, row in cells:
+        swarm.add(Ghost(32, col * 32, row * 32))
+    assert len(broadphase) == 100
+    views = [pygame.Rect(col * 32 - 40, row * 32 - 40, 112, 112) for col, row in cells[:20]]
+    for tick in range(300):
+        store.refreshExits()
+        swarm.update()
+        store.move()
+        store.resolveWalls()
+        if tick % 50 == 0:
+            store.moveTo(tick % 7, 32, 32)
+        for view in views:
+            assert {sprite.slot for sprite in swarm.collide(view)} == set(store.overlapping(view).tolist())
+    swarm.remove(*store.sprites[:10])
+    assert len(broadphase) == 90
+    assert set(swarm.collide(pygame.Rect(0, 0, level.width * 32, level.height * 32))) == set(store.sprites)
+
+
+def test_camera_scrolls_large_maps_and_culls_what_is_out_of_view():
+    """
+    Test that a map bigger than the screen is drawn around the player from a few chunks, culling the sprites out of view.
+    """
+    screen = makeScreen()
+    start = Level(screen, 'original', controls=None, seed=6)
+    start.run()
+    assert start.camera.showsAll and start.camera.offset == (0, 0)
+
+    level = Level(screen, 'original', level=tileLevel(start.levelMap, 4, 3), controls=None, seed=6)
+    player = level.player.sprite
+    assert level.wallGrid.tunnelRight == 4 * 19 * 32 - 3
+    player.rect.x = level.wallGrid.tunnelRight + 1
+    level.wallCollision()
+    assert player.rect.x == level.wallGrid.tunnelLeft
+    player.rect.topleft = (player.origin_x, player.origin_y)
+    level.run()
+    camera = level.camera
+    view = camera.view
+    assert camera.offset != (0, 0) and view.contains(player.rect)
+    assert view.right <= 4 * 19 * 32 and view.bottom <= 3 * 22 * 32
+    assert level.tiles.baked == len(level.tiles) <= 16
+    visible = camera.visible(level.ghost_sprites)
+    assert 0 < len(visible) < len(level.ghost_sprites)
+    assert all(view.colliderect(ghost.rect) for ghost in visible)
+    assert screen.get_at(camera.toScreen(player.rect).center) != screen.get_at((1, 1))
+
+    player.rect.x -= 64
+    level.coinCollision()
+    level.run()
+    assert level.dirtyRects is None and camera.view.contains(player.rect)
+    baked = level.tiles.baked
+    level.run()
+    assert level.tiles.baked == baked and level.dirtyRects is not None